@@ -0,0 +1 @@
+"""Performance benchmarks for icakad (``python -m benchmarks.run``)."""
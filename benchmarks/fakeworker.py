@@ -0,0 +1,216 @@
+"""In-process fake of the shorturl, paste and LLM workers.
+
+:class:`FakeWorker` serves the routes the clients use on a local
+``ThreadingHTTPServer`` with HTTP/1.1 keep-alive, so benchmarks measure
+the client side (sessions, transport, parsing) rather than the network::
+
+    with FakeWorker() as worker:
+        worker.seed_links(1000)
+        client = ShortURLClient(worker.base_url)
+        client.list_links()
+
+Routes:
+
+* ``GET /api?cursor=&limit=`` — link listing (``items``/``cursor``/``list_complete``)
+* ``POST /api`` and ``POST /api/<slug>`` — set a link; ``DELETE /api/<slug>``
+* ``POST /api/paste?id=&ttl=`` — create a paste (JSON ``{"text"}`` or plain text)
+* ``GET /raw/<id>`` and ``GET /api/list`` — paste text and listing
+* ``POST /llm/`` — ``{"response": ...}`` echoing the last message
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+__all__ = ["FakeWorker"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment; otherwise Nagle plus delayed
+    # ACKs add ~40ms to every keep-alive request and swamp the numbers.
+    disable_nagle_algorithm = True
+    wbufsize = -1
+    server: "_Server"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        path, query = self._target()
+        worker = self.server.worker
+        if path == "/api":
+            limit = query.get("limit")
+            self._send(200, worker.link_page(query.get("cursor"), int(limit) if limit else None))
+        elif path == "/api/list":
+            self._send(200, worker.paste_listing())
+        elif path.startswith("/raw/"):
+            text = worker.pastes_text(unquote(path[len("/raw/") :]))
+            if text is None:
+                self._send(404, b"Not found", "text/plain")
+            else:
+                self._send(200, text.encode("utf-8"), "text/plain; charset=utf-8")
+        else:
+            self._send(404, b"Not found", "text/plain")
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server API
+        path, query = self._target()
+        body = self._body()
+        worker = self.server.worker
+        if path == "/api/paste":
+            if (self.headers.get("Content-Type") or "").startswith("application/json"):
+                text = json.loads(body or b"{}").get("text", "")
+            else:
+                text = body.decode("utf-8")
+            self._send(200, worker.create_paste(text, query.get("id"), query.get("ttl")))
+        elif path == "/api" or path.startswith("/api/"):
+            payload = json.loads(body or b"{}")
+            slug = unquote(path[len("/api/") :]) if path.startswith("/api/") else payload.get("slug")
+            self._send(200, worker.set_link(str(slug), str(payload.get("url"))))
+        elif path.rstrip("/") == "/llm":
+            messages = json.loads(body or b"{}").get("messages") or [{}]
+            reply = f"echo: {messages[-1].get('content', '')}"
+            self._send(200, json.dumps({"response": reply}).encode())
+        else:
+            self._send(404, b"Not found", "text/plain")
+
+    def do_DELETE(self) -> None:  # noqa: N802 - http.server API
+        path, _ = self._target()
+        if path.startswith("/api/"):
+            self._send(200, self.server.worker.delete_link(unquote(path[len("/api/") :])))
+        else:
+            self._send(404, b"Not found", "text/plain")
+
+    def _target(self) -> Tuple[str, Dict[str, str]]:
+        parts = urlsplit(self.path)
+        return parts.path, {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+    def _body(self) -> bytes:
+        if (self.headers.get("Transfer-Encoding") or "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                if size == 0:
+                    self.rfile.readline()
+                    return b"".join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json") -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    worker: "FakeWorker"
+
+
+class FakeWorker:
+    """Local HTTP server with in-memory links and pastes."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._lock = threading.Lock()
+        self._links: Dict[str, str] = {}
+        self._pastes: Dict[str, Dict[str, Any]] = {}
+        self._listing: Optional[bytes] = None
+        self._server = _Server((host, port), _Handler)
+        self._server.worker = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def llm_url(self) -> str:
+        return f"{self.base_url}/llm/"
+
+    def start(self) -> "FakeWorker":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeWorker":
+        return self.start()
+
+    def __exit__(self, *exc: object) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------ data
+    def seed_links(self, count: int, *, prefix: str = "slug") -> None:
+        with self._lock:
+            for index in range(count):
+                self._links[f"{prefix}-{index}"] = f"https://example.com/{prefix}/{index}"
+
+    def seed_pastes(self, count: int, *, text: str = "hello world\n") -> None:
+        with self._lock:
+            for index in range(count):
+                self._store_paste(f"paste-{index}", text, None)
+            self._listing = None
+
+    def link_page(self, cursor: Optional[str], limit: Optional[int]) -> bytes:
+        with self._lock:
+            slugs = list(self._links)
+            start = int(cursor) if cursor else 0
+            end = len(slugs) if limit is None else min(len(slugs), start + limit)
+            items = [{"slug": slug, "url": self._links[slug]} for slug in slugs[start:end]]
+        complete = end >= len(slugs)
+        page = {"items": items, "cursor": None if complete else str(end), "list_complete": complete}
+        return json.dumps(page).encode()
+
+    def set_link(self, slug: str, url: str) -> bytes:
+        with self._lock:
+            self._links[slug] = url
+        return json.dumps({"ok": True, "slug": slug, "url": url}).encode()
+
+    def delete_link(self, slug: str) -> bytes:
+        with self._lock:
+            existed = self._links.pop(slug, None) is not None
+        return json.dumps({"ok": existed, "slug": slug}).encode()
+
+    def create_paste(self, text: str, paste_id: Optional[str], ttl: Optional[str]) -> bytes:
+        with self._lock:
+            paste_id = paste_id or f"paste-{len(self._pastes)}"
+            self._store_paste(paste_id, text, int(ttl) if ttl else None)
+            self._listing = None
+        return json.dumps({"id": paste_id, "url": f"{self.base_url}/{paste_id}"}).encode()
+
+    def pastes_text(self, paste_id: str) -> Optional[str]:
+        with self._lock:
+            paste = self._pastes.get(paste_id)
+            return None if paste is None else paste["text"]
+
+    def paste_listing(self) -> bytes:
+        with self._lock:
+            if self._listing is None:
+                entries = [{k: v for k, v in paste.items() if k != "text"} for paste in self._pastes.values()]
+                self._listing = json.dumps({"pastes": entries}).encode()
+            return self._listing
+
+    def _store_paste(self, paste_id: str, text: str, ttl: Optional[int]) -> None:
+        self._pastes[paste_id] = {
+            "id": paste_id,
+            "size": len(text.encode("utf-8")),
+            "created": "2024-01-01T00:00:00Z",
+            "ttl": ttl,
+            "text": text,
+        }
@@ -0,0 +1,456 @@
+"""Run the icakad benchmarks and compare them with a stored baseline.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.run                                   # JSON to stdout
+    python -m benchmarks.run --quick --baseline benchmarks/baseline.json
+    python -m benchmarks.run --output results.json --save-baseline benchmarks/baseline.json
+
+Suites:
+
+``client``
+    ops/sec, p50 and p99 for every client operation, called through the
+    package helpers (so settings lookup and the client registry count too)
+    against an in-process :class:`~benchmarks.fakeworker.FakeWorker`.
+``parse``
+    Link and paste listings of 10k/100k/1M items parsed the way
+    ``list_links``/``list_pastes`` do (``json``) and the way
+    ``iter_links``/``iter_pastes`` do (``stream``), with the tracemalloc
+    peak of each.
+``cli``
+    Cold start of ``python -m icakad`` in a fresh interpreter, with the
+    peak RSS of that child alone (``wait4`` rusage, as ``/usr/bin/time``).
+
+Results are JSON: ``{"meta": {...}, "results": {name: {metric: value}}}``.
+With ``--baseline`` every metric is compared against the stored run and the
+exit status is 1 when one got worse by more than ``--threshold``.  Numbers
+are only comparable on the same machine, so refresh the baseline
+(``--save-baseline``) when switching hardware.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+# Measure the working tree, not whichever icakad happens to be installed.
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from .fakeworker import FakeWorker  # noqa: E402
+
+SUITES = ("client", "parse", "cli")
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_THRESHOLD = 0.5
+
+#: Metrics where a larger value is an improvement; for all others smaller is better.
+HIGHER_IS_BETTER = frozenset({"ops_per_sec", "items_per_sec"})
+COMPARED_METRICS = HIGHER_IS_BETTER | {"p50_ms", "p99_ms", "seconds", "peak_bytes", "peak_rss_bytes"}
+#: Absolute differences below these never count as regressions; local
+#: round trips take about a millisecond and their tail jitters by as much.
+NOISE_FLOORS = {
+    "p50_ms": 0.5,
+    "p99_ms": 2.0,
+    "seconds": 0.005,
+    "peak_bytes": 64 * 1024,
+    "peak_rss_bytes": 16 * 1024 * 1024,
+}
+
+Results = Dict[str, Dict[str, Any]]
+
+
+# ----------------------------------------------------------------- measuring
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of *samples* (``q`` in 0..100)."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(durations: Sequence[float]) -> Dict[str, Any]:
+    """ops/sec, p50 and p99 (in milliseconds) for per-call *durations* in seconds."""
+    total = sum(durations)
+    return {
+        "iterations": len(durations),
+        "ops_per_sec": len(durations) / total if total else 0.0,
+        "p50_ms": percentile(durations, 50) * 1000,
+        "p99_ms": percentile(durations, 99) * 1000,
+    }
+
+
+def measure(func: Callable[[], Any], iterations: int, *, warmup: int = 5) -> Dict[str, Any]:
+    for _ in range(warmup):
+        func()
+    durations = []
+    clock = time.perf_counter
+    for _ in range(iterations):
+        start = clock()
+        func()
+        durations.append(clock() - start)
+    return summarize(durations)
+
+
+def peak_memory(func: Callable[[], Any]) -> int:
+    """Peak bytes allocated by Python objects while *func* runs."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# -------------------------------------------------------------------- suites
+def bench_client(iterations: int, *, links: int = 1000, pastes: int = 200) -> Results:
+    from icakad import (
+        AI,
+        add_short_link,
+        create_paste,
+        delete_short_link,
+        fetch_paste,
+        list_pastes,
+        list_short_links,
+        update_short_link,
+    )
+    from icakad import _client_from_settings
+    from icakad.config import Settings
+
+    results: Results = {}
+    with FakeWorker() as worker:
+        worker.seed_links(links)
+        worker.seed_pastes(pastes)
+        settings = Settings(shorturl_base=worker.base_url, paste_base=worker.base_url)
+        # Deletes remove the links the add benchmark created, in order.
+        added, deleted = itertools.count(), itertools.count()
+        operations: Dict[str, Callable[[], Any]] = {
+            "shorturl.add_link": lambda: add_short_link(
+                f"bench-{next(added)}", "https://example.com/bench", settings=settings
+            ),
+            "shorturl.edit_link": lambda: update_short_link(
+                "slug-1", "https://example.com/edited", settings=settings
+            ),
+            "shorturl.delete_link": lambda: delete_short_link(f"bench-{next(deleted)}", settings=settings),
+            "shorturl.list_links": lambda: list_short_links(settings=settings, print_output=False),
+            "shorturl.get_link": lambda: _client_from_settings(settings=settings).get_link("slug-1"),
+            "paste.create_paste": lambda: create_paste(text="benchmark paste\n", settings=settings),
+            "paste.fetch_paste": lambda: fetch_paste("paste-1", settings=settings),
+            "paste.fetch_paste_raw": lambda: fetch_paste("paste-1", raw=True, settings=settings),
+            "paste.list_pastes": lambda: list_pastes(settings=settings, print_output=False),
+            "ai.ask": lambda: AI.ask("ping", url=worker.llm_url),
+        }
+        for name, operation in operations.items():
+            results[f"client.{name}"] = measure(operation, iterations)
+    return results
+
+
+def _link_listing(count: int) -> bytes:
+    items = [{"slug": f"slug-{i}", "url": f"https://example.com/slug/{i}"} for i in range(count)]
+    return json.dumps({"items": items, "list_complete": True}).encode()
+
+
+def _paste_listing(count: int) -> bytes:
+    entries = [
+        {"id": f"paste-{i}", "size": 12, "created": "2024-01-01T00:00:00Z", "ttl": None} for i in range(count)
+    ]
+    return json.dumps({"pastes": entries}).encode()
+
+
+def _parsers() -> Dict[str, Callable[[bytes], int]]:
+    from icakad.common.jsonstream import iter_array_items, iter_chunks
+    from icakad.paste import LISTING_KEYS as PASTE_KEYS
+    from icakad.paste import _metadata_from_listing
+    from icakad.shorturl import LISTING_KEYS as LINK_KEYS
+    from icakad.shorturl import ShortURLClient, _normalize_item
+
+    client = ShortURLClient("http://bench.invalid")
+    chunk = 64 * 1024
+
+    def links_json(body: bytes) -> int:
+        return len(client._links_from_payload(json.loads(body)))
+
+    def links_stream(body: bytes) -> int:
+        items = iter_array_items(iter_chunks(body, chunk), LINK_KEYS)
+        return sum(1 for item in items if _normalize_item(item) is not None)
+
+    def pastes_json(body: bytes) -> int:
+        return len(_metadata_from_listing(json.loads(body)) or {})
+
+    def pastes_stream(body: bytes) -> int:
+        return sum(1 for _ in iter_array_items(iter_chunks(body, chunk), PASTE_KEYS))
+
+    return {
+        "links.json": links_json,
+        "links.stream": links_stream,
+        "pastes.json": pastes_json,
+        "pastes.stream": pastes_stream,
+    }
+
+
+def bench_parse(sizes: Iterable[int], *, repeats: int = 3) -> Results:
+    results: Results = {}
+    parsers = _parsers()
+    for size in sizes:
+        bodies = {"links": _link_listing(size), "pastes": _paste_listing(size)}
+        for name, parser in parsers.items():
+            body = bodies[name.split(".")[0]]
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                parsed = parser(body)
+                best = min(best, time.perf_counter() - start)
+            if parsed != size:
+                raise RuntimeError(f"{name} parsed {parsed} of {size} items")
+            results[f"parse.{name}.{size}"] = {
+                "items": size,
+                "bytes": len(body),
+                "seconds": best,
+                "items_per_sec": size / best if best else 0.0,
+                "peak_bytes": peak_memory(lambda: parser(body)),
+            }
+        del bodies
+    return results
+
+
+def bench_cli(runs: int) -> Results:
+    commands = {
+        "cli.import": ["-c", "import icakad"],
+        "cli.help": ["-m", "icakad", "--help"],
+        "cli.shorturl_list": ["-m", "icakad", "shorturl", "list", "--quiet"],
+    }
+    results: Results = {}
+    with FakeWorker() as worker, tempfile.TemporaryDirectory() as home:
+        worker.seed_links(100)
+        env = dict(os.environ)
+        env.update(
+            PYTHONPATH=os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")])),
+            HOME=home,
+            ICAKAD_NO_DAEMON="1",
+            ICAKAD_SHORTURL_BASE=worker.base_url,
+            ICAKAD_PASTE_BASE=worker.base_url,
+        )
+        env.pop("ICAKAD_CONFIG", None)
+        for name, argv in commands.items():
+            durations = []
+            peaks = []
+            for _ in range(runs):
+                elapsed, rss = _run_child([sys.executable, *argv], cwd=home, env=env)
+                durations.append(elapsed)
+                if rss is not None:
+                    peaks.append(rss)
+            results[name] = summarize(durations)
+            if peaks:
+                results[name]["peak_rss_bytes"] = max(peaks)
+    return results
+
+
+#: Runs argv[1:] with stdout discarded and prints "<seconds> <ru_maxrss>".
+_LAUNCHER = """\
+import os, sys, time
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    os.dup2(os.open(os.devnull, os.O_WRONLY), 1)
+    os.execv(sys.argv[1], sys.argv[1:])
+_, status, usage = os.wait4(pid, 0)
+print(time.perf_counter() - start, usage.ru_maxrss)
+sys.exit(os.waitstatus_to_exitcode(status))
+"""
+
+
+def _run_child(argv: List[str], **kwargs: Any) -> Tuple[float, Optional[int]]:
+    """Run *argv* to completion; return its wall time and its own peak RSS.
+
+    On Linux a child inherits its parent's maxrss across fork and exec, so
+    neither ``RUSAGE_CHILDREN`` nor ``wait4`` from this (large) process can
+    tell what the CLI itself used.  Like ``/usr/bin/time``, a bare
+    interpreter forks and reaps the command instead; its own small
+    footprint is below that of any Python child.
+    """
+    if not hasattr(os, "wait4"):  # pragma: no cover - Windows
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, check=True, **kwargs)
+        return time.perf_counter() - start, None
+    proc = subprocess.run(
+        [sys.executable, "-S", "-c", _LAUNCHER, *argv],
+        stdout=subprocess.PIPE,
+        check=True,
+        text=True,
+        **kwargs,
+    )
+    elapsed, maxrss = proc.stdout.split()
+    return float(elapsed), _kilobytes_to_bytes(int(maxrss))
+
+
+def _max_rss() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - not available on Windows
+        return None
+    return _kilobytes_to_bytes(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+def _kilobytes_to_bytes(maxrss: int) -> int:
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def run(
+    suites: Iterable[str] = SUITES,
+    *,
+    iterations: int = 300,
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    cli_runs: int = 10,
+) -> Dict[str, Any]:
+    """Run *suites* and return the ``{"meta", "results"}`` document."""
+    import icakad
+
+    selected = set(suites)
+    results: Results = {}
+    if "client" in selected:
+        results.update(bench_client(iterations))
+    if "parse" in selected:
+        results.update(bench_parse(sizes))
+    if "cli" in selected:
+        results.update(bench_cli(cli_runs))
+    rss = _max_rss()
+    if rss is not None:
+        results["process"] = {"peak_rss_bytes": rss}
+    return {
+        "meta": {
+            "icakad": getattr(icakad, "__version__", None),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "suites": sorted(selected),
+            "iterations": iterations,
+            "sizes": list(sizes),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": results,
+    }
+
+
+# ----------------------------------------------------------------- baseline
+def compare(
+    current: Mapping[str, Mapping[str, Any]],
+    baseline: Mapping[str, Mapping[str, Any]],
+    *,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """Compare two ``results`` mappings metric by metric.
+
+    Returns one row per metric present in both, with ``change`` as the
+    relative difference (positive = slower/larger) and ``regressed`` set
+    when that exceeds *threshold* and the absolute difference exceeds the
+    metric's :data:`NOISE_FLOORS` entry.  Benchmarks missing from either
+    side are skipped.
+    """
+    rows = []
+    for name in sorted(set(current) & set(baseline)):
+        for metric in sorted(COMPARED_METRICS & set(current[name]) & set(baseline[name])):
+            old, new = float(baseline[name][metric]), float(current[name][metric])
+            if old <= 0 or new <= 0:
+                continue
+            # Normalise so a positive change always means "worse".
+            change = old / new - 1 if metric in HIGHER_IS_BETTER else new / old - 1
+            rows.append(
+                {
+                    "name": name,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": change,
+                    "regressed": change > threshold and abs(new - old) > NOISE_FLOORS.get(metric, 0),
+                }
+            )
+    return rows
+
+
+def format_report(rows: Sequence[Mapping[str, Any]]) -> str:
+    lines = []
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        lines.append(
+            f"{row['name']:<36} {row['metric']:<15} {row['baseline']:>14.4g} -> {row['current']:<14.4g}"
+            f" {row['change']:+7.1%} {flag}".rstrip()
+        )
+    return "\n".join(lines)
+
+
+def _sizes(value: str) -> List[int]:
+    try:
+        sizes = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected comma-separated integers") from None
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError("expected comma-separated positive integers")
+    return sizes
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.split("\n")[0])
+    parser.add_argument("--suite", action="append", choices=SUITES, help="Run only this suite (repeatable).")
+    parser.add_argument("--iterations", type=int, default=300, help="Calls per client operation.")
+    parser.add_argument("--sizes", type=_sizes, default=list(DEFAULT_SIZES), help="Listing sizes to parse.")
+    parser.add_argument("--cli-runs", type=int, default=10, help="Interpreter starts per CLI command.")
+    parser.add_argument("--quick", action="store_true", help="Smoke run: 30 iterations, 10k items, 3 CLI runs.")
+    parser.add_argument("--output", help="Write the results JSON here instead of stdout.")
+    parser.add_argument("--baseline", help="Compare against this results file; exit 1 on regressions.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Relative slowdown that counts as a regression (default: %(default)s).",
+    )
+    parser.add_argument("--save-baseline", metavar="PATH", help="Also store the results as the new baseline.")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.iterations, args.sizes, args.cli_runs = 30, [10_000], 3
+    document = run(args.suite or SUITES, iterations=args.iterations, sizes=args.sizes, cli_runs=args.cli_runs)
+
+    text = json.dumps(document, indent=2, sort_keys=True) + "\n"
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text, encoding="utf-8")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    current, stored = dict(document["results"]), dict(baseline.get("results", {}))
+    meta, stored_meta = document["meta"], baseline.get("meta", {})
+    if any(meta[key] != stored_meta.get(key) for key in ("suites", "sizes")):
+        # The process-wide peak depends on everything that ran.
+        for results in (current, stored):
+            results.pop("process", None)
+    rows = compare(current, stored, threshold=args.threshold)
+    print(format_report(rows), file=sys.stderr)
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"{len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.", file=sys.stderr)
+        return 1
+    print(f"No regressions against {args.baseline}.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
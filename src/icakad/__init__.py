@@ -2,65 +2,169 @@
 
 from __future__ import annotations
 
+from importlib import import_module
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import TYPE_CHECKING, Any, BinaryIO, Dict, Iterable, Iterator, List, Mapping, Optional, Union
 
-from .ai import AI
-from .common import print_json, resolve_text_input, write_json, write_text
+from .common import print_json, resolve_text_input, save_rows, write_json, write_rows, write_text
 from .config import Settings, load_settings
-from .paste import PasteClient
-from .shorturl import ShortURLClient
+from .pool import ClientRegistry, close_all, configure_pool, get_registry
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .ai import AI
+    from .index import SlugIndex
+    from .paste import PasteClient
+    from .shorturl import BulkOperation, BulkResult, ShortURLClient
 
 __all__ = [
     "AI",
+    "AsyncAI",
+    "AsyncPasteClient",
+    "AsyncShortURLClient",
+    "ClientRegistry",
+    "ResponseCache",
     "Settings",
+    "SlugIndex",
+    "close_all",
+    "configure_pool",
     "load_settings",
     "add_short_link",
     "list_short_links",
     "update_short_link",
     "delete_short_link",
+    "bulk_short_links",
     "list_pastes",
     "create_paste",
+    "upload_paste",
     "fetch_paste",
+    "download_paste",
+    "fetch_pastes",
     "print_json",
 ]
 
 __version__ = "0.1.4"
 
+# Client classes pull in ``requests``; resolve them on first access so that
+# ``import icakad`` and the CLI's --help path stay cheap (PEP 562).
+_LAZY_ATTRIBUTES = {
+    "AI": ".ai",
+    "AsyncAI": ".aio",
+    "AsyncPasteClient": ".aio",
+    "AsyncShortURLClient": ".aio",
+    "PasteClient": ".paste",
+    "ResponseCache": ".cache",
+    "ShortURLClient": ".shorturl",
+    "SlugIndex": ".index",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
+
 
 # ----------------------------------------------------------------- factories
+def _apply_rate_limits(settings: Settings) -> None:
+    if settings.rate_limits:
+        from .ratelimit import configure_rate_limits
+
+        configure_rate_limits(settings.rate_limits)
+
+
 def _client_from_settings(
     *,
     settings: Optional[Settings] = None,
+    config_path: Optional[Union[str, Path]] = None,
     token: Optional[str] = None,
     shorturl_base: Optional[str] = None,
+    base_url: Optional[str] = None,
     timeout: Optional[int] = None,
 ) -> ShortURLClient:
-    cfg = settings or load_settings(token=token, shorturl_base=shorturl_base)
-    resolved_timeout = ShortURLClient.timeout if timeout is None else timeout
-    return ShortURLClient(
+    from .shorturl import ShortURLClient
+
+    cfg = settings or load_settings(
+        config_path,
+        token=token,
+        shorturl_base=base_url or shorturl_base,
+    )
+    _apply_rate_limits(cfg)
+    return get_registry().get(
+        ShortURLClient,
         base_url=cfg.shorturl_base,
         token=cfg.token,
-        timeout=resolved_timeout,
+        timeout=timeout,
+        pool_connections=cfg.pool_connections,
+        pool_maxsize=cfg.pool_maxsize,
+        pool_block=cfg.pool_block,
     )
 
 
 def _paste_client_from_settings(
     *,
     settings: Optional[Settings] = None,
+    config_path: Optional[Union[str, Path]] = None,
     paste_base: Optional[str] = None,
+    base_url: Optional[str] = None,
     token: Optional[str] = None,
     timeout: Optional[int] = None,
 ) -> PasteClient:
-    cfg = settings or load_settings(paste_base=paste_base, token=token)
-    resolved_timeout = PasteClient.timeout if timeout is None else timeout
-    return PasteClient(
+    from .paste import PasteClient
+
+    cfg = settings or load_settings(
+        config_path,
+        paste_base=base_url or paste_base,
+        token=token,
+    )
+    _apply_rate_limits(cfg)
+    return get_registry().get(
+        PasteClient,
         base_url=cfg.paste_base,
         token=cfg.token,
-        timeout=resolved_timeout,
+        timeout=timeout,
+        pool_connections=cfg.pool_connections,
+        pool_maxsize=cfg.pool_maxsize,
+        pool_block=cfg.pool_block,
     )
 
 
+def _raw_kwargs(save_to: Optional[Union[str, Path]], raw_output: bool, validate: bool) -> Dict[str, Any]:
+    """Client kwargs for ``raw_output`` passthrough (empty when parsing as usual)."""
+    if not raw_output:
+        return {}
+    if not save_to:
+        raise ValueError("raw_output=True requires save_to")
+    return {"save_raw": save_to, "validate": validate}
+
+
+def _emit_rows(
+    rows: Iterable[Mapping[str, Any]],
+    output_format: str,
+    *,
+    save_to: Optional[Union[str, Path]],
+    print_output: bool,
+    fields: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Stream listing rows to *save_to* (printing the summary) or to stdout."""
+    if save_to:
+        summary = save_rows(rows, save_to, output_format, fields=fields)
+        if print_output:
+            print_json(summary)
+        return summary
+    if print_output:
+        count = write_rows(rows, output_format, fields=fields)
+    else:
+        count = sum(1 for _ in rows)
+    return {"rows": count, "format": output_format}
+
+
 # -------------------------------------------------------------- short links
 def add_short_link(
     slug: str,
@@ -68,11 +172,14 @@ def add_short_link(
     *,
     save_to: Optional[Union[str, Path]] = None,
     settings: Optional[Settings] = None,
+    raw_output: bool = False,
+    validate: bool = False,
     **overrides: Any,
 ) -> Dict[str, Any]:
     client = _client_from_settings(settings=settings, **overrides)
-    result = client.add_link(slug, url)
-    if save_to:
+    raw = _raw_kwargs(save_to, raw_output, validate)
+    result = client.add_link(slug, url, **raw)
+    if save_to and not raw:
         write_json(result, save_to)
     return result
 
@@ -81,11 +188,43 @@ def list_short_links(
     *,
     save_to: Optional[Union[str, Path]] = None,
     settings: Optional[Settings] = None,
+    raw_output: bool = False,
+    validate: bool = False,
     print_output: bool = True,
+    page_size: Optional[int] = None,
+    output_format: Optional[str] = None,
     **overrides: Any,
 ) -> Dict[str, str]:
+    """Fetch every short link (optionally saving and printing them).
+
+    With ``raw_output=True`` the worker's response to a single listing
+    request is streamed to *save_to* unparsed, and the ``{"bytes", "path"}``
+    summary is returned (and printed) instead of the links.
+
+    With an *output_format* (see :data:`icakad.common.OUTPUT_FORMATS`) the
+    links are written as ``{"slug", "url"}`` rows page by page, to
+    *save_to* or else stdout, and only the ``{"rows", "format"}`` summary
+    is returned.
+    """
     client = _client_from_settings(settings=settings, **overrides)
-    links = client.list_links()
+    raw = _raw_kwargs(save_to, raw_output, validate)
+    if output_format is not None:
+        if raw:
+            raise ValueError("output_format cannot be combined with raw_output")
+        rows = (
+            {"slug": slug, "url": url}
+            for page in client.iter_pages(page_size=page_size)
+            for slug, url in page.links.items()
+        )
+        return _emit_rows(
+            rows, output_format, save_to=save_to, print_output=print_output, fields=["slug", "url"]
+        )
+    if raw:
+        summary = client.save_links(save_to, limit=page_size, validate=validate)
+        if print_output:
+            print_json(summary)
+        return summary
+    links = client.list_links(page_size=page_size)
     if save_to:
         write_json(links, save_to)
     if print_output:
@@ -99,11 +238,14 @@ def update_short_link(
     *,
     save_to: Optional[Union[str, Path]] = None,
     settings: Optional[Settings] = None,
+    raw_output: bool = False,
+    validate: bool = False,
     **overrides: Any,
 ) -> Dict[str, Any]:
     client = _client_from_settings(settings=settings, **overrides)
-    result = client.edit_link(slug, url)
-    if save_to:
+    raw = _raw_kwargs(save_to, raw_output, validate)
+    result = client.edit_link(slug, url, **raw)
+    if save_to and not raw:
         write_json(result, save_to)
     return result
 
@@ -113,15 +255,34 @@ def delete_short_link(
     *,
     save_to: Optional[Union[str, Path]] = None,
     settings: Optional[Settings] = None,
+    raw_output: bool = False,
+    validate: bool = False,
     **overrides: Any,
 ) -> Dict[str, Any]:
     client = _client_from_settings(settings=settings, **overrides)
-    result = client.delete_link(slug)
-    if save_to:
+    raw = _raw_kwargs(save_to, raw_output, validate)
+    result = client.delete_link(slug, **raw)
+    if save_to and not raw:
         write_json(result, save_to)
     return result
 
 
+def bulk_short_links(
+    operations: Iterable[Union[BulkOperation, Mapping[str, Any], Exception]],
+    *,
+    max_workers: int = 8,
+    settings: Optional[Settings] = None,
+    **overrides: Any,
+) -> Iterator[BulkResult]:
+    """Apply add/update/delete operations concurrently over one pooled client.
+
+    Results are yielded lazily and in input order; see
+    :meth:`ShortURLClient.iter_bulk`.
+    """
+    client = _client_from_settings(settings=settings, **overrides)
+    return client.iter_bulk(operations, max_workers=max_workers)
+
+
 # ------------------------------------------------------------------- pastes
 def create_paste(
     *,
@@ -132,17 +293,48 @@ def create_paste(
     as_plaintext: bool = False,
     save_to: Optional[Union[str, Path]] = None,
     settings: Optional[Settings] = None,
+    raw_output: bool = False,
+    validate: bool = False,
     **overrides: Any,
 ) -> Dict[str, Any]:
     client = _paste_client_from_settings(settings=settings, **overrides)
     body = resolve_text_input(text=text, text_file=text_file)
+    raw = _raw_kwargs(save_to, raw_output, validate)
     result = client.create_paste(
         body,
         paste_id=paste_id,
         ttl=ttl,
         as_plaintext=as_plaintext,
+        **raw,
     )
-    if save_to:
+    if save_to and not raw:
+        write_json(result, save_to)
+    return result
+
+
+def upload_paste(
+    source: Union[str, Path, BinaryIO],
+    *,
+    paste_id: Optional[str] = None,
+    ttl: Optional[int] = None,
+    as_plaintext: bool = True,
+    save_to: Optional[Union[str, Path]] = None,
+    settings: Optional[Settings] = None,
+    raw_output: bool = False,
+    validate: bool = False,
+    **overrides: Any,
+) -> Dict[str, Any]:
+    """Create a paste by streaming a file, ``"-"`` (stdin) or binary stream."""
+    client = _paste_client_from_settings(settings=settings, **overrides)
+    raw = _raw_kwargs(save_to, raw_output, validate)
+    result = client.upload_paste(
+        source,
+        paste_id=paste_id,
+        ttl=ttl,
+        as_plaintext=as_plaintext,
+        **raw,
+    )
+    if save_to and not raw:
         write_json(result, save_to)
     return result
 
@@ -151,10 +343,34 @@ def list_pastes(
     *,
     save_to: Optional[Union[str, Path]] = None,
     settings: Optional[Settings] = None,
+    raw_output: bool = False,
+    validate: bool = False,
     print_output: bool = True,
+    output_format: Optional[str] = None,
     **overrides: Any,
 ) -> Dict[str, Any]:
+    """Fetch the paste listing (optionally saving and printing it).
+
+    With ``raw_output=True`` the response body is streamed to *save_to*
+    unparsed and the ``{"bytes", "path"}`` summary is returned (and
+    printed) instead of the listing.
+
+    With an *output_format* the entries of the ``pastes`` array are parsed
+    from the streamed response and written one row at a time, to *save_to*
+    or else stdout; table formats take their columns from the first entry.
+    Only the ``{"rows", "format"}`` summary is returned.
+    """
     client = _paste_client_from_settings(settings=settings, **overrides)
+    raw = _raw_kwargs(save_to, raw_output, validate)
+    if output_format is not None:
+        if raw:
+            raise ValueError("output_format cannot be combined with raw_output")
+        return _emit_rows(client.iter_pastes(), output_format, save_to=save_to, print_output=print_output)
+    if raw:
+        summary = client.list_pastes(**raw)
+        if print_output:
+            print_json(summary)
+        return summary
     result = client.list_pastes()
     if save_to:
         write_json(result, save_to)
@@ -167,15 +383,41 @@ def fetch_paste(
     paste_id: str,
     *,
     raw: bool = False,
+    enrich: bool = True,
     save_to: Optional[Union[str, Path]] = None,
     settings: Optional[Settings] = None,
     **overrides: Any,
 ) -> Any:
     client = _paste_client_from_settings(settings=settings, **overrides)
-    result = client.fetch_paste(paste_id, raw=raw)
+    result = client.fetch_paste(paste_id, raw=raw, enrich=enrich)
     if save_to:
         if raw:
             write_text(result, save_to)
         else:
             write_json(result, save_to)
     return result
+
+
+def download_paste(
+    paste_id: str,
+    destination: Union[str, Path, BinaryIO],
+    *,
+    checksum: Optional[str] = None,
+    settings: Optional[Settings] = None,
+    **overrides: Any,
+) -> Dict[str, Any]:
+    """Stream a paste's raw bytes to a file path or binary stream."""
+    client = _paste_client_from_settings(settings=settings, **overrides)
+    return client.download_paste(paste_id, destination, checksum=checksum)
+
+
+def fetch_pastes(
+    paste_ids: Iterable[str],
+    *,
+    raw: bool = False,
+    enrich: bool = True,
+    settings: Optional[Settings] = None,
+    **overrides: Any,
+) -> List[Any]:
+    client = _paste_client_from_settings(settings=settings, **overrides)
+    return client.fetch_pastes(paste_ids, raw=raw, enrich=enrich)
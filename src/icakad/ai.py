@@ -2,14 +2,91 @@
 
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Mapping, MutableMapping, Optional
+import json
+import threading
+from dataclasses import dataclass
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-import requests
+from .common.concurrency import ordered_map
+from .pool import get_registry
+from .ratelimit import origin
+from .transport import CircuitBreaker, RetryPolicy, Timeout, Transport
+
+if TYPE_CHECKING:  # pragma: no cover
+    from requests import Session
+
+    from .cache import ResponseCache
+    from .ratelimit import TokenBucket
 
 
 Message = Mapping[str, str]
+#: Елемент за :meth:`AI.ask_many`: промпт, списък съобщения или речник
+#: с ``prompt``/``messages`` (и по избор ``id``).
+BatchItem = Union[str, Sequence[Message], Mapping[str, Any]]
+
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_TOKENS = 3000
+COMPACTION_STRATEGIES = ("trim", "summarize")
+
+__all__ = [
+    "AI",
+    "AskResult",
+    "Conversation",
+    "Turn",
+    "ask",
+    "ask_many",
+    "estimate_tokens",
+    "read_batch",
+    "stream",
+]
+
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_MESSAGE = 4
+_SUMMARY_PREFIX = "Резюме на предишния разговор: "
+_SUMMARY_PROMPT = (
+    "Обобщи накратко следния разговор, като запазиш фактите, решенията "
+    "и отворените въпроси:\n\n"
+)
+
+
+_STREAM_ACCEPT = "text/event-stream, application/x-ndjson;q=0.9, application/json;q=0.5"
+
+
+@dataclass
+class AskResult:
+    """Резултат за един елемент от :meth:`AI.ask_many`."""
 
-__all__ = ["AI", "ask"]
+    index: int
+    ok: bool
+    reply: Optional[str] = None
+    error: Optional[str] = None
+    id: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"index": self.index}
+        if self.id is not None:
+            data["id"] = self.id
+        data["ok"] = self.ok
+        if self.ok:
+            data["reply"] = self.reply
+        else:
+            data["error"] = self.error
+        return data
 
 
 class AI:
@@ -18,6 +95,62 @@ class AI:
     default_url: str = "https://llama.icakad.workers.dev/"
     default_timeout: float = 20.0
     _default_headers: Dict[str, str] = {"Content-Type": "application/json"}
+    #: Размер на пула връзки към работника (``None`` = стойността на регистъра).
+    pool_maxsize: Optional[int] = None
+    #: Кеш за отговорите (:class:`icakad.cache.ResponseCache`); ``None`` = без кеш.
+    cache: Optional[ResponseCache] = None
+    #: Отделен таймаут за свързване (``None`` = ``default_timeout`` за всичко).
+    connect_timeout: Optional[float] = None
+    #: Политика за повторни опити; генерирането няма странични ефекти,
+    #: затова POST заявките към работника се повтарят при временни грешки.
+    retry: RetryPolicy = RetryPolicy()
+    #: Създава прекъсвачите — по един за всеки работник (схема и хост), за
+    #: да не спира отказ на един ``url=`` заявките към друг; ``None`` ги изключва.
+    breaker_factory: Optional[Callable[[], CircuitBreaker]] = CircuitBreaker
+    _breakers: Dict[str, CircuitBreaker] = {}
+    _breakers_lock = threading.Lock()
+    #: Собствен ограничител на скоростта; ``None`` = общият за адреса.
+    rate_limiter: Optional[TokenBucket] = None
+
+    @classmethod
+    def get_session(cls, pool_maxsize: Optional[int] = None) -> Session:
+        """Връща keep-alive сесията на текущата нишка към LLM работника.
+
+        Сесиите идват от общия регистър (:mod:`icakad.pool`): всяка нишка
+        има своя :class:`requests.Session`, но всички делят един пул
+        връзки (:class:`icakad.pool.ThreadSessions`). Размерът на пула се
+        настройва с :func:`icakad.configure_pool`, а :func:`icakad.close_all`
+        го затваря. С *pool_maxsize* се взима отделен пул с този размер,
+        без да се пипа общият.
+        """
+        if pool_maxsize is not None:
+            return get_registry().session(("ai", pool_maxsize), pool_maxsize=pool_maxsize)
+        return get_registry().session("ai", pool_maxsize=cls.pool_maxsize)
+
+    @classmethod
+    def get_breaker(cls, url: Optional[str] = None) -> Optional[CircuitBreaker]:
+        """Връща прекъсвача за работника на *url* (по подразбиране ``default_url``)."""
+        factory = cls.breaker_factory
+        if factory is None:
+            return None
+        key = origin(url or cls.default_url)
+        with cls._breakers_lock:
+            breaker = cls._breakers.get(key)
+            if breaker is None:
+                breaker = cls._breakers[key] = factory()
+            return breaker
+
+    @classmethod
+    def get_transport(cls, timeout: Optional[float] = None, url: Optional[str] = None) -> Transport:
+        """Връща транспорт с политиките на класа (таймаути, повторения, прекъсвач за *url*)."""
+        read = cls.default_timeout if timeout is None else float(timeout)
+        return Transport(
+            session_factory=cls.get_session,
+            timeout=Timeout(read=read, connect=cls.connect_timeout),
+            retry=cls.retry,
+            breaker=cls.get_breaker(url),
+            limiter=cls.rate_limiter,
+        )
 
     @classmethod
     def ask(
@@ -27,26 +160,172 @@ class AI:
         messages: Optional[Iterable[Message]] = None,
         url: Optional[str] = None,
         timeout: Optional[float] = None,
-        session: Optional[requests.sessions.Session] = None,
+        session: Optional[Session] = None,
+        cache: Optional[ResponseCache] = None,
     ) -> str:
-        """Изпраща *prompt* и връща отговора от работника."""
+        """Изпраща *prompt* и връща отговора от работника.
+
+        Ако е зададен *cache* (или :attr:`AI.cache`), отговорът се търси по
+        SHA-256 на нормализираните съобщения и адреса и заявка се прави само
+        при липса в кеша.
+        """
 
-        payload = {"messages": cls._build_messages(prompt, messages)}
+        built = cls._build_messages(prompt, messages)
+        payload = {"messages": built}
         target_url = (url or cls.default_url).rstrip("/") + "/"
         request_timeout = cls.default_timeout if timeout is None else float(timeout)
 
-        sender = session.post if session is not None else requests.post
-        response = sender(
+        store = cache if cache is not None else cls.cache
+        key = None
+        if store is not None:
+            from .cache import cache_key
+
+            key = cache_key(built, target_url)
+            cached = store.get(key)
+            if cached is not None:
+                return cached
+
+        response = cls.get_transport(request_timeout, target_url).request(
+            "post",
             target_url,
+            idempotent=True,
+            session=session,
             json=payload,
             headers=dict(cls._default_headers),
-            timeout=request_timeout,
         )
-        response.raise_for_status()
         data = response.json()
         if not isinstance(data, MutableMapping) or "response" not in data:
             raise ValueError("LLM worker returned an unexpected payload")
-        return str(data["response"])
+        reply = str(data["response"])
+        if store is not None and key is not None:
+            store.put(key, reply)
+        return reply
+
+    @classmethod
+    def stream(
+        cls,
+        prompt: str,
+        *,
+        messages: Optional[Iterable[Message]] = None,
+        url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        session: Optional[Session] = None,
+    ) -> Iterator[str]:
+        """Генератор, който връща парчетата от отговора, докато пристигат.
+
+        Заявката е с ``"stream": true``; работникът може да отговори със SSE
+        (``text/event-stream``) или NDJSON. Ако върне обикновен JSON,
+        целият отговор се връща като едно парче. *timeout* важи за всяко
+        четене, а не за целия отговор.
+        """
+
+        payload = {"messages": cls._build_messages(prompt, messages), "stream": True}
+        target_url = (url or cls.default_url).rstrip("/") + "/"
+        request_timeout = cls.default_timeout if timeout is None else float(timeout)
+        headers = dict(cls._default_headers)
+        headers["Accept"] = _STREAM_ACCEPT
+
+        response = cls.get_transport(request_timeout, target_url).request(
+            "post",
+            target_url,
+            idempotent=True,
+            check=False,
+            session=session,
+            json=payload,
+            headers=headers,
+            stream=True,
+        )
+        try:
+            response.raise_for_status()
+            content_type = (response.headers.get("Content-Type") or "").lower()
+            if "text/event-stream" in content_type:
+                chunks = (_delta(data) for data in _sse_data(response.iter_lines()))
+            elif "ndjson" in content_type or "jsonl" in content_type:
+                chunks = (_delta(line) for line in _decoded_lines(response.iter_lines()))
+            else:
+                data = response.json()
+                if not isinstance(data, MutableMapping) or "response" not in data:
+                    raise ValueError("LLM worker returned an unexpected payload")
+                chunks = iter([str(data["response"])])
+            for chunk in chunks:
+                if chunk is _DONE:
+                    break
+                if chunk:
+                    yield chunk
+        finally:
+            response.close()
+
+    @classmethod
+    def ask_many(
+        cls,
+        items: Iterable[Union[BatchItem, Exception]],
+        *,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        session: Optional[Session] = None,
+        cache: Optional[ResponseCache] = None,
+        output: Optional[IO[str]] = None,
+        pool_maxsize: Optional[int] = None,
+    ) -> List[AskResult]:
+        """Изпраща много промптове паралелно и връща резултат за всеки от тях."""
+        return list(
+            cls.iter_ask_many(
+                items,
+                max_concurrency=max_concurrency,
+                url=url,
+                timeout=timeout,
+                session=session,
+                cache=cache,
+                output=output,
+                pool_maxsize=pool_maxsize,
+            )
+        )
+
+    @classmethod
+    def iter_ask_many(
+        cls,
+        items: Iterable[Union[BatchItem, Exception]],
+        *,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        session: Optional[Session] = None,
+        cache: Optional[ResponseCache] = None,
+        output: Optional[IO[str]] = None,
+        pool_maxsize: Optional[int] = None,
+    ) -> Iterator[AskResult]:
+        """Като :meth:`ask_many`, но връща резултатите поточно, в реда на входа.
+
+        Най-много *max_concurrency* заявки са активни едновременно, а входът
+        се чете мързеливо. Грешка в един елемент не спира останалите. Ако е
+        подаден *output*, всеки резултат се записва веднага като JSON ред.
+        За пълен паралелизъм пулът на сесията трябва да е поне
+        *max_concurrency* връзки: задайте *pool_maxsize* (отделен пул само
+        за това извикване) или :attr:`AI.pool_maxsize`.
+        """
+        def run(indexed: Any) -> str:
+            _, item = indexed
+            if isinstance(item, Exception):
+                raise item
+            prompt, messages, _ = _batch_item(item)
+            # Без *session* всяка нишка взима своя сесия от get_session().
+            thread_session = session
+            if thread_session is None and pool_maxsize is not None:
+                thread_session = cls.get_session(pool_maxsize)
+            return cls.ask(prompt, messages=messages, url=url, timeout=timeout, session=thread_session, cache=cache)
+
+        outcomes = ordered_map(run, enumerate(items), max_workers=max_concurrency)
+        for (index, item), reply, error in outcomes:
+            item_id = item.get("id") if isinstance(item, Mapping) else None
+            if error is None:
+                result = AskResult(index=index, ok=True, reply=reply, id=item_id)
+            else:
+                result = AskResult(index=index, ok=False, error=str(error), id=item_id)
+            if output is not None:
+                output.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+                output.flush()
+            yield result
 
     @staticmethod
     def _build_messages(
@@ -72,13 +351,309 @@ class AI:
         return [{"role": "user", "content": prompt}]
 
 
+def estimate_tokens(text: str) -> int:
+    """Груба оценка на броя токени (~4 символа на токен)."""
+    return max(1, -(-len(text) // _CHARS_PER_TOKEN))
+
+
+def _message_size(message: Mapping[str, str]) -> int:
+    return len(json.dumps(message).encode("utf-8"))
+
+
+def _payload_size(sizes: Iterable[int]) -> int:
+    # Дължината на ``{"messages": [...]}`` при сериализация като в requests.
+    total = count = 0
+    for size in sizes:
+        total += size
+        count += 1
+    return len('{"messages": []}') + total + max(count - 1, 0) * 2
+
+
+@dataclass
+class Turn:
+    """Едно съобщение от разговора с кеширан размер."""
+
+    role: str
+    content: str
+    tokens: int
+    size: int
+
+    @classmethod
+    def create(cls, role: str, content: str) -> "Turn":
+        message = {"role": role, "content": content}
+        return cls(
+            role=role,
+            content=content,
+            tokens=estimate_tokens(content) + _TOKENS_PER_MESSAGE,
+            size=_message_size(message),
+        )
+
+    def to_message(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+
+class Conversation:
+    """Многоходов разговор с ограничен размер на всяка заявка.
+
+    Историята се пази като :class:`Turn` обекти с оценка за токени и байтове.
+    Преди всяка заявка разговорът се свива до *max_tokens* (и *max_bytes*,
+    ако е зададен): при ``strategy="trim"`` най-старите реплики отпадат, а при
+    ``"summarize"`` се заменят с едно системно съобщение с резюме. Системният
+    промпт и последните *keep_recent* съобщения не се пипат.
+    :attr:`bytes_saved` показва колко байта по-малко са изпратени спрямо
+    изпращането на цялата история.
+    """
+
+    def __init__(
+        self,
+        system: Optional[str] = None,
+        *,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        max_bytes: Optional[int] = None,
+        strategy: str = "trim",
+        keep_recent: int = 2,
+        summarizer: Optional[Callable[[List[Dict[str, str]]], str]] = None,
+        url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        session: Optional[Session] = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> None:
+        if strategy not in COMPACTION_STRATEGIES:
+            raise ValueError(f"strategy must be one of {', '.join(COMPACTION_STRATEGIES)}")
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.max_bytes = max_bytes
+        self.strategy = strategy
+        self.keep_recent = max(1, keep_recent)
+        self.summarizer = summarizer
+        self.url = url
+        self.timeout = timeout
+        self.session = session
+        self.cache = cache
+        self.turns: List[Turn] = []
+        if system is not None:
+            self.turns.append(Turn.create("system", system))
+        self.bytes_saved = 0
+        self.requests = 0
+        # Размерът на пълната история, ако нищо не беше изрязано.
+        self._full_sizes: List[int] = [turn.size for turn in self.turns]
+
+    # ------------------------------------------------------------- state
+    @property
+    def messages(self) -> List[Dict[str, str]]:
+        """Съобщенията, които ще се изпратят при следващата заявка."""
+        return [turn.to_message() for turn in self.turns]
+
+    @property
+    def tokens(self) -> int:
+        return sum(turn.tokens for turn in self.turns)
+
+    @property
+    def size(self) -> int:
+        """Размер в байтове на JSON тялото за текущия прозорец."""
+        return _payload_size(turn.size for turn in self.turns)
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    # ----------------------------------------------------------- updates
+    def add(self, role: str, content: str) -> Turn:
+        """Добавя съобщение към историята (без да прави заявка)."""
+        turn = Turn.create(str(role), str(content))
+        self.turns.append(turn)
+        self._full_sizes.append(turn.size)
+        return turn
+
+    def ask(self, prompt: str) -> str:
+        """Добавя *prompt*, свива историята при нужда и връща отговора."""
+        AI._build_messages(prompt, None)
+        self.add("user", prompt)
+        self.compact()
+        reply = AI.ask(
+            "",
+            messages=self.messages,
+            url=self.url,
+            timeout=self.timeout,
+            session=self.session,
+            cache=self.cache,
+        )
+        self.requests += 1
+        self.bytes_saved += _payload_size(self._full_sizes) - self.size
+        self.add("assistant", reply)
+        return reply
+
+    def compact(self) -> int:
+        """Свива историята до бюджета; връща броя премахнати съобщения."""
+        if self._fits():
+            return 0
+        before = len(self.turns)
+        if self.strategy == "summarize":
+            self._summarize()
+        self._trim()
+        return max(before - len(self.turns), 0)
+
+    # ---------------------------------------------------------- internals
+    def _fits(self) -> bool:
+        if self.tokens > self.max_tokens:
+            return False
+        return self.max_bytes is None or self.size <= self.max_bytes
+
+    def _bounds(self) -> Tuple[int, int]:
+        """Индексите ``[start, stop)`` на репликите, които могат да отпаднат."""
+        start = 1 if self.turns and self.turns[0].role == "system" else 0
+        stop = max(start, len(self.turns) - self.keep_recent)
+        return start, stop
+
+    def _trim(self) -> None:
+        start, stop = self._bounds()
+        drop = start
+        while drop < stop and not self._fits_without(start, drop):
+            drop += 1
+        del self.turns[start:drop]
+
+    def _fits_without(self, start: int, stop: int) -> bool:
+        kept = self.turns[:start] + self.turns[stop:]
+        if sum(turn.tokens for turn in kept) > self.max_tokens:
+            return False
+        return self.max_bytes is None or _payload_size(turn.size for turn in kept) <= self.max_bytes
+
+    def _summarize(self) -> None:
+        start, stop = self._bounds()
+        if stop - start < 2:
+            return
+        older = [turn.to_message() for turn in self.turns[start:stop]]
+        summary = (self.summarizer or self._default_summarizer)(older)
+        self.turns[start:stop] = [Turn.create("system", _SUMMARY_PREFIX + summary)]
+
+    def _default_summarizer(self, messages: List[Dict[str, str]]) -> str:
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        return AI.ask(
+            _SUMMARY_PROMPT + transcript,
+            url=self.url,
+            timeout=self.timeout,
+            session=self.session,
+            cache=self.cache,
+        )
+
+
+def _batch_item(item: Any) -> Tuple[str, Optional[Iterable[Message]], Any]:
+    """Разпознава елемент от пакет: ``(prompt, messages, id)``."""
+    if isinstance(item, str):
+        return item, None, None
+    if isinstance(item, Mapping):
+        if "messages" in item:
+            return "", item["messages"], item.get("id")
+        if "prompt" in item:
+            return str(item["prompt"]), None, item.get("id")
+        raise ValueError("Batch item requires 'prompt' or 'messages'")
+    if isinstance(item, Sequence):
+        return "", item, None
+    raise TypeError("Batch items must be prompts, message lists or mappings")
+
+
+def read_batch(source: Union[str, IO[str]]) -> Iterator[Union[Dict[str, Any], str, ValueError]]:
+    """Чете JSONL файл (или поток) с елементи за :meth:`AI.ask_many`.
+
+    Всеки ред е JSON обект (``prompt``/``messages``/``id``), низ или масив
+    от съобщения. Невалидните редове се връщат като :class:`ValueError`,
+    за да се отчетат като грешки на своето място, без да спират пакета.
+    """
+    handle = open(source, "r", encoding="utf-8") if isinstance(source, str) else source
+    try:
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as exc:
+                yield ValueError(f"line {number}: invalid JSON ({exc})")
+                continue
+            if isinstance(item, list):
+                item = {"messages": item}
+            if not isinstance(item, (str, dict)):
+                yield ValueError(f"line {number}: expected an object, string or message list")
+                continue
+            yield item
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+_DONE = object()
+
+
+def _decoded_lines(lines: Iterable[bytes]) -> Iterator[str]:
+    for line in lines:
+        text = line.decode("utf-8") if isinstance(line, bytes) else line
+        if text.strip():
+            yield text
+
+
+class _SSEParser:
+    """Събира ``data:`` полетата на SSE събитията ред по ред."""
+
+    def __init__(self) -> None:
+        self._buffered: List[str] = []
+
+    def feed(self, line: Union[bytes, str]) -> Optional[str]:
+        """Обработва един ред; връща данните, когато събитието приключи."""
+        text = line.decode("utf-8") if isinstance(line, bytes) else line
+        if not text:
+            return self.flush()
+        if text.startswith("data:"):
+            value = text[5:]
+            self._buffered.append(value[1:] if value.startswith(" ") else value)
+        return None
+
+    def flush(self) -> Optional[str]:
+        if not self._buffered:
+            return None
+        data = "\n".join(self._buffered)
+        self._buffered = []
+        return data
+
+
+def _sse_data(lines: Iterable[bytes]) -> Iterator[str]:
+    """Събира ``data:`` полетата на всяко SSE събитие."""
+    parser = _SSEParser()
+    for line in lines:
+        data = parser.feed(line)
+        if data is not None:
+            yield data
+    data = parser.flush()
+    if data is not None:
+        yield data
+
+
+def _delta(data: str) -> Any:
+    """Извлича текста от едно събитие (Workers AI или OpenAI формат)."""
+    if data.strip() == "[DONE]":
+        return _DONE
+    try:
+        event = json.loads(data)
+    except ValueError:
+        return data
+    if isinstance(event, Mapping):
+        if "response" in event:
+            return str(event["response"] or "")
+        choices = event.get("choices")
+        if isinstance(choices, list) and choices and isinstance(choices[0], Mapping):
+            delta = choices[0].get("delta") or {}
+            if isinstance(delta, Mapping):
+                return str(delta.get("content") or "")
+        return ""
+    return str(event)
+
+
 def ask(
     prompt: str,
     *,
     messages: Optional[Iterable[Message]] = None,
     url: Optional[str] = None,
     timeout: Optional[float] = None,
-    session: Optional[requests.sessions.Session] = None,
+    session: Optional[Session] = None,
+    cache: Optional[ResponseCache] = None,
 ) -> str:
     """Улеснена обвивка за :meth:`AI.ask` достъпна на ниво модул."""
 
@@ -88,4 +663,47 @@ def ask(
         url=url,
         timeout=timeout,
         session=session,
+        cache=cache,
+    )
+
+
+def ask_many(
+    items: Iterable[Union[BatchItem, Exception]],
+    *,
+    max_concurrency: int = DEFAULT_CONCURRENCY,
+    url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    session: Optional[Session] = None,
+    cache: Optional[ResponseCache] = None,
+    output: Optional[IO[str]] = None,
+) -> List[AskResult]:
+    """Улеснена обвивка за :meth:`AI.ask_many` достъпна на ниво модул."""
+
+    return AI.ask_many(
+        items,
+        max_concurrency=max_concurrency,
+        url=url,
+        timeout=timeout,
+        session=session,
+        cache=cache,
+        output=output,
+    )
+
+
+def stream(
+    prompt: str,
+    *,
+    messages: Optional[Iterable[Message]] = None,
+    url: Optional[str] = None,
+    timeout: Optional[float] = None,
+    session: Optional[Session] = None,
+) -> Iterator[str]:
+    """Улеснена обвивка за :meth:`AI.stream` достъпна на ниво модул."""
+
+    return AI.stream(
+        prompt,
+        messages=messages,
+        url=url,
+        timeout=timeout,
+        session=session,
     )
@@ -0,0 +1,773 @@
+"""Native asyncio clients for the shorturl, paste and LLM workers.
+
+These mirror :class:`~icakad.shorturl.ShortURLClient`,
+:class:`~icakad.paste.PasteClient` and :class:`~icakad.ai.AI` method for
+method, but every network call is a coroutine built on ``httpx``.  Install
+the optional dependency with ``pip install icakad[async]``.
+
+All clients share one :class:`httpx.AsyncClient` per event loop (see
+:func:`get_async_client`), so thousands of concurrent calls reuse a bounded
+keep-alive pool.  Calls honour the client ``timeout`` and can be cancelled
+like any other task; streamed responses are always closed on cancellation.
+Call :func:`aclose_all` before the loop shuts down.  Reads from upload
+sources (files, stdin) and writes of downloads run in the loop's default
+executor, so large pastes do not stall other tasks.
+
+Requests go through :func:`icakad.transport.send_async`, so they follow the
+synchronous clients' rules: pacing by the shared per-origin
+:mod:`icakad.ratelimit` buckets (without blocking the event loop), retries
+per the client's :class:`~icakad.transport.RetryPolicy` honouring
+``Retry-After``, a per-client :class:`~icakad.transport.CircuitBreaker`
+(per worker for :class:`AsyncAI`) and the same error messages.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import weakref
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .ai import AI, AskResult, BatchItem, Message, _batch_item, _delta, _DONE, _SSEParser
+from .paste import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_METADATA_TTL,
+    PasteError,
+    _create_params,
+    _decode_json,
+    _is_regular_file,
+    _json_text_chunks,
+    _metadata_from_listing,
+    _open_source,
+    _read_chunks,
+    _read_head,
+)
+from .shorturl import (
+    DEFAULT_BULK_WORKERS,
+    DEFAULT_TIMEOUT,
+    BulkOperation,
+    BulkResult,
+    LinkPage,
+    ShortURLError,
+    _coerce_operation,
+    _extract_cursor,
+    _extract_items,
+    _json_object,
+    _normalize_item,
+)
+from .transport import NO_RETRY, CircuitBreaker, RetryPolicy, check_response, send_async
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+
+    from .cache import ResponseCache
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+
+__all__ = [
+    "AsyncAI",
+    "AsyncPasteClient",
+    "AsyncShortURLClient",
+    "aclose_all",
+    "configure_async_pool",
+    "get_async_client",
+]
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_pool_limits: Dict[str, Optional[int]] = {
+    "max_connections": DEFAULT_MAX_CONNECTIONS,
+    "max_keepalive_connections": DEFAULT_MAX_KEEPALIVE,
+}
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _httpx() -> Any:
+    try:
+        import httpx
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError(
+            "The asyncio clients require httpx; install it with 'pip install icakad[async]'."
+        ) from exc
+    return httpx
+
+
+def configure_async_pool(
+    *,
+    max_connections: Optional[int] = None,
+    max_keepalive_connections: Optional[int] = None,
+) -> None:
+    """Set the limits used for shared async pools created from now on."""
+    if max_connections is not None:
+        _pool_limits["max_connections"] = max_connections
+    if max_keepalive_connections is not None:
+        _pool_limits["max_keepalive_connections"] = max_keepalive_connections
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the :class:`httpx.AsyncClient` shared by the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        httpx = _httpx()
+        client = httpx.AsyncClient(limits=httpx.Limits(**_pool_limits))
+        _clients[loop] = client
+    return client
+
+
+async def aclose_all() -> None:
+    """Close the shared pool of the running event loop."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _ordered(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    max_concurrency: int,
+) -> AsyncIterator[Tuple[T, Optional[R], Optional[Exception]]]:
+    """Asyncio counterpart of :func:`icakad.common.concurrency.ordered_map`.
+
+    Yields ``(item, result, error)`` in input order with at most
+    *max_concurrency* calls in flight; *items* is consumed lazily.  Leaving
+    the loop early cancels whatever is still pending.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(item: T) -> Tuple[T, Optional[R], Optional[Exception]]:
+        async with semaphore:
+            try:
+                return item, await func(item), None
+            except Exception as exc:  # noqa: BLE001 - surfaced to the caller per item
+                return item, None, exc
+
+    pending: Deque[asyncio.Task] = deque()
+    try:
+        for item in items:
+            pending.append(asyncio.ensure_future(run(item)))
+            if len(pending) >= max_concurrency * 2:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+@dataclass
+class _AsyncBase:
+    base_url: str
+    token: Optional[str] = None
+    timeout: float = DEFAULT_TIMEOUT
+    client: Optional[httpx.AsyncClient] = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    breaker: Optional[CircuitBreaker] = field(default_factory=CircuitBreaker)
+
+    def __post_init__(self) -> None:
+        self.base_url = self.base_url.rstrip("/")
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return self.client if self.client is not None else get_async_client()
+
+    async def __aenter__(self: T) -> T:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Release what this client created, which is nothing.
+
+        An injected ``client`` belongs to the caller (like a ``session`` given
+        to the sync clients) and may be shared by several icakad clients; the
+        per-loop pool is closed by :func:`aclose_all`.
+        """
+
+
+@dataclass
+class AsyncShortURLClient(_AsyncBase):
+    """Asyncio counterpart of :class:`icakad.shorturl.ShortURLClient`."""
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        url = f"{self.base_url}{path}"
+        # Every shorturl call sets, deletes or reads a slug: safe to repeat.
+        response = await send_async(
+            lambda: self._client.request(
+                method.upper(), url, headers=self._headers(), timeout=self.timeout, **kwargs
+            ),
+            url,
+            idempotent=True,
+            retry=self.retry,
+            breaker=self.breaker,
+            error=ShortURLError,
+        )
+        return check_response(response, ShortURLError)
+
+    async def add_link(self, slug: str, url: str) -> Dict[str, object]:
+        response = await self._request("post", "/api", json={"slug": slug, "url": url})
+        return _json_object(response)
+
+    async def edit_link(self, slug: str, url: str) -> Dict[str, object]:
+        response = await self._request("post", f"/api/{slug}", json={"slug": slug, "url": url})
+        return _json_object(response)
+
+    async def delete_link(self, slug: str) -> Dict[str, object]:
+        response = await self._request("delete", f"/api/{slug}")
+        return _json_object(response)
+
+    async def bulk(
+        self,
+        operations: Iterable[Union[BulkOperation, Mapping[str, Any], Exception]],
+        *,
+        max_concurrency: int = DEFAULT_BULK_WORKERS,
+    ) -> List[BulkResult]:
+        """Apply many operations concurrently; one :class:`BulkResult` per input."""
+        prepared = enumerate(_coerce_operation(operation) for operation in operations)
+        results: List[BulkResult] = []
+        async for (index, operation), response, error in _ordered(
+            self._apply_operation, prepared, max_concurrency
+        ):
+            op = operation.op if isinstance(operation, BulkOperation) else "invalid"
+            slug = operation.slug if isinstance(operation, BulkOperation) else ""
+            if error is None:
+                results.append(BulkResult(index=index, op=op, slug=slug, ok=True, response=response))
+            else:
+                results.append(BulkResult(index=index, op=op, slug=slug, ok=False, error=str(error)))
+        return results
+
+    async def _apply_operation(self, indexed: Any) -> Dict[str, object]:
+        _, operation = indexed
+        if isinstance(operation, Exception):
+            raise operation
+        if operation.op == "delete":
+            return await self.delete_link(operation.slug)
+        if operation.op == "update":
+            return await self.edit_link(operation.slug, operation.url or "")
+        return await self.add_link(operation.slug, operation.url or "")
+
+    async def list_links(self, *, page_size: Optional[int] = None) -> Dict[str, str]:
+        """Return every link, following continuation cursors."""
+        links: Dict[str, str] = {}
+        async for page in self.iter_pages(page_size=page_size):
+            links.update(page.links)
+        return links
+
+    async def list_page(self, *, cursor: Optional[str] = None, limit: Optional[int] = None) -> LinkPage:
+        """Fetch one page of the listing (``GET /api?cursor=…&limit=…``)."""
+        params: Dict[str, object] = {}
+        if cursor:
+            params["cursor"] = cursor
+        if limit is not None:
+            params["limit"] = int(limit)
+        response = await self._request("get", "/api", params=params or None)
+        try:
+            payload = response.json()
+        except ValueError as exc:
+            raise ShortURLError("ShortURL API returned invalid JSON") from exc
+        links: Dict[str, str] = {}
+        for item in _extract_items(payload):
+            pair = _normalize_item(item)
+            if pair is not None:
+                links[pair[0]] = pair[1]
+        return LinkPage(links=links, cursor=_extract_cursor(payload), etag=response.headers.get("ETag"))
+
+    async def iter_pages(self, *, page_size: Optional[int] = None) -> AsyncIterator[LinkPage]:
+        """Yield listing pages one by one, following cursors."""
+        page = await self.list_page(limit=page_size)
+        seen = {page.cursor}
+        yield page
+        while page.cursor is not None:
+            page = await self.list_page(cursor=page.cursor, limit=page_size)
+            if page.cursor in seen:
+                # A repeated cursor would loop forever; treat it as the end.
+                page.cursor = None
+            seen.add(page.cursor)
+            yield page
+
+    async def get_link(self, slug: str) -> Optional[str]:
+        return (await self.list_links()).get(slug)
+
+    async def exists(self, slug: str) -> bool:
+        return await self.get_link(slug) is not None
+
+
+@dataclass
+class AsyncPasteClient(_AsyncBase):
+    """Asyncio counterpart of :class:`icakad.paste.PasteClient`."""
+
+    metadata_ttl: Optional[float] = DEFAULT_METADATA_TTL
+    _metadata: Optional[Dict[str, Dict[str, Any]]] = field(default=None, init=False, repr=False)
+    _metadata_loaded_at: float = field(default=0.0, init=False, repr=False)
+    _metadata_lock: Optional[asyncio.Lock] = field(default=None, init=False, repr=False)
+
+    def _headers(self, *, content_type: Optional[str] = None) -> Dict[str, str]:
+        headers: Dict[str, str] = {"Accept": "application/json"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def _check(self, response: httpx.Response) -> httpx.Response:
+        return check_response(response, PasteError)
+
+    def _json(self, response: httpx.Response) -> Dict[str, Any]:
+        self._check(response)
+        return _decode_json(response)
+
+    async def create_paste(
+        self,
+        text: str,
+        *,
+        paste_id: Optional[str] = None,
+        ttl: Optional[int] = None,
+        as_plaintext: bool = False,
+    ) -> Dict[str, Any]:
+        if not isinstance(text, str) or not text:
+            raise ValueError("text must be a non-empty string")
+        kwargs: Dict[str, Any]
+        if as_plaintext:
+            kwargs = {
+                "content": text.encode("utf-8"),
+                "headers": self._headers(content_type="text/plain; charset=utf-8"),
+            }
+        else:
+            kwargs = {"json": {"text": text}, "headers": self._headers(content_type="application/json")}
+        url = f"{self.base_url}/api/paste"
+        params = _create_params(paste_id, ttl)
+        # Without an explicit id a retry could create a duplicate paste.
+        response = await send_async(
+            lambda: self._client.post(url, params=params, timeout=self.timeout, **kwargs),
+            url,
+            idempotent=bool(paste_id),
+            retry=self.retry,
+            breaker=self.breaker,
+            error=PasteError,
+        )
+        result = self._json(response)
+        self.invalidate_metadata()
+        return result
+
+    async def upload_paste(
+        self,
+        source: Union[str, Path, BinaryIO],
+        *,
+        paste_id: Optional[str] = None,
+        ttl: Optional[int] = None,
+        as_plaintext: bool = True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """Create a paste from a file, ``"-"`` (stdin) or a binary stream, chunk by chunk."""
+        with _open_source(source) as fh:
+            first = await _blocking(_read_head, fh, chunk_size)
+            chunks = _read_chunks(fh, chunk_size, first)
+            if as_plaintext:
+                headers = self._headers(content_type="text/plain; charset=utf-8")
+                if _is_regular_file(fh):
+                    headers["Content-Length"] = str(os.fstat(fh.fileno()).st_size - fh.tell() + len(first))
+            else:
+                headers = self._headers(content_type="application/json")
+                chunks = _json_text_chunks(chunks)
+            url = f"{self.base_url}/api/paste"
+            # The streamed body cannot be replayed, so there are no retries.
+            response = await send_async(
+                lambda: self._client.post(
+                    url,
+                    params=_create_params(paste_id, ttl),
+                    content=_aiter(chunks),
+                    headers=headers,
+                    timeout=self.timeout,
+                ),
+                url,
+                idempotent=False,
+                retry=NO_RETRY,
+                breaker=self.breaker,
+                error=PasteError,
+            )
+        result = self._json(response)
+        self.invalidate_metadata()
+        return result
+
+    async def fetch_paste(
+        self,
+        paste_id: str,
+        *,
+        raw: bool = False,
+        enrich: bool = True,
+    ) -> Union[str, Dict[str, Any]]:
+        """Fetch a paste's text, merged with its listing metadata unless *raw*."""
+        url = f"{self.base_url}/raw/{paste_id}"
+        response = await send_async(
+            lambda: self._client.get(url, headers=self._headers(), timeout=self.timeout),
+            url,
+            idempotent=True,
+            retry=self.retry,
+            breaker=self.breaker,
+            error=PasteError,
+        )
+        text = self._check(response).text
+        if raw:
+            return text
+        details: Dict[str, Any] = {"id": paste_id, "url": f"{self.base_url}/{paste_id}", "text": text}
+        if enrich:
+            details.update(await self.paste_metadata(paste_id))
+        return details
+
+    async def fetch_pastes(
+        self,
+        paste_ids: Iterable[str],
+        *,
+        raw: bool = False,
+        enrich: bool = True,
+        max_concurrency: int = 16,
+    ) -> List[Union[str, Dict[str, Any]]]:
+        """Fetch several pastes concurrently (in order) with at most one listing call."""
+        ids = list(paste_ids)
+        if enrich and not raw:
+            await self._metadata_index()
+
+        async def fetch(paste_id: str) -> Union[str, Dict[str, Any]]:
+            return await self.fetch_paste(paste_id, raw=raw, enrich=enrich)
+
+        results: List[Union[str, Dict[str, Any]]] = []
+        async for _, result, error in _ordered(fetch, ids, max_concurrency):
+            if error is not None:
+                raise error
+            results.append(result)  # type: ignore[arg-type]
+        return results
+
+    async def download_paste(
+        self,
+        paste_id: str,
+        destination: Union[str, Path, BinaryIO],
+        *,
+        checksum: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """Stream a paste's raw bytes to *destination* (a path or binary file object)."""
+        digest = hashlib.new(checksum) if checksum else None
+        summary: Dict[str, Any] = {"id": paste_id, "bytes": 0}
+        url = f"{self.base_url}/raw/{paste_id}"
+        request = self._client.build_request("GET", url, headers=self._headers(), timeout=self.timeout)
+        response = await send_async(
+            lambda: self._client.send(request, stream=True),
+            url,
+            idempotent=True,
+            retry=self.retry,
+            breaker=self.breaker,
+            error=PasteError,
+        )
+        try:
+            if response.is_error:
+                await response.aread()
+                self._check(response)
+            if hasattr(destination, "write"):
+                summary["bytes"] = await _acopy(response, destination, digest, chunk_size)
+            else:
+                target = Path(destination).expanduser().resolve()
+                target.parent.mkdir(parents=True, exist_ok=True)
+                partial_target = target.with_name(target.name + ".part")
+                try:
+                    with partial_target.open("wb") as fh:
+                        summary["bytes"] = await _acopy(response, fh, digest, chunk_size)
+                    os.replace(partial_target, target)
+                except BaseException:
+                    if partial_target.exists():
+                        partial_target.unlink()
+                    raise
+                summary["path"] = str(target)
+        finally:
+            await response.aclose()
+        if digest is not None:
+            summary["algorithm"] = digest.name
+            summary["digest"] = digest.hexdigest()
+        return summary
+
+    async def list_pastes(self) -> Dict[str, Any]:
+        url = f"{self.base_url}/api/list"
+        response = await send_async(
+            lambda: self._client.get(url, headers=self._headers(), timeout=self.timeout),
+            url,
+            idempotent=True,
+            retry=self.retry,
+            breaker=self.breaker,
+            error=PasteError,
+        )
+        listing = self._json(response)
+        index = _metadata_from_listing(listing)
+        self._metadata = index if index is not None else {}
+        self._metadata_loaded_at = asyncio.get_running_loop().time()
+        return listing
+
+    async def iter_pastes(self) -> AsyncIterator[Dict[str, Any]]:
+        """Yield paste metadata entries from the listing."""
+        listing = await self.list_pastes()
+        for item in listing.get("pastes") or []:
+            if isinstance(item, dict):
+                yield item
+
+    # ------------------------------------------------------------- metadata
+    async def paste_metadata(self, paste_id: str) -> Dict[str, Any]:
+        """Return listing metadata for *paste_id* (without ``text``), or ``{}``."""
+        return dict((await self._metadata_index()).get(paste_id, {}))
+
+    async def refresh_metadata(self) -> None:
+        await self.list_pastes()
+
+    def invalidate_metadata(self) -> None:
+        self._metadata = None
+
+    async def _metadata_index(self) -> Dict[str, Dict[str, Any]]:
+        if self._metadata_lock is None:
+            self._metadata_lock = asyncio.Lock()
+        # Concurrent fetches wait here for a single listing call.
+        async with self._metadata_lock:
+            if self._metadata is None or self._metadata_expired():
+                try:
+                    await self.list_pastes()
+                except PasteError:
+                    self._metadata = {}
+                    self._metadata_loaded_at = asyncio.get_running_loop().time()
+            return self._metadata or {}
+
+    def _metadata_expired(self) -> bool:
+        if self.metadata_ttl is None:
+            return False
+        return asyncio.get_running_loop().time() - self._metadata_loaded_at >= self.metadata_ttl
+
+
+class AsyncAI:
+    """Asyncio counterpart of :class:`icakad.ai.AI`.
+
+    Defaults (URL, timeout, headers, cache, retry policy and rate limiter)
+    are read from :class:`AI`, so configuring one configures both.
+    """
+
+    @classmethod
+    def _prepare(
+        cls,
+        prompt: str,
+        messages: Optional[Iterable[Message]],
+        url: Optional[str],
+        timeout: Optional[float],
+    ) -> Any:
+        built = AI._build_messages(prompt, messages)
+        target_url = (url or AI.default_url).rstrip("/") + "/"
+        request_timeout = AI.default_timeout if timeout is None else float(timeout)
+        return built, target_url, request_timeout
+
+    @classmethod
+    async def ask(
+        cls,
+        prompt: str,
+        *,
+        messages: Optional[Iterable[Message]] = None,
+        url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+    ) -> str:
+        """Send *prompt* (or *messages*) and return the worker's reply."""
+        built, target_url, request_timeout = cls._prepare(prompt, messages, url, timeout)
+        store = cache if cache is not None else AI.cache
+        key = None
+        if store is not None:
+            from .cache import cache_key
+
+            key = cache_key(built, target_url)
+            cached = store.get(key)
+            if cached is not None:
+                return cached
+
+        http = client if client is not None else get_async_client()
+        # Generation has no side effects, so retries are safe (as in AI.ask).
+        response = await send_async(
+            lambda: http.post(
+                target_url,
+                json={"messages": built},
+                headers=dict(AI._default_headers),
+                timeout=request_timeout,
+            ),
+            target_url,
+            idempotent=True,
+            retry=AI.retry,
+            breaker=AI.get_breaker(target_url),
+            limiter=AI.rate_limiter,
+        )
+        check_response(response)
+        data = response.json()
+        if not isinstance(data, Mapping) or "response" not in data:
+            raise ValueError("LLM worker returned an unexpected payload")
+        reply = str(data["response"])
+        if store is not None and key is not None:
+            store.put(key, reply)
+        return reply
+
+    @classmethod
+    async def stream(
+        cls,
+        prompt: str,
+        *,
+        messages: Optional[Iterable[Message]] = None,
+        url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+    ) -> AsyncIterator[str]:
+        """Yield reply text as it arrives (SSE, NDJSON or a one-shot JSON fallback)."""
+        from .ai import _STREAM_ACCEPT
+
+        built, target_url, request_timeout = cls._prepare(prompt, messages, url, timeout)
+        headers = dict(AI._default_headers)
+        headers["Accept"] = _STREAM_ACCEPT
+        http = client if client is not None else get_async_client()
+        request = http.build_request(
+            "POST",
+            target_url,
+            json={"messages": built, "stream": True},
+            headers=headers,
+            timeout=request_timeout,
+        )
+        response = await send_async(
+            lambda: http.send(request, stream=True),
+            target_url,
+            idempotent=True,
+            retry=AI.retry,
+            breaker=AI.get_breaker(target_url),
+            limiter=AI.rate_limiter,
+        )
+        try:
+            check_response(response)
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "text/event-stream" in content_type:
+                parser = _SSEParser()
+                async for line in response.aiter_lines():
+                    data = parser.feed(line)
+                    if data is None:
+                        continue
+                    chunk = _delta(data)
+                    if chunk is _DONE:
+                        return
+                    if chunk:
+                        yield chunk
+                data = parser.flush()
+                chunk = _delta(data) if data is not None else None
+                if chunk and chunk is not _DONE:
+                    yield chunk
+            elif "ndjson" in content_type or "jsonl" in content_type:
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = _delta(line)
+                    if chunk is _DONE:
+                        return
+                    if chunk:
+                        yield chunk
+            else:
+                data = json.loads(await response.aread())
+                if not isinstance(data, Mapping) or "response" not in data:
+                    raise ValueError("LLM worker returned an unexpected payload")
+                yield str(data["response"])
+        finally:
+            await response.aclose()
+
+    @classmethod
+    async def ask_many(
+        cls,
+        items: Iterable[Union[BatchItem, Exception]],
+        *,
+        max_concurrency: int = 32,
+        url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+        output: Optional[IO[str]] = None,
+    ) -> List[AskResult]:
+        """Answer many prompts concurrently; results keep input order.
+
+        Each result is written to *output* (as a JSON line) as soon as it and
+        every earlier one are done.
+        """
+        results: List[AskResult] = []
+
+        async def run(indexed: Any) -> str:
+            _, item = indexed
+            if isinstance(item, Exception):
+                raise item
+            prompt, messages, _ = _batch_item(item)
+            return await cls.ask(prompt, messages=messages, url=url, timeout=timeout, client=client, cache=cache)
+
+        async for (index, item), reply, error in _ordered(run, enumerate(items), max_concurrency):
+            item_id = item.get("id") if isinstance(item, Mapping) else None
+            if error is None:
+                result = AskResult(index=index, ok=True, reply=reply, id=item_id)
+            else:
+                result = AskResult(index=index, ok=False, error=str(error), id=item_id)
+            if output is not None:
+                output.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+                output.flush()
+            results.append(result)
+        return results
+
+
+async def _blocking(func: Callable[..., R], *args: Any) -> R:
+    """Run blocking file I/O in the default executor instead of on the loop."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+
+async def _aiter(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    # Each next() reads from the source file or stdin, so it runs off the loop.
+    iterator = iter(chunks)
+    while True:
+        chunk = await _blocking(next, iterator, None)
+        if chunk is None:
+            return
+        yield chunk
+
+
+async def _acopy(response: httpx.Response, fh: BinaryIO, digest: Any, chunk_size: int) -> int:
+    written = 0
+    async for chunk in response.aiter_bytes(chunk_size):
+        if not chunk:
+            continue
+        await _blocking(fh.write, chunk)
+        if digest is not None:
+            digest.update(chunk)
+        written += len(chunk)
+    await _blocking(fh.flush)
+    return written
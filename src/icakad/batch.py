@@ -0,0 +1,226 @@
+"""Run newline-delimited JSON commands over shared, pooled clients.
+
+Each input line is one command object naming an ``op`` plus its fields::
+
+    {"op": "shorturl.add", "slug": "docs", "url": "https://example.com"}
+    {"op": "paste.get", "paste_id": "abc", "raw": true, "id": "job-7"}
+
+Supported operations are listed in :data:`OPERATIONS`.  An optional ``id``
+is echoed back in the command's result.  Commands run over the clients
+from the shared registry (:mod:`icakad.pool`), optionally several at a
+time, and results are yielded in input order.  Invalid lines and failing
+commands become error results instead of aborting the run.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import partial
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple, Union
+
+from .common.concurrency import ordered_map
+from .config import Settings, load_settings
+
+__all__ = [
+    "OPERATIONS",
+    "CommandResult",
+    "read_commands",
+    "run_commands",
+]
+
+Command = Union[Mapping[str, Any], Exception]
+
+
+@dataclass
+class CommandResult:
+    """Outcome of one batch command."""
+
+    index: int
+    op: str
+    ok: bool
+    result: Any = None
+    error: Optional[str] = None
+    id: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"index": self.index, "op": self.op}
+        if self.id is not None:
+            data["id"] = self.id
+        data["ok"] = self.ok
+        if self.ok:
+            data["result"] = self.result
+        else:
+            data["error"] = self.error
+        return data
+
+
+class _Clients:
+    """Resolves the pooled clients for one run on first use."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self._shorturl: Any = None
+        self._paste: Any = None
+
+    @property
+    def shorturl(self) -> Any:
+        if self._shorturl is None:
+            from . import _client_from_settings
+
+            # Racing threads get the same client back from the registry.
+            self._shorturl = _client_from_settings(settings=self.settings)
+        return self._shorturl
+
+    @property
+    def paste(self) -> Any:
+        if self._paste is None:
+            from . import _paste_client_from_settings
+
+            self._paste = _paste_client_from_settings(settings=self.settings)
+        return self._paste
+
+
+def _field(command: Mapping[str, Any], name: str) -> Any:
+    value = command.get(name)
+    if value is None or value == "":
+        raise ValueError(f"'{command.get('op')}' needs a '{name}' field")
+    return value
+
+
+def _paste_id(command: Mapping[str, Any]) -> str:
+    return str(_field(command, "paste_id"))
+
+
+def _shorturl_add(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.shorturl.add_link(_field(command, "slug"), _field(command, "url"))
+
+
+def _shorturl_update(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.shorturl.edit_link(_field(command, "slug"), _field(command, "url"))
+
+
+def _shorturl_delete(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.shorturl.delete_link(_field(command, "slug"))
+
+
+def _shorturl_get(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.shorturl.get_link(_field(command, "slug"))
+
+
+def _shorturl_list(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.shorturl.list_links(page_size=command.get("page_size"))
+
+
+def _paste_create(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.paste.create_paste(
+        _field(command, "text"),
+        paste_id=command.get("paste_id"),
+        ttl=command.get("ttl"),
+        as_plaintext=bool(command.get("plain", False)),
+    )
+
+
+def _paste_get(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.paste.fetch_paste(
+        _paste_id(command),
+        raw=bool(command.get("raw", False)),
+        enrich=bool(command.get("enrich", True)),
+    )
+
+
+def _paste_list(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    return clients.paste.list_pastes()
+
+
+def _ai_ask(clients: _Clients, command: Mapping[str, Any]) -> Any:
+    from .ai import AI
+
+    messages = command.get("messages")
+    prompt = "" if messages is not None else _field(command, "prompt")
+    return AI.ask(prompt, messages=messages, url=command.get("url"), timeout=command.get("timeout"))
+
+
+#: ``op`` name -> handler taking the run's clients and the command object.
+OPERATIONS: Dict[str, Callable[[_Clients, Mapping[str, Any]], Any]] = {
+    "shorturl.add": _shorturl_add,
+    "shorturl.update": _shorturl_update,
+    "shorturl.delete": _shorturl_delete,
+    "shorturl.get": _shorturl_get,
+    "shorturl.list": _shorturl_list,
+    "paste.create": _paste_create,
+    "paste.get": _paste_get,
+    "paste.list": _paste_list,
+    "ai.ask": _ai_ask,
+}
+
+
+def read_commands(source: Union[str, IO[str]]) -> Iterator[Command]:
+    """Read command objects from a JSONL file path or text stream.
+
+    Blank lines are skipped; malformed lines are yielded as
+    :class:`ValueError` so they are reported in place without stopping
+    the run.
+    """
+    handle = open(source, "r", encoding="utf-8") if isinstance(source, str) else source
+    try:
+        for number, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                command = json.loads(line)
+            except ValueError as exc:
+                yield ValueError(f"line {number}: invalid JSON ({exc})")
+                continue
+            if not isinstance(command, dict):
+                yield ValueError(f"line {number}: expected a JSON object")
+                continue
+            yield command
+    finally:
+        if handle is not source:
+            handle.close()
+
+
+def _execute(clients: _Clients, indexed: Tuple[int, Command]) -> Any:
+    _, command = indexed
+    if isinstance(command, Exception):
+        raise command
+    op = command.get("op")
+    handler = OPERATIONS.get(op) if isinstance(op, str) else None
+    if handler is None:
+        raise ValueError(f"unknown op {op!r}; expected one of {', '.join(OPERATIONS)}")
+    return handler(clients, command)
+
+
+def run_commands(
+    commands: Iterable[Command],
+    *,
+    max_workers: int = 1,
+    settings: Optional[Settings] = None,
+    **overrides: Any,
+) -> Iterator[CommandResult]:
+    """Execute *commands* and yield one :class:`CommandResult` each, in input order.
+
+    With *max_workers* > 1 up to that many commands run concurrently, so
+    only use it when the commands are independent of each other.
+    *overrides* (``config_path``, ``token``, ``shorturl_base``,
+    ``paste_base``) are applied to the loaded settings.
+    """
+    if settings is None:
+        settings = load_settings(
+            overrides.get("config_path"),
+            token=overrides.get("token"),
+            shorturl_base=overrides.get("shorturl_base"),
+            paste_base=overrides.get("paste_base"),
+        )
+    execute = partial(_execute, _Clients(settings))
+    outcomes = ordered_map(execute, enumerate(commands), max_workers=max_workers)
+    for (index, command), result, error in outcomes:
+        if isinstance(command, Exception):
+            op, tag = "invalid", None
+        else:
+            op, tag = str(command.get("op") or "invalid"), command.get("id")
+        if error is None:
+            yield CommandResult(index=index, op=op, ok=True, result=result, id=tag)
+        else:
+            yield CommandResult(index=index, op=op, ok=False, error=str(error), id=tag)
@@ -0,0 +1,222 @@
+"""Content-addressed cache of LLM replies (in-memory LRU + optional SQLite tier)."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple, Union
+
+from .index import DEFAULT_INDEX_DIR
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_PATH = DEFAULT_INDEX_DIR / "ai-responses.sqlite3"
+
+__all__ = ["CacheStats", "ResponseCache", "cache_key"]
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS replies ("
+    " key TEXT PRIMARY KEY,"
+    " reply TEXT NOT NULL,"
+    " size INTEGER NOT NULL,"
+    " created_at REAL NOT NULL,"
+    " used_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS replies_used_at ON replies (used_at)",
+)
+
+
+def cache_key(messages: Sequence[Dict[str, str]], url: str) -> str:
+    """Return the SHA-256 key for *messages* (as built by ``AI._build_messages``) sent to *url*."""
+    document = {
+        "url": url.rstrip("/") + "/",
+        "messages": [{"role": m["role"], "content": m["content"]} for m in messages],
+    }
+    encoded = json.dumps(document, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Union[int, float]]:
+        data: Dict[str, Union[int, float]] = dict(asdict(self))
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+class ResponseCache:
+    """Two-tier reply cache keyed by :func:`cache_key`.
+
+    The memory tier is an LRU of at most *max_entries* replies.  When *path*
+    is given, replies are also written to a SQLite file that survives the
+    process; that tier is capped at *max_bytes* of reply text and evicts the
+    least recently used rows first.  Entries older than *ttl* seconds (if
+    set) are treated as misses and dropped from both tiers.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Union[str, Path]] = None,
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < 0:
+            raise ValueError("max_entries cannot be negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.path: Optional[str] = None
+        if path is not None:
+            target = Path(path).expanduser()
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self.path = str(target)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    @classmethod
+    def on_disk(cls, path: Optional[Union[str, Path]] = None, **kwargs) -> "ResponseCache":
+        """Open the persistent cache at *path* (default ``~/.cache/icakad``)."""
+        return cls(DEFAULT_CACHE_PATH if path is None else path, **kwargs)
+
+    # ----------------------------------------------------------- lookups
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for *key* or ``None`` on a miss."""
+        now = self._clock()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                reply, created_at = entry
+                if self._expired(created_at, now):
+                    del self._memory[key]
+                    self._disk_delete(key)
+                    self.stats.evictions += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return reply
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT reply, created_at FROM replies WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    reply, created_at = row
+                    if self._expired(created_at, now):
+                        self._disk_delete(key)
+                        self.stats.evictions += 1
+                    else:
+                        self._conn.execute("UPDATE replies SET used_at = ? WHERE key = ?", (now, key))
+                        self._remember(key, reply, created_at)
+                        self.stats.hits += 1
+                        self.stats.disk_hits += 1
+                        return reply
+
+            self.stats.misses += 1
+            return None
+
+    def __contains__(self, key: object) -> bool:
+        if not isinstance(key, str):
+            return False
+        with self._lock:
+            if key in self._memory:
+                return True
+            if self._conn is None:
+                return False
+            return self._conn.execute("SELECT 1 FROM replies WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            if self._conn is None:
+                return len(self._memory)
+            return self._conn.execute("SELECT COUNT(*) FROM replies").fetchone()[0]
+
+    # ----------------------------------------------------------- updates
+    def put(self, key: str, reply: str) -> None:
+        now = self._clock()
+        with self._lock:
+            self._remember(key, reply, now)
+            if self._conn is not None:
+                size = len(reply.encode("utf-8"))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO replies (key, reply, size, created_at, used_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (key, reply, size, now, now),
+                )
+                self._trim_disk(now)
+            self.stats.stores += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM replies")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------------------------------------------------------- internals
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at >= self.ttl
+
+    def _remember(self, key: str, reply: str, created_at: float) -> None:
+        if self.max_entries == 0:
+            return
+        self._memory[key] = (reply, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _disk_delete(self, key: str) -> None:
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM replies WHERE key = ?", (key,))
+
+    def _trim_disk(self, now: float) -> None:
+        assert self._conn is not None
+        if self.ttl is not None:
+            expired = self._conn.execute(
+                "DELETE FROM replies WHERE created_at <= ?", (now - self.ttl,)
+            ).rowcount
+            self.stats.evictions += max(expired, 0)
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM replies").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM replies ORDER BY used_at ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM replies WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self.stats.evictions += 1
@@ -3,36 +3,56 @@
 from __future__ import annotations
 
 import argparse
+import json
 import sys
-from typing import Any, Optional, Sequence
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence, Tuple
 
 from . import (
     add_short_link,
+    bulk_short_links,
     create_paste,
     delete_short_link,
+    download_paste,
     fetch_paste,
     list_pastes,
     list_short_links,
     print_json,
     update_short_link,
+    upload_paste,
 )
-from .common import resolve_text_input
+from .common import OUTPUT_FORMATS, read_text_file, resolve_text_input
+from .config import Settings, load_settings
+from .pool import DEFAULT_POOL_MAXSIZE
 
 
-def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(
-        prog="icakad",
-        description="Interact with the icakad shorturl and paste services.",
+def _add_raw_output_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--output-raw",
+        metavar="PATH",
+        help="Stream the response body to PATH as received, without parsing or re-encoding it.",
+    )
+    parser.add_argument(
+        "--validate-json",
+        action="store_true",
+        help="With --output-raw, check that the body is valid JSON while writing it.",
+    )
+
+
+def _add_format_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=OUTPUT_FORMATS,
+        help=(
+            "Stream the listing one row at a time in this format (to --output or stdout). "
+            "By default the whole listing is printed as one indented JSON document."
+        ),
     )
-    parser.add_argument("--config", dest="config_path", help="Path to a config JSON file.")
-    parser.add_argument("--token", help="Bearer token used for authenticated endpoints.")
-    parser.add_argument("--shorturl-base", help="Override the short URL API base URL.")
-    parser.add_argument("--paste-base", help="Override the paste API base URL.")
 
-    subparsers = parser.add_subparsers(dest="command")
 
-    # ---------------------------------------------------------------- shorturl
-    shorturl_parser = subparsers.add_parser("shorturl", help="Short URL operations")
+def _add_shorturl_actions(shorturl_parser: argparse.ArgumentParser) -> None:
     shorturl_sub = shorturl_parser.add_subparsers(dest="action")
 
     shorturl_add = shorturl_sub.add_parser("add", help="Create or overwrite a slug")
@@ -40,30 +60,69 @@ def build_parser() -> argparse.ArgumentParser:
     shorturl_add.add_argument("url", help="Destination URL")
     shorturl_add.add_argument("--output", help="Write the API response to this JSON file.")
     shorturl_add.add_argument("--quiet", action="store_true", help="Suppress stdout output.")
+    _add_raw_output_arguments(shorturl_add)
 
     shorturl_edit = shorturl_sub.add_parser("update", help="Update the target URL for a slug")
     shorturl_edit.add_argument("slug", help="Slug to update")
     shorturl_edit.add_argument("url", help="New destination URL")
     shorturl_edit.add_argument("--output", help="Write the API response to this JSON file.")
     shorturl_edit.add_argument("--quiet", action="store_true", help="Suppress stdout output.")
+    _add_raw_output_arguments(shorturl_edit)
 
     shorturl_del = shorturl_sub.add_parser("delete", help="Delete a slug from the service")
     shorturl_del.add_argument("slug", help="Slug to remove")
     shorturl_del.add_argument("--output", help="Write the API response to this JSON file.")
     shorturl_del.add_argument("--quiet", action="store_true", help="Suppress stdout output.")
+    _add_raw_output_arguments(shorturl_del)
 
     shorturl_list = shorturl_sub.add_parser("list", help="List all known short URLs")
-    shorturl_list.add_argument("--output", help="Write the results to a JSON file.")
+    shorturl_list.add_argument("--output", help="Write the results to a file (JSON unless --format is given).")
     shorturl_list.add_argument("--quiet", action="store_true", help="Suppress stdout output.")
+    shorturl_list.add_argument(
+        "--page-size",
+        type=int,
+        help="Fetch the listing in cursor-paginated pages of this size.",
+    )
+    _add_raw_output_arguments(shorturl_list)
+    _add_format_argument(shorturl_list)
+
+    shorturl_import = shorturl_sub.add_parser(
+        "import",
+        aliases=["apply"],
+        help="Apply add/update/delete operations from a CSV or JSONL file",
+    )
+    shorturl_import.add_argument(
+        "file",
+        help="CSV (slug,url[,op]) or JSONL file; '-' reads JSONL from stdin.",
+    )
+    shorturl_import.add_argument(
+        "--format",
+        dest="input_format",
+        choices=("csv", "jsonl"),
+        help="Input format (default: guessed from the file extension).",
+    )
+    shorturl_import.add_argument(
+        "--op",
+        dest="default_op",
+        default="add",
+        choices=("add", "update", "delete"),
+        help="Operation for rows without an 'op' column.",
+    )
+    shorturl_import.add_argument("--workers", type=int, default=8, help="Concurrent requests (default: 8).")
+    shorturl_import.add_argument("--output", help="Write one JSON result per operation to this JSONL file.")
+    shorturl_import.add_argument("--quiet", action="store_true", help="Suppress progress and summary output.")
+
 
-    # ------------------------------------------------------------------- paste
-    paste_parser = subparsers.add_parser("paste", help="Pastebin operations")
+def _add_paste_actions(paste_parser: argparse.ArgumentParser) -> None:
     paste_sub = paste_parser.add_subparsers(dest="action")
 
     paste_create = paste_sub.add_parser("create", help="Create a new paste")
     group = paste_create.add_mutually_exclusive_group(required=True)
     group.add_argument("--text", help="Inline text for the paste.")
-    group.add_argument("--text-file", help="Read paste text from a file.")
+    group.add_argument(
+        "--text-file",
+        help="Stream paste text from a file ('-' reads stdin) without loading it into memory.",
+    )
     paste_create.add_argument("--id", dest="paste_id", help="Provide a custom paste identifier.")
     paste_create.add_argument(
         "--ttl",
@@ -77,16 +136,136 @@ def build_parser() -> argparse.ArgumentParser:
     )
     paste_create.add_argument("--output", help="Write the API response to this JSON file.")
     paste_create.add_argument("--quiet", action="store_true", help="Suppress stdout output.")
+    _add_raw_output_arguments(paste_create)
 
     paste_get = paste_sub.add_parser("get", help="Fetch a paste by ID")
     paste_get.add_argument("paste_id", help="Paste identifier to fetch")
     paste_get.add_argument("--raw", action="store_true", help="Return the raw text instead of metadata.")
     paste_get.add_argument("--output", help="Write the result to a file.")
     paste_get.add_argument("--quiet", action="store_true", help="Suppress stdout output.")
+    paste_get.add_argument(
+        "--stream",
+        action="store_true",
+        help="With --raw, copy the bytes straight to --output (or stdout) in constant memory.",
+    )
+    paste_get.add_argument(
+        "--checksum",
+        metavar="ALGORITHM",
+        help="With --stream, compute a digest (e.g. sha256) while downloading.",
+    )
 
     paste_list = paste_sub.add_parser("list", help="List all pastes with metadata")
-    paste_list.add_argument("--output", help="Write the results to a JSON file.")
+    paste_list.add_argument("--output", help="Write the results to a file (JSON unless --format is given).")
     paste_list.add_argument("--quiet", action="store_true", help="Suppress stdout output.")
+    _add_raw_output_arguments(paste_list)
+    _add_format_argument(paste_list)
+
+
+def _add_ai_actions(ai_parser: argparse.ArgumentParser) -> None:
+    ai_sub = ai_parser.add_subparsers(dest="action")
+
+    ai_ask = ai_sub.add_parser("ask", help="Send a prompt to the LLM worker")
+    ai_ask.add_argument("prompt", help="Prompt text ('-' reads it from stdin).")
+    ai_ask.add_argument("--url", help="Override the LLM worker URL.")
+    ai_ask.add_argument("--timeout", type=float, help="Request timeout in seconds.")
+    ai_ask.add_argument(
+        "--stream",
+        action="store_true",
+        help="Print tokens as they arrive instead of waiting for the full reply.",
+    )
+    ai_ask.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="Reuse cached replies for identical prompts (default: ~/.cache/icakad; not with --stream).",
+    )
+
+    ai_batch = ai_sub.add_parser("batch", help="Answer many prompts from a JSONL file concurrently")
+    ai_batch.add_argument("input", help="JSONL file with prompts or message lists ('-' for stdin).")
+    ai_batch.add_argument("output", help="JSONL file receiving one result per line ('-' for stdout).")
+    ai_batch.add_argument("--url", help="Override the LLM worker URL.")
+    ai_batch.add_argument("--timeout", type=float, help="Per-request timeout in seconds.")
+    ai_batch.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Number of requests in flight at once (default: 8).",
+    )
+    ai_batch.add_argument(
+        "--cache",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="Reuse cached replies for identical prompts (default: ~/.cache/icakad).",
+    )
+    ai_batch.add_argument("--quiet", action="store_true", help="Suppress progress and summary.")
+
+
+def _add_batch_arguments(batch_parser: argparse.ArgumentParser) -> None:
+    batch_parser.add_argument(
+        "input",
+        nargs="?",
+        default="-",
+        help="JSONL file with one command per line, e.g. {\"op\": \"shorturl.add\", ...} (default: stdin).",
+    )
+    batch_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Commands run at once (default: 1, i.e. strictly in sequence).",
+    )
+    batch_parser.add_argument("--quiet", action="store_true", help="Suppress the summary on stderr.")
+
+
+def _add_daemon_actions(daemon_parser: argparse.ArgumentParser) -> None:
+    daemon_parser.add_argument(
+        "action",
+        nargs="?",
+        default="run",
+        choices=("run", "status", "stop"),
+        help="Run the daemon in the foreground (default), or query/stop a running one.",
+    )
+    daemon_parser.add_argument(
+        "--socket",
+        help="Unix socket path (default: $ICAKAD_DAEMON_SOCKET or $XDG_RUNTIME_DIR/icakad.sock).",
+    )
+
+
+# name -> (help, populate); sub-parsers are only filled in when selected.
+_COMMANDS: Dict[str, Tuple[str, Callable[[argparse.ArgumentParser], None]]] = {
+    "shorturl": ("Short URL operations", _add_shorturl_actions),
+    "paste": ("Pastebin operations", _add_paste_actions),
+    "ai": ("LLM worker operations", _add_ai_actions),
+    "batch": ("Run JSONL commands from a file or stdin over shared clients", _add_batch_arguments),
+    "daemon": ("Keep clients warm for later CLI calls (Unix socket)", _add_daemon_actions),
+}
+
+# Set by ``icakad daemon``: AI response caches stay open between commands.
+_resident_caches: Optional[Dict[str, Any]] = None
+
+
+def build_parser(argv: Optional[Sequence[str]] = None) -> argparse.ArgumentParser:
+    """Build the argument parser.
+
+    When *argv* is given, only the command groups it mentions get their
+    actions registered; the rest are listed in ``--help`` but stay empty.
+    """
+    parser = argparse.ArgumentParser(
+        prog="icakad",
+        description="Interact with the icakad shorturl, paste and LLM services.",
+    )
+    parser.add_argument("--config", dest="config_path", help="Path to a config JSON file.")
+    parser.add_argument("--token", help="Bearer token used for authenticated endpoints.")
+    parser.add_argument("--shorturl-base", help="Override the short URL API base URL.")
+    parser.add_argument("--paste-base", help="Override the paste API base URL.")
+
+    subparsers = parser.add_subparsers(dest="command")
+    selected = None if argv is None else set(argv)
+    for name, (help_text, populate) in _COMMANDS.items():
+        command_parser = subparsers.add_parser(name, help=help_text)
+        if selected is None or name in selected:
+            populate(command_parser)
 
     return parser
 
@@ -107,6 +286,33 @@ def _paste_kwargs(args: argparse.Namespace) -> dict[str, Any]:
     }
 
 
+def _save_kwargs(parser: argparse.ArgumentParser, args: argparse.Namespace) -> dict[str, Any]:
+    output_raw = getattr(args, "output_raw", None)
+    if output_raw and args.output:
+        parser.error("--output and --output-raw are mutually exclusive.")
+    if args.validate_json and not output_raw:
+        parser.error("--validate-json requires --output-raw.")
+    output_format = getattr(args, "output_format", None)
+    if output_raw and output_format:
+        parser.error("--format cannot be combined with --output-raw.")
+    if output_raw:
+        return {"save_to": output_raw, "raw_output": True, "validate": args.validate_json}
+    if output_format:
+        return {"save_to": args.output, "output_format": output_format}
+    return {"save_to": args.output}
+
+
+def _pooled_settings(args: argparse.Namespace, workers: int) -> Settings:
+    """Settings whose connection pools fit *workers* concurrent requests."""
+    settings = load_settings(
+        getattr(args, "config_path", None),
+        token=getattr(args, "token", None),
+        shorturl_base=getattr(args, "shorturl_base", None),
+        paste_base=getattr(args, "paste_base", None),
+    )
+    return settings.with_overrides(pool_maxsize=max(workers, settings.pool_maxsize or DEFAULT_POOL_MAXSIZE))
+
+
 def _print_result(result: Any, quiet: bool, raw: bool = False) -> None:
     if quiet:
         return
@@ -116,20 +322,215 @@ def _print_result(result: Any, quiet: bool, raw: bool = False) -> None:
         print_json(result)
 
 
+def _run_shorturl_import(args: argparse.Namespace) -> int:
+    from .shorturl import read_bulk_operations
+
+    if args.workers < 1:
+        raise SystemExit("--workers must be at least 1")
+    source = sys.stdin if args.file == "-" else args.file
+    operations = read_bulk_operations(source, fmt=args.input_format, default_op=args.default_op)
+    results = bulk_short_links(operations, max_workers=args.workers, settings=_pooled_settings(args, args.workers))
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    started = time.perf_counter()
+    done = failed = 0
+    try:
+        for result in results:
+            done += 1
+            if not result.ok:
+                failed += 1
+            if out is not None:
+                out.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+            if not args.quiet and done % 100 == 0:
+                elapsed = time.perf_counter() - started
+                sys.stderr.write(f"\r{done} done, {failed} failed, {done / elapsed:.1f} ops/s")
+                sys.stderr.flush()
+    finally:
+        if out is not None:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    if not args.quiet:
+        if done >= 100:
+            sys.stderr.write("\n")
+        print_json(
+            {
+                "total": done,
+                "succeeded": done - failed,
+                "failed": failed,
+                "seconds": round(elapsed, 3),
+                "ops_per_sec": round(done / elapsed, 1) if elapsed > 0 else None,
+            }
+        )
+    return 1 if failed else 0
+
+
+def _run_paste_download(args: argparse.Namespace) -> int:
+    destination = args.output or sys.stdout.buffer
+    summary = download_paste(
+        args.paste_id,
+        destination,
+        checksum=args.checksum,
+        **_paste_kwargs(args),
+    )
+    if args.quiet:
+        return 0
+    if args.output:
+        print_json(summary)
+    elif args.checksum:
+        # stdout carries the paste itself; report the digest on stderr.
+        sys.stderr.write(f"{summary['algorithm']}: {summary['digest']}\n")
+    return 0
+
+
+@contextmanager
+def _ai_cache(args: argparse.Namespace) -> Iterator[Any]:
+    if args.cache is None:
+        yield None
+        return
+    from .cache import ResponseCache
+
+    if _resident_caches is not None:
+        cache = _resident_caches.get(args.cache)
+        if cache is None:
+            cache = _resident_caches[args.cache] = ResponseCache.on_disk(args.cache or None)
+        yield cache
+        return
+    cache = ResponseCache.on_disk(args.cache or None)
+    try:
+        yield cache
+    finally:
+        cache.close()
+
+
+def _run_ai_batch(args: argparse.Namespace) -> int:
+    from .ai import AI, read_batch
+
+    if args.concurrency < 1:
+        raise SystemExit("--concurrency must be at least 1")
+    items = read_batch(sys.stdin if args.input == "-" else args.input)
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    done = failed = 0
+    try:
+        with _ai_cache(args) as cache:
+            results = AI.iter_ask_many(
+                items,
+                max_concurrency=args.concurrency,
+                url=args.url,
+                timeout=args.timeout,
+                cache=cache,
+                output=out,
+                pool_maxsize=max(args.concurrency, DEFAULT_POOL_MAXSIZE),
+            )
+            for result in results:
+                done += 1
+                if not result.ok:
+                    failed += 1
+                if not args.quiet and done % 100 == 0:
+                    elapsed = time.perf_counter() - started
+                    sys.stderr.write(f"\r{done} done, {failed} failed, {done / elapsed:.1f} prompts/s")
+                    sys.stderr.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    if not args.quiet:
+        if done >= 100:
+            sys.stderr.write("\n")
+        summary = {
+            "total": done,
+            "succeeded": done - failed,
+            "failed": failed,
+            "seconds": round(elapsed, 3),
+            "prompts_per_sec": round(done / elapsed, 1) if elapsed > 0 else None,
+        }
+        if args.output == "-":
+            # Results go to stdout; keep the summary out of the JSONL stream.
+            sys.stderr.write(json.dumps(summary, ensure_ascii=False, indent=2) + "\n")
+        else:
+            print_json(summary)
+    return 1 if failed else 0
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    from .batch import read_commands, run_commands
+
+    if args.workers < 1:
+        raise SystemExit("--workers must be at least 1")
+    commands = read_commands(sys.stdin if args.input == "-" else args.input)
+    results = run_commands(commands, max_workers=args.workers, settings=_pooled_settings(args, args.workers))
+    started = time.perf_counter()
+    done = failed = 0
+    for result in results:
+        done += 1
+        if not result.ok:
+            failed += 1
+        sys.stdout.write(json.dumps(result.to_dict(), ensure_ascii=False) + "\n")
+        sys.stdout.flush()
+
+    elapsed = time.perf_counter() - started
+    if not args.quiet:
+        # stdout carries the results; keep the summary out of the JSONL stream.
+        summary = {
+            "total": done,
+            "succeeded": done - failed,
+            "failed": failed,
+            "seconds": round(elapsed, 3),
+            "ops_per_sec": round(done / elapsed, 1) if elapsed > 0 else None,
+        }
+        sys.stderr.write(json.dumps(summary, ensure_ascii=False, indent=2) + "\n")
+    return 1 if failed else 0
+
+
+def _run_ai_ask(args: argparse.Namespace) -> int:
+    from .ai import AI
+
+    prompt = read_text_file("-") if args.prompt == "-" else args.prompt
+    if not args.stream:
+        with _ai_cache(args) as cache:
+            print(AI.ask(prompt, url=args.url, timeout=args.timeout, cache=cache))
+        return 0
+    for chunk in AI.stream(prompt, url=args.url, timeout=args.timeout):
+        sys.stdout.write(chunk)
+        sys.stdout.flush()
+    sys.stdout.write("\n")
+    return 0
+
+
 def main(argv: Optional[Sequence[str]] = None) -> int:
-    parser = build_parser()
+    """Parse *argv* and run it, in a running ``icakad daemon`` when possible."""
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = build_parser(argv)
     args = parser.parse_args(argv)
 
     if not args.command:
         parser.print_help()
         return 0
 
+    from .daemon import forward
+
+    code = forward(args)
+    if code is not None:
+        return code
+    return run(parser, args)
+
+
+def run(parser: argparse.ArgumentParser, args: argparse.Namespace) -> int:
+    """Execute parsed *args* in this process."""
+    if args.command == "daemon":
+        from .daemon import run_command
+
+        return run_command(args)
+
     if args.command == "shorturl":
         if args.action == "add":
             result = add_short_link(
                 args.slug,
                 args.url,
-                save_to=args.output,
+                **_save_kwargs(parser, args),
                 **_common_kwargs(args),
             )
             _print_result(result, args.quiet)
@@ -138,7 +539,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             result = update_short_link(
                 args.slug,
                 args.url,
-                save_to=args.output,
+                **_save_kwargs(parser, args),
                 **_common_kwargs(args),
             )
             _print_result(result, args.quiet)
@@ -146,34 +547,52 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         if args.action == "delete":
             result = delete_short_link(
                 args.slug,
-                save_to=args.output,
+                **_save_kwargs(parser, args),
                 **_common_kwargs(args),
             )
             _print_result(result, args.quiet)
             return 0
         if args.action == "list":
             result = list_short_links(
-                save_to=args.output,
+                **_save_kwargs(parser, args),
                 print_output=not args.quiet,
+                page_size=args.page_size,
                 **_common_kwargs(args),
             )
             return 0
-        parser.error("Please provide a shorturl action (add, update, delete, list).")
+        if args.action in ("import", "apply"):
+            return _run_shorturl_import(args)
+        parser.error("Please provide a shorturl action (add, update, delete, list, import).")
 
     if args.command == "paste":
         if args.action == "create":
+            if args.text_file is not None:
+                result = upload_paste(
+                    args.text_file,
+                    paste_id=args.paste_id,
+                    ttl=args.ttl,
+                    as_plaintext=args.plain,
+                    **_save_kwargs(parser, args),
+                    **_paste_kwargs(args),
+                )
+                _print_result(result, args.quiet)
+                return 0
             text = resolve_text_input(text=args.text, text_file=args.text_file)
             result = create_paste(
                 text=text,
                 paste_id=args.paste_id,
                 ttl=args.ttl,
                 as_plaintext=args.plain,
-                save_to=args.output,
+                **_save_kwargs(parser, args),
                 **_paste_kwargs(args),
             )
             _print_result(result, args.quiet)
             return 0
         if args.action == "get":
+            if args.stream:
+                if not args.raw:
+                    parser.error("--stream requires --raw.")
+                return _run_paste_download(args)
             result = fetch_paste(
                 args.paste_id,
                 raw=args.raw,
@@ -184,13 +603,25 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
             return 0
         if args.action == "list":
             result = list_pastes(
-                save_to=args.output,
+                **_save_kwargs(parser, args),
                 print_output=not args.quiet,
                 **_paste_kwargs(args),
             )
             return 0
         parser.error("Please provide a paste action (create, get, list).")
 
+    if args.command == "batch":
+        return _run_batch(args)
+
+    if args.command == "ai":
+        if args.action == "ask":
+            if args.stream and args.cache is not None:
+                parser.error("--cache cannot be combined with --stream.")
+            return _run_ai_ask(args)
+        if args.action == "batch":
+            return _run_ai_batch(args)
+        parser.error("Please provide an ai action (ask, batch).")
+
     parser.error("Unknown command. Use --help for usage details.")
     return 1
 
@@ -2,9 +2,15 @@
 
 from __future__ import annotations
 
+import csv
 import json
+import os
+import sys
 from pathlib import Path
-from typing import Any, Iterable, Optional
+from typing import IO, Any, BinaryIO, Callable, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Union
+
+#: Row formats understood by :func:`write_rows`.
+OUTPUT_FORMATS = ("json", "ndjson", "csv", "tsv")
 
 
 def ensure_parent(path: Path) -> None:
@@ -31,7 +37,9 @@ def write_text(text: str, destination: str | Path) -> Path:
 
 
 def read_text_file(path: str | Path) -> str:
-    """Read UTF-8 content from *path*."""
+    """Read UTF-8 content from *path* (``"-"`` reads standard input)."""
+    if str(path) == "-":
+        return sys.stdin.read()
     target = Path(path).expanduser().resolve()
     with target.open("r", encoding="utf-8") as fh:
         return fh.read()
@@ -61,6 +69,147 @@ def print_json(data: Any) -> None:
     print(json.dumps(data, indent=2, ensure_ascii=False))
 
 
+def _cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def write_rows(
+    rows: Iterable[Mapping[str, Any]],
+    fmt: str = "ndjson",
+    stream: Optional[IO[str]] = None,
+    *,
+    fields: Optional[Sequence[str]] = None,
+) -> int:
+    """Write *rows* to *stream* (stdout by default) one at a time.
+
+    ``json`` emits an array with one compact row per line, ``ndjson`` one
+    object per line, and ``csv``/``tsv`` a header followed by one line per
+    row.  The table columns are *fields* or else the keys of the first row;
+    other keys are dropped and nested values are written as JSON.  Each row
+    is written as soon as it is produced and never collected into a whole
+    document.  Returns the number of rows written.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {fmt!r}; expected one of {comma_separated(OUTPUT_FORMATS)}")
+    out = stream if stream is not None else sys.stdout
+    count = 0
+    if fmt == "ndjson":
+        for row in rows:
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    elif fmt == "json":
+        for row in rows:
+            out.write(("[\n  " if count == 0 else ",\n  ") + json.dumps(row, ensure_ascii=False))
+            count += 1
+        out.write("\n]\n" if count else "[]\n")
+    else:
+        delimiter = "\t" if fmt == "tsv" else ","
+        writer = None
+        for row in rows:
+            if writer is None:
+                columns = list(fields if fields is not None else row.keys())
+                writer = csv.DictWriter(
+                    out, columns, delimiter=delimiter, extrasaction="ignore", lineterminator="\n"
+                )
+                writer.writeheader()
+            writer.writerow({key: _cell(value) for key, value in row.items()})
+            count += 1
+        if writer is None and fields is not None:
+            csv.writer(out, delimiter=delimiter, lineterminator="\n").writerow(fields)
+    out.flush()
+    return count
+
+
+def save_rows(
+    rows: Iterable[Mapping[str, Any]],
+    destination: Union[str, Path],
+    fmt: str = "ndjson",
+    *,
+    fields: Optional[Sequence[str]] = None,
+) -> Dict[str, Any]:
+    """Stream *rows* to a file via :func:`write_rows`.
+
+    Like :func:`save_chunks` the file is written through a ``.part`` file
+    and only renamed into place once every row is written.  Returns
+    ``{"rows": n, "format": fmt, "path": ...}``.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {fmt!r}; expected one of {comma_separated(OUTPUT_FORMATS)}")
+    target = Path(destination).expanduser().resolve()
+    ensure_parent(target)
+    partial_target = target.with_name(target.name + ".part")
+    try:
+        # newline="" lets the csv module control line endings.
+        with partial_target.open("w", encoding="utf-8", newline="") as fh:
+            count = write_rows(rows, fmt, fh, fields=fields)
+        os.replace(partial_target, target)
+    except BaseException:
+        if partial_target.exists():
+            partial_target.unlink()
+        raise
+    return {"rows": count, "format": fmt, "path": str(target)}
+
+
 def comma_separated(values: Iterable[str]) -> str:
     """Join a series of strings into a comma-separated sentence."""
     return ", ".join(str(v) for v in values)
+
+
+def save_chunks(
+    chunks: Iterable[bytes],
+    destination: Union[str, Path, BinaryIO],
+    *,
+    digest: Any = None,
+    consume: Optional[Callable[[Iterable[bytes]], Any]] = None,
+) -> Dict[str, Any]:
+    """Write byte *chunks* to a path or binary file object as they arrive.
+
+    Paths are written via a ``.part`` file that is renamed once every chunk
+    has been written, so a failed transfer never leaves a truncated file.
+    A :mod:`hashlib` *digest* is updated on the fly.  *consume*, when given,
+    drives the iteration instead of a plain loop; it receives the chunks as
+    they are written (e.g. :func:`icakad.common.jsonstream.validate_json`),
+    and an exception from it discards the partial file.  Returns
+    ``{"bytes": n}`` plus ``"path"`` for path destinations.
+    """
+    summary: Dict[str, Any] = {"bytes": 0}
+
+    def copy(fh: BinaryIO) -> None:
+        def written() -> Iterator[bytes]:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                fh.write(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+                summary["bytes"] += len(chunk)
+                yield chunk
+
+        if consume is not None:
+            consume(written())
+        else:
+            for _ in written():
+                pass
+        fh.flush()
+
+    if hasattr(destination, "write"):
+        copy(destination)  # type: ignore[arg-type]
+        return summary
+
+    target = Path(destination).expanduser().resolve()  # type: ignore[arg-type]
+    ensure_parent(target)
+    partial_target = target.with_name(target.name + ".part")
+    try:
+        with partial_target.open("wb") as fh:
+            copy(fh)
+        os.replace(partial_target, target)
+    except BaseException:
+        if partial_target.exists():
+            partial_target.unlink()
+        raise
+    summary["path"] = str(target)
+    return summary
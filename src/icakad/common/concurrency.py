@@ -0,0 +1,66 @@
+"""Bounded, order-preserving concurrency helpers."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Iterable, Iterator, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:  # pragma: no cover
+    from concurrent.futures import Future
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def ordered_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    *,
+    max_workers: int = 8,
+    window: Optional[int] = None,
+) -> Iterator[Tuple[T, Optional[R], Optional[Exception]]]:
+    """Run *func* over *items* on a thread pool and yield outcomes in input order.
+
+    Each outcome is ``(item, result, error)`` where exactly one of *result* or
+    *error* is meaningful; exceptions raised by *func* are captured rather than
+    aborting the run.  *items* is consumed lazily and at most *window*
+    (default ``2 * max_workers``) calls are pending at any time, so memory
+    stays bounded for arbitrarily long inputs.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+    limit = window or max_workers * 2
+
+    if max_workers == 1:
+        for item in items:
+            yield _call(func, item)
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    pending: Deque[Tuple[T, Future]] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for item in items:
+                pending.append((item, pool.submit(func, item)))
+                if len(pending) >= limit:
+                    yield _resolve(*pending.popleft())
+            while pending:
+                yield _resolve(*pending.popleft())
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def _call(func: Callable[[T], R], item: T) -> Tuple[T, Optional[R], Optional[Exception]]:
+    try:
+        return item, func(item), None
+    except Exception as exc:  # noqa: BLE001 - surfaced to the caller per item
+        return item, None, exc
+
+
+def _resolve(item: T, future: Future) -> Tuple[T, Optional[R], Optional[Exception]]:
+    try:
+        return item, future.result(), None
+    except Exception as exc:  # noqa: BLE001 - surfaced to the caller per item
+        return item, None, exc
@@ -0,0 +1,258 @@
+"""Incremental parsing of large JSON listings."""
+
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+__all__ = ["iter_array_items", "iter_chunks", "validate_json"]
+
+_WHITESPACE = " \t\n\r"
+_NUMBER_TAIL = frozenset("0123456789.eE+-")
+_DECODER = json.JSONDecoder()
+# Drop consumed text from the buffer once this many characters piled up.
+_COMPACT_AFTER = 1 << 16
+
+
+class _Buffer:
+    def __init__(self, chunks: Iterable[Union[bytes, str]]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Append the next chunk; return ``False`` once the input is exhausted."""
+        if self.eof:
+            return False
+        if self.pos > _COMPACT_AFTER:
+            self.text = self.text[self.pos :]
+            self.pos = 0
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            self.text += chunk
+            return True
+        self.text += self._decoder.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of input)."""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and text[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise self.error(f"Expecting {char!r}")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value starting at the current position."""
+        self.peek()
+        while True:
+            try:
+                result, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the next
+            # chunk, including after a dangling "." or exponent ("3." + "5").
+            if (
+                not self.eof
+                and (end == len(self.text) or _is_number(result))
+                and all(char in _NUMBER_TAIL for char in self.text[end:])
+                and self.fill()
+            ):
+                continue
+            self.pos = end
+            return result
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self.text, self.pos)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def iter_array_items(
+    chunks: Iterable[Union[bytes, str]],
+    keys: Sequence[str],
+    members: Optional[Dict[str, Any]] = None,
+) -> Iterator[Any]:
+    """Yield the elements of a JSON array without loading the whole document.
+
+    The document may be a top-level array or an object holding the array
+    under one of *keys*.  Keys are tried in the given order, as with
+    ``payload.get("items") or payload.get("list")``: the first key whose
+    value is truthy wins, so an empty array falls through to the next key.
+    The winning array is streamed when every earlier key was already seen
+    empty; a later key that appears before an earlier one has to be
+    buffered until the earlier one turns out to be empty or absent.
+    Other members of the object are skipped, or stored in *members* when a
+    dict is given; the object is then read to its end, so values after the
+    array (such as a continuation cursor) are available once the iterator
+    is exhausted.  *chunks* may be bytes (decoded as UTF-8 across chunk
+    boundaries) or text.  Malformed input raises
+    :class:`json.JSONDecodeError` (a :class:`ValueError`).
+    """
+    buf = _Buffer(chunks)
+    first = buf.peek()
+    if first == "[":
+        buf.pos += 1
+        yield from _array(buf)
+        return
+    if first != "{":
+        if first:
+            buf.value()
+        return
+
+    buf.pos += 1
+    # Truthiness of each key's value seen so far, and buffered later keys.
+    truthy: Dict[int, bool] = {}
+    deferred: Dict[int, Any] = {}
+    done = False
+    while True:
+        char = buf.peek()
+        if char == "}":
+            break
+        if char == ",":
+            buf.pos += 1
+            continue
+        if char != '"':
+            raise buf.error("Expecting property name enclosed in double quotes")
+        key = buf.value()
+        buf.expect(":")
+        if key not in keys:
+            if members is not None:
+                members[key] = buf.value()
+            else:
+                _skip_value(buf)
+            continue
+        rank = keys.index(key)
+        earlier = range(rank)
+        if done or any(truthy.get(r) for r in earlier):
+            _skip_value(buf)
+        elif all(r in truthy for r in earlier) and buf.peek() == "[":
+            buf.pos += 1
+            produced = 0
+            for item in _array(buf):
+                produced += 1
+                yield item
+            truthy[rank] = bool(produced)
+            if produced:
+                if members is None:
+                    return
+                done = True
+        else:
+            value = buf.value()
+            truthy[rank] = bool(value)
+            deferred[rank] = value
+
+    if done:
+        return
+    for rank in range(len(keys)):
+        if truthy.get(rank):
+            value = deferred.get(rank)
+            if isinstance(value, list):
+                yield from value
+            return
+
+
+def _array(buf: _Buffer) -> Iterator[Any]:
+    expecting_value = True
+    while True:
+        char = buf.peek()
+        if char == "]":
+            buf.pos += 1
+            return
+        if char == "":
+            raise buf.error("Unterminated array")
+        if char == ",":
+            if expecting_value:
+                raise buf.error("Expecting value")
+            buf.pos += 1
+            expecting_value = True
+            continue
+        if not expecting_value:
+            raise buf.error("Expecting ',' delimiter")
+        yield buf.value()
+        expecting_value = False
+
+
+def validate_json(chunks: Iterable[Union[bytes, str]]) -> None:
+    """Check that *chunks* form exactly one well-formed JSON document.
+
+    Containers are walked member by member, so only one scalar (or object
+    key) is held in memory at a time however large the document is.  The
+    input is consumed completely; malformed input raises
+    :class:`json.JSONDecodeError`.
+    """
+    buf = _Buffer(chunks)
+    _skip_value(buf)
+    if buf.peek():
+        raise buf.error("Extra data")
+
+
+def _skip_value(buf: _Buffer) -> None:
+    char = buf.peek()
+    if char == "[":
+        buf.pos += 1
+        _skip_members(buf, "]", _skip_value)
+    elif char == "{":
+        buf.pos += 1
+        _skip_members(buf, "}", _skip_member)
+    elif char == "":
+        raise buf.error("Expecting value")
+    else:
+        buf.value()
+
+
+def _skip_member(buf: _Buffer) -> None:
+    if buf.peek() != '"':
+        raise buf.error("Expecting property name enclosed in double quotes")
+    buf.value()
+    buf.expect(":")
+    _skip_value(buf)
+
+
+def _skip_members(buf: _Buffer, close: str, skip: Any) -> None:
+    expecting_value = True
+    first = True
+    while True:
+        char = buf.peek()
+        if char == close and (first or not expecting_value):
+            buf.pos += 1
+            return
+        if char == "":
+            raise buf.error("Unterminated container")
+        if char == ",":
+            if expecting_value:
+                raise buf.error("Expecting value")
+            buf.pos += 1
+            expecting_value = True
+            continue
+        if not expecting_value:
+            raise buf.error("Expecting ',' delimiter")
+        skip(buf)
+        expecting_value = False
+        first = False
+
+
+def iter_chunks(data: Union[bytes, str], size: int) -> Iterator[Union[bytes, str]]:
+    """Split *data* into *size*-sized pieces (handy for tests and benchmarks)."""
+    for start in range(0, len(data), size):
+        yield data[start : start + size]
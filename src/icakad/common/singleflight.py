@@ -0,0 +1,94 @@
+"""Collapse identical concurrent calls into one ("single-flight")."""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+R = TypeVar("R")
+
+
+@dataclass
+class FlightStats:
+    """Counters for a :class:`SingleFlight` group."""
+
+    calls: int = 0
+    executions: int = 0
+    collapsed: int = 0
+
+    @property
+    def collapse_rate(self) -> float:
+        return self.collapsed / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+            "collapse_rate": self.collapse_rate,
+        }
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Share one in-flight call between threads asking for the same *key*.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for it and receive the very same result object
+    (or exception).  Nothing is cached: once the call returns, the next
+    caller for that key starts a fresh one.  Shared results must therefore
+    be treated as read-only.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.stats = FlightStats()
+
+    def do(self, key: Hashable, func: Callable[[], R]) -> R:
+        """Return ``func()``, or the result of an identical call already running."""
+        with self._lock:
+            self.stats.calls += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.stats.collapsed += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                self.stats.executions += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = func()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def in_flight(self) -> int:
+        """Number of keys with a call currently running."""
+        with self._lock:
+            return len(self._flights)
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = FlightStats()
@@ -4,9 +4,11 @@ from __future__ import annotations
 
 import json
 import os
-from dataclasses import dataclass, replace
+import stat
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 DEFAULT_SHORTURL_BASE = "https://linkove.icu"
 DEFAULT_PASTE_BASE = "https://linkove.icu"
@@ -16,6 +18,16 @@ DEFAULT_CONFIG_LOCATIONS = (
     Path.cwd() / "icakad.config.json",
 )
 
+ENV_VARS = ("ICAKAD_SHORTURL_BASE", "ICAKAD_PASTE_BASE", "ICAKAD_TOKEN")
+FREEZE_ENV_VAR = "ICAKAD_FREEZE_CONFIG"
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+
+_FileSignature = Tuple[Tuple[str, Optional[int], Optional[int]], ...]
+
+_cache_lock = threading.Lock()
+_settings_cache: Dict[Tuple[Any, ...], Tuple[_FileSignature, "Settings"]] = {}
+_frozen = False
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -24,6 +36,14 @@ class Settings:
     shorturl_base: str = DEFAULT_SHORTURL_BASE
     paste_base: str = DEFAULT_PASTE_BASE
     token: Optional[str] = None
+    #: Per-origin request limits, e.g. ``{"https://linkove.icu": {"rate": 10, "burst": 20}}``
+    #: (see :func:`icakad.ratelimit.configure_rate_limits`).
+    rate_limits: Dict[str, Any] = field(default_factory=dict, hash=False)
+    #: Connection pool sizing for shorturl/paste clients (``None`` keeps the
+    #: registry defaults, see :func:`icakad.configure_pool`).
+    pool_connections: Optional[int] = None
+    pool_maxsize: Optional[int] = None
+    pool_block: Optional[bool] = None
 
     def with_overrides(self, **overrides: Any) -> "Settings":
         """Return a copy with any non-None overrides applied."""
@@ -31,6 +51,10 @@ class Settings:
             "shorturl_base": self.shorturl_base,
             "paste_base": self.paste_base,
             "token": self.token,
+            "rate_limits": self.rate_limits,
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "pool_block": self.pool_block,
         }
         for key, value in overrides.items():
             if value is not None and key in current:
@@ -43,37 +67,88 @@ def _load_json(path: Path) -> Dict[str, Any]:
         return json.load(fh)
 
 
-def load_settings(
-    config_path: Optional[str | Path] = None,
-    *,
-    token: Optional[str] = None,
-    shorturl_base: Optional[str] = None,
-    paste_base: Optional[str] = None,
-) -> Settings:
-    """Load settings from config files, environment variables, and overrides."""
-    settings = Settings()
+def freeze_settings(frozen: bool = True) -> None:
+    """Trust cached settings without re-checking config files.
 
-    # Config file from explicit path or environment hint.
+    Long-running workers can call this once after start-up so that
+    :func:`load_settings` no longer even stats the candidate files.  Setting
+    ``ICAKAD_FREEZE_CONFIG`` to ``1``, ``true``, ``yes`` or ``on`` in the
+    environment has the same effect; other values (``0``, ``false``, …) don't.
+    """
+    global _frozen
+    _frozen = frozen
+
+
+def _env_flag(name: str) -> bool:
+    return (os.environ.get(name) or "").strip().lower() in _TRUE_VALUES
+
+
+def clear_settings_cache() -> None:
+    """Forget every memoized :class:`Settings` instance."""
+    with _cache_lock:
+        _settings_cache.clear()
+
+
+def _candidate_paths(config_path: Optional[str | Path]) -> List[Path]:
     candidate_paths = []
     if config_path:
-        candidate_paths.append(Path(config_path).expanduser())
+        candidate_paths.append(Path(os.path.abspath(Path(config_path).expanduser())))
     env_path = os.environ.get("ICAKAD_CONFIG")
     if env_path:
-        candidate_paths.append(Path(env_path).expanduser())
+        candidate_paths.append(Path(os.path.abspath(Path(env_path).expanduser())))
     candidate_paths.extend(DEFAULT_CONFIG_LOCATIONS)
+    return candidate_paths
+
 
+def _file_signature(candidate_paths: List[Path]) -> _FileSignature:
+    """Stat candidates up to (and including) the first regular file."""
+    signature = []
     for path in candidate_paths:
-        if path.exists() and path.is_file():
-            try:
-                payload = _load_json(path)
-            except (OSError, ValueError) as exc:
-                raise ValueError(f"Unable to read configuration from {path}: {exc}") from exc
-            mapped: Dict[str, Any] = {}
-            for key in ("shorturl_base", "paste_base", "token"):
-                if key in payload:
-                    mapped[key] = payload[key]
-            settings = settings.with_overrides(**mapped)
-            break
+        try:
+            info = os.stat(path)
+        except OSError:
+            signature.append((str(path), None, None))
+            continue
+        if not stat.S_ISREG(info.st_mode):
+            signature.append((str(path), None, None))
+            continue
+        signature.append((str(path), info.st_mtime_ns, info.st_size))
+        break
+    return tuple(signature)
+
+
+def _read_settings(signature: _FileSignature) -> Settings:
+    settings = Settings()
+
+    # Config file from explicit path or environment hint.
+    for raw_path, mtime, _ in signature:
+        if mtime is None:
+            continue
+        path = Path(raw_path)
+        try:
+            payload = _load_json(path)
+        except (OSError, ValueError) as exc:
+            raise ValueError(f"Unable to read configuration from {path}: {exc}") from exc
+        mapped: Dict[str, Any] = {}
+        for key in ("shorturl_base", "paste_base", "token"):
+            if key in payload:
+                mapped[key] = payload[key]
+        if "rate_limits" in payload:
+            if not isinstance(payload["rate_limits"], dict):
+                raise ValueError(f"'rate_limits' in {path} must be an object")
+            mapped["rate_limits"] = payload["rate_limits"]
+        for key in ("pool_connections", "pool_maxsize"):
+            if key in payload:
+                value = payload[key]
+                if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                    raise ValueError(f"'{key}' in {path} must be a positive integer")
+                mapped[key] = value
+        if "pool_block" in payload:
+            if not isinstance(payload["pool_block"], bool):
+                raise ValueError(f"'pool_block' in {path} must be true or false")
+            mapped["pool_block"] = payload["pool_block"]
+        settings = settings.with_overrides(**mapped)
+        break
 
     # Environment overrides
     env_overrides = {
@@ -81,13 +156,45 @@ def load_settings(
         "paste_base": os.environ.get("ICAKAD_PASTE_BASE"),
         "token": os.environ.get("ICAKAD_TOKEN"),
     }
-    settings = settings.with_overrides(**env_overrides)
+    return settings.with_overrides(**env_overrides)
+
+
+def load_settings(
+    config_path: Optional[str | Path] = None,
+    *,
+    token: Optional[str] = None,
+    shorturl_base: Optional[str] = None,
+    paste_base: Optional[str] = None,
+) -> Settings:
+    """Load settings from config files, environment variables, and overrides.
+
+    Results are memoized per candidate path list and environment.  A cached
+    entry is reused while the config file's mtime and size are unchanged, so
+    repeated calls cost a few ``stat`` calls at most (none once frozen, see
+    :func:`freeze_settings`).
+    """
+    candidate_paths = _candidate_paths(config_path)
+    key = (
+        tuple(str(path) for path in candidate_paths),
+        tuple(os.environ.get(name) for name in ENV_VARS),
+    )
+    frozen = _frozen or _env_flag(FREEZE_ENV_VAR)
+
+    cached = _settings_cache.get(key)
+    if cached is not None and frozen:
+        settings = cached[1]
+    else:
+        signature = _file_signature(candidate_paths)
+        if cached is not None and cached[0] == signature:
+            settings = cached[1]
+        else:
+            settings = _read_settings(signature)
+            with _cache_lock:
+                _settings_cache[key] = (signature, settings)
 
     # Direct call overrides win last.
-    settings = settings.with_overrides(
+    return settings.with_overrides(
         shorturl_base=shorturl_base,
         paste_base=paste_base,
         token=token,
     )
-
-    return settings
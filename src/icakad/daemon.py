@@ -0,0 +1,435 @@
+"""Resident ``icakad daemon`` that CLI invocations are forwarded to.
+
+A one-shot ``icakad shorturl list`` pays for interpreter start-up, importing
+``requests``, reading the config file, building a session and a TCP/TLS
+handshake, then throws it all away.  ``icakad daemon`` keeps one process
+around with the pooled clients (:mod:`icakad.pool`), memoized
+:class:`~icakad.config.Settings`, per-origin rate limits and open AI
+response caches, and listens on a Unix socket.
+
+:func:`icakad.cli.main` first offers each parsed command to the daemon via
+:func:`forward`; when no daemon is listening (or the command cannot be
+forwarded) it runs in-process exactly as before.  Set ``ICAKAD_NO_DAEMON=1``
+to never forward.
+
+The wire protocol is newline-delimited JSON over the socket.  The client
+sends one request (``{"op": "run", "args": {...}, "env": {...},
+"cwd": ..., "version": ...}``); the daemon streams ``{"stdout": ...}`` and
+``{"stderr": ...}`` frames while the command runs and ends with
+``{"exit": code}``, or answers ``{"fallback": reason}`` when the client
+should run the command itself.
+
+This module is imported on every CLI call, so it must stay cheap: the
+forwarding path uses only the standard library.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from typing import IO, Any, Dict, Optional, TextIO
+
+SOCKET_ENV_VAR = "ICAKAD_DAEMON_SOCKET"
+DISABLE_ENV_VAR = "ICAKAD_NO_DAEMON"
+CONNECT_TIMEOUT = 1.0
+
+# Namespace attributes holding file paths, made absolute before forwarding
+# because the daemon runs in its own working directory.
+PATH_ARGUMENTS = ("config_path", "output", "output_raw", "text_file", "file", "input", "cache")
+# Environment variables that change the outcome of a command; the daemon
+# only serves clients whose values match its own.
+FORWARDED_ENV_VARS = (
+    "ICAKAD_CONFIG",
+    "ICAKAD_SHORTURL_BASE",
+    "ICAKAD_PASTE_BASE",
+    "ICAKAD_TOKEN",
+    "ICAKAD_FREEZE_CONFIG",
+)
+
+__all__ = [
+    "DaemonServer",
+    "default_socket_path",
+    "forward",
+    "request",
+]
+
+
+def default_socket_path() -> Path:
+    """``$ICAKAD_DAEMON_SOCKET``, else ``$XDG_RUNTIME_DIR/icakad.sock``, else ``~/.cache/icakad``."""
+    explicit = os.environ.get(SOCKET_ENV_VAR)
+    if explicit:
+        return Path(explicit).expanduser()
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / "icakad.sock"
+    return Path.home() / ".cache" / "icakad" / "daemon.sock"
+
+
+def _environment() -> Dict[str, Optional[str]]:
+    return {name: os.environ.get(name) for name in FORWARDED_ENV_VARS}
+
+
+def _version() -> str:
+    from . import __version__
+
+    return __version__
+
+
+def _same_cwd_config(client_cwd: Optional[str]) -> bool:
+    """Whether the client would find the same ``./icakad.config.json`` as the daemon.
+
+    Config lookup falls back to a file in the working directory, which the
+    daemon resolved against its own cwd when it started.
+    """
+    from .config import DEFAULT_CONFIG_LOCATIONS
+
+    own = DEFAULT_CONFIG_LOCATIONS[-1]
+    if not client_cwd:
+        return False
+    theirs = Path(client_cwd) / own.name
+    if os.path.abspath(theirs) == os.path.abspath(own):
+        return True
+    # Different directories only matter when one of them has a config file.
+    return not (theirs.is_file() or own.is_file())
+
+
+# ------------------------------------------------------------------- client
+def _forwardable(args: argparse.Namespace) -> bool:
+    """Whether *args* can run in the daemon with identical results.
+
+    Commands that read stdin or write binary data to stdout stay local, and
+    so does ``icakad daemon`` itself.
+    """
+    command = getattr(args, "command", None)
+    if command in (None, "daemon"):
+        return False
+    if any(getattr(args, name, None) == "-" for name in PATH_ARGUMENTS + ("prompt",)):
+        return False
+    if command == "paste" and getattr(args, "action", None) == "get" and getattr(args, "stream", False):
+        return False
+    return True
+
+
+def _serialise_args(args: argparse.Namespace) -> Dict[str, Any]:
+    payload = dict(vars(args))
+    for name in PATH_ARGUMENTS:
+        value = payload.get(name)
+        if isinstance(value, str) and value:
+            payload[name] = os.path.abspath(os.path.expanduser(value))
+    return payload
+
+
+def _connect(path: Path) -> Optional[socket.socket]:
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        # Stale socket file or a daemon that is shutting down.
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def request(message: Dict[str, Any], *, socket_path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """Send a control *message* (``stop``, ``status``) and return the reply."""
+    sock = _connect(socket_path or default_socket_path())
+    if sock is None:
+        return None
+    with sock, sock.makefile("rwb") as stream:
+        _send(stream, message)
+        line = stream.readline()
+    return json.loads(line) if line else None
+
+
+def forward(
+    args: argparse.Namespace,
+    *,
+    socket_path: Optional[Path] = None,
+    stdout: Optional[TextIO] = None,
+    stderr: Optional[TextIO] = None,
+) -> Optional[int]:
+    """Run the parsed command in a running daemon and return its exit code.
+
+    Returns ``None`` when the command should run in-process instead: no
+    daemon is listening, forwarding is disabled via ``ICAKAD_NO_DAEMON``,
+    the command touches stdin/stdout as files, or the daemon declines (a
+    different icakad version, ``ICAKAD_*`` environment or working-directory
+    config file).
+    """
+    if os.environ.get(DISABLE_ENV_VAR) or not _forwardable(args):
+        return None
+    sock = _connect(socket_path or default_socket_path())
+    if sock is None:
+        return None
+    out = stdout or sys.stdout
+    err = stderr or sys.stderr
+    with sock, sock.makefile("rwb") as stream:
+        try:
+            _send(
+                stream,
+                {
+                    "op": "run",
+                    "args": _serialise_args(args),
+                    "env": _environment(),
+                    "cwd": os.getcwd(),
+                    "version": _version(),
+                },
+            )
+        except OSError:
+            # The daemon went away before it saw the command; run it here.
+            return None
+        try:
+            for line in stream:
+                frame = json.loads(line)
+                if "stdout" in frame:
+                    out.write(frame["stdout"])
+                    out.flush()
+                elif "stderr" in frame:
+                    err.write(frame["stderr"])
+                    err.flush()
+                elif "exit" in frame:
+                    return int(frame["exit"])
+                elif "fallback" in frame:
+                    return None
+        except (OSError, ValueError):
+            pass
+    # The command may already have had side effects, so never re-run it here.
+    err.write("icakad: lost connection to the daemon before the command finished\n")
+    return 1
+
+
+def _send(stream: IO[bytes], message: Dict[str, Any]) -> None:
+    stream.write(json.dumps(message, ensure_ascii=False).encode("utf-8") + b"\n")
+    stream.flush()
+
+
+# ------------------------------------------------------------------- server
+class _FrameWriter:
+    """Text stream turning writes into ``{"<name>": text}`` frames."""
+
+    def __init__(self, stream: IO[bytes], name: str, lock: threading.Lock) -> None:
+        self._stream = stream
+        self._name = name
+        self._lock = lock
+
+    def write(self, text: str) -> int:
+        if text:
+            with self._lock:
+                _send(self._stream, {self._name: text})
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class _ThreadRedirect:
+    """Stand-in for ``sys.stdout``/``sys.stderr`` routing writes per thread.
+
+    Threads serving a client write to that client's socket; every other
+    thread keeps writing to the original stream.
+    """
+
+    def __init__(self, original: TextIO) -> None:
+        self._original = original
+        self._local = threading.local()
+
+    def bind(self, target: Optional[_FrameWriter]) -> None:
+        self._local.target = target
+
+    def _target(self) -> Any:
+        return getattr(self._local, "target", None) or self._original
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._target(), name)
+
+
+class DaemonServer:
+    """Unix-socket server running CLI commands inside one warm process."""
+
+    def __init__(self, socket_path: Optional[Path] = None) -> None:
+        self.socket_path = Path(socket_path or default_socket_path())
+        self.started_at = time.time()
+        self.served = 0
+        self._lock = threading.Lock()
+        self._server: Any = None
+        self._parser: Optional[argparse.ArgumentParser] = None
+
+    def serve_forever(self) -> None:
+        """Bind the socket and handle clients until :meth:`shutdown`."""
+        import socketserver
+
+        from . import cli
+
+        self._parser = cli.build_parser()
+        self._warm_up()
+        self._bind_socket_path()
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                daemon._handle(self.rfile, self.wfile)
+
+        class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        stdout, stderr = sys.stdout, sys.stderr
+        self._stdout = sys.stdout = _ThreadRedirect(stdout)  # type: ignore[assignment]
+        self._stderr = sys.stderr = _ThreadRedirect(stderr)  # type: ignore[assignment]
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = Server(str(self.socket_path), Handler)
+        finally:
+            os.umask(previous_umask)
+        cli._resident_caches = {}
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            sys.stdout, sys.stderr = stdout, stderr
+            caches, cli._resident_caches = cli._resident_caches, None
+            for cache in caches.values():
+                cache.close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+            from .pool import close_all
+
+            close_all()
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            # ``shutdown`` blocks until serve_forever returns; never call it
+            # from the serving thread itself.
+            threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def status(self) -> Dict[str, Any]:
+        from .pool import get_registry
+
+        return {
+            "pid": os.getpid(),
+            "socket": str(self.socket_path),
+            "version": _version(),
+            "uptime": round(time.time() - self.started_at, 3),
+            "served": self.served,
+            "clients": len(get_registry()),
+        }
+
+    def _warm_up(self) -> None:
+        # Pay the import cost once, before the first client connects.
+        import requests  # noqa: F401
+
+        from . import ai, paste, shorturl  # noqa: F401
+
+    def _bind_socket_path(self) -> None:
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if request({"op": "status"}, socket_path=self.socket_path) is not None:
+                raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+
+    def _handle(self, rfile: IO[bytes], wfile: IO[bytes]) -> None:
+        line = rfile.readline()
+        if not line:
+            return
+        try:
+            message = json.loads(line)
+        except ValueError:
+            _send(wfile, {"fallback": "invalid request"})
+            return
+        op = message.get("op")
+        if op == "status":
+            _send(wfile, self.status())
+        elif op == "stop":
+            _send(wfile, {"stopping": True})
+            self.shutdown()
+        elif op == "run":
+            self._run(message, wfile)
+        else:
+            _send(wfile, {"fallback": f"unknown op {op!r}"})
+
+    def _run(self, message: Dict[str, Any], wfile: IO[bytes]) -> None:
+        if message.get("version") != _version():
+            _send(wfile, {"fallback": "version mismatch"})
+            return
+        if message.get("env") != _environment():
+            _send(wfile, {"fallback": "environment mismatch"})
+            return
+        if not _same_cwd_config(message.get("cwd")):
+            _send(wfile, {"fallback": "working directory config differs"})
+            return
+        from .cli import run
+
+        assert self._parser is not None
+        lock = threading.Lock()
+        self._stdout.bind(_FrameWriter(wfile, "stdout", lock))
+        self._stderr.bind(_FrameWriter(wfile, "stderr", lock))
+        try:
+            try:
+                code = run(self._parser, argparse.Namespace(**message.get("args", {})))
+            except SystemExit as exc:
+                code = _exit_code(exc)
+            except Exception:  # noqa: BLE001 - reported to the client like an uncaught error
+                traceback.print_exc(file=sys.stderr)
+                code = 1
+            with self._lock:
+                self.served += 1
+            _send(wfile, {"exit": code})
+        except OSError:
+            # The client disconnected (e.g. Ctrl-C); nothing left to report to.
+            pass
+        finally:
+            self._stdout.bind(None)
+            self._stderr.bind(None)
+
+
+def _exit_code(exc: SystemExit) -> int:
+    if exc.code is None:
+        return 0
+    if isinstance(exc.code, int):
+        return exc.code
+    sys.stderr.write(f"{exc.code}\n")
+    return 1
+
+
+def run_command(args: argparse.Namespace) -> int:
+    """Implementation of ``icakad daemon [run|status|stop]``."""
+    socket_path = Path(args.socket).expanduser() if args.socket else default_socket_path()
+    action = args.action or "run"
+    if action == "run":
+        server = DaemonServer(socket_path)
+        sys.stderr.write(f"icakad daemon listening on {socket_path}\n")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    reply = request({"op": action}, socket_path=socket_path)
+    if reply is None:
+        sys.stderr.write(f"No icakad daemon is listening on {socket_path}\n")
+        return 1
+    from .common import print_json
+
+    print_json(reply)
+    return 0
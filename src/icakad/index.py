@@ -0,0 +1,155 @@
+"""Persistent local index of short links (slug -> url) backed by SQLite."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Mapping, Optional, Union
+
+DEFAULT_INDEX_TTL = 300.0
+DEFAULT_INDEX_DIR = Path.home() / ".cache" / "icakad"
+
+__all__ = ["DEFAULT_INDEX_TTL", "SlugIndex", "default_index_path"]
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS links (slug TEXT PRIMARY KEY, url TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+)
+
+
+def default_index_path(base_url: str) -> Path:
+    """Return the default index location for the worker at *base_url*."""
+    digest = hashlib.sha1(base_url.rstrip("/").encode("utf-8")).hexdigest()[:12]
+    return DEFAULT_INDEX_DIR / f"slugs-{digest}.sqlite3"
+
+
+class SlugIndex:
+    """Local slug -> url table with a freshness TTL and the listing's ETag.
+
+    The index is refreshed by :meth:`ShortURLClient.refresh_index` and kept
+    current by the client after successful add/edit/delete calls.  Lookups
+    are single primary-key reads and never touch the network.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = ":memory:",
+        *,
+        ttl: Optional[float] = DEFAULT_INDEX_TTL,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = str(path)
+        if self.path != ":memory:":
+            target = Path(self.path).expanduser()
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self.path = str(target)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+        self._refreshed_at = self._meta_float("refreshed_at")
+        self._etag = self._meta("etag")
+
+    @classmethod
+    def for_base_url(cls, base_url: str, *, ttl: Optional[float] = DEFAULT_INDEX_TTL) -> "SlugIndex":
+        """Open (or create) the default on-disk index for *base_url*."""
+        return cls(default_index_path(base_url), ttl=ttl)
+
+    # ------------------------------------------------------------- state
+    @property
+    def etag(self) -> Optional[str]:
+        return self._etag
+
+    @property
+    def refreshed_at(self) -> Optional[float]:
+        return self._refreshed_at
+
+    def is_fresh(self) -> bool:
+        """True when the index was refreshed less than ``ttl`` seconds ago."""
+        if self._refreshed_at is None:
+            return False
+        if self.ttl is None:
+            return True
+        return self._clock() - self._refreshed_at < self.ttl
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+    # ----------------------------------------------------------- lookups
+    def get(self, slug: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT url FROM links WHERE slug = ?", (slug,)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, slug: object) -> bool:
+        return isinstance(slug, str) and self.get(slug) is not None
+
+    def as_dict(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT slug, url FROM links"))
+
+    # ----------------------------------------------------------- updates
+    def replace_all(self, links: Mapping[str, str], *, etag: Optional[str] = None) -> None:
+        """Replace the whole table with *links* and mark the index fresh."""
+        now = self._clock()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM links")
+                self._conn.executemany("INSERT INTO links (slug, url) VALUES (?, ?)", links.items())
+                self._set_meta("refreshed_at", repr(now))
+                self._set_meta("etag", etag)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._refreshed_at = now
+            self._etag = etag
+
+    def touch(self) -> None:
+        """Mark the current contents as fresh (e.g. after ``304 Not Modified``)."""
+        now = self._clock()
+        with self._lock:
+            self._set_meta("refreshed_at", repr(now))
+            self._refreshed_at = now
+
+    def upsert(self, slug: str, url: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO links (slug, url) VALUES (?, ?)", (slug, url))
+            self._invalidate_etag()
+
+    def delete(self, slug: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM links WHERE slug = ?", (slug,))
+            self._invalidate_etag()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ---------------------------------------------------------- internals
+    def _invalidate_etag(self) -> None:
+        # Local edits change the listing, so the stored ETag no longer matches.
+        if self._etag is not None:
+            self._set_meta("etag", None)
+            self._etag = None
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _meta_float(self, key: str) -> Optional[float]:
+        value = self._meta(key)
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def _set_meta(self, key: str, value: Optional[str]) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
@@ -2,13 +2,58 @@
 
 from __future__ import annotations
 
+import codecs
+import hashlib
+import json
+import os
+import stat
+import sys
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional, Union
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import requests
-from requests import Response, Session
+from .common import save_chunks
+from .common.concurrency import ordered_map
+from .common.jsonstream import iter_array_items
+from .common.singleflight import FlightStats, SingleFlight
+from .pool import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, ThreadSessions
+from .transport import CircuitBreaker, RetryPolicy, Timeout, Transport
+
+if TYPE_CHECKING:  # pragma: no cover
+    from requests import Response, Session
+
+    from .ratelimit import TokenBucket
 
 DEFAULT_TIMEOUT = 10
+DEFAULT_CHUNK_SIZE = 64 * 1024
+LISTING_KEYS = ("pastes",)
+DEFAULT_METADATA_TTL = 60.0
+#: Reads whose identical concurrent calls share one in-flight request.
+COALESCED_READS: FrozenSet[str] = frozenset({"list_pastes", "fetch_paste"})
+
+R = TypeVar("R")
+#: Where a raw response body is written: a path or a binary file object.
+Destination = Union[str, Path, BinaryIO]
 
 
 class PasteError(RuntimeError):
@@ -17,17 +62,69 @@ class PasteError(RuntimeError):
 
 @dataclass
 class PasteClient:
-    """Small helper around the paste worker endpoints."""
+    """Small helper around the paste worker endpoints.
+
+    One client may be used from many threads at once.  Unless a ``session``
+    is passed in, each thread gets its own session and all of them share a
+    single pool of ``pool_maxsize`` connections (see
+    :class:`icakad.pool.ThreadSessions`); size it to at least the number of
+    threads.  A ``session`` passed in is shared by every thread as is.
+    """
 
     base_url: str
     token: Optional[str] = None
     timeout: int = DEFAULT_TIMEOUT
     session: Optional[Session] = None
-    _session: Session = field(init=False, repr=False)
+    metadata_ttl: Optional[float] = DEFAULT_METADATA_TTL
+    connect_timeout: Optional[float] = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    breaker: Optional[CircuitBreaker] = field(default_factory=CircuitBreaker)
+    rate_limiter: Optional[TokenBucket] = None
+    coalesce: Collection[str] = COALESCED_READS
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    pool_block: bool = False
+    _sessions: Optional[ThreadSessions] = field(default=None, init=False, repr=False)
+    _transport: Transport = field(init=False, repr=False)
+    _flights: SingleFlight = field(default_factory=SingleFlight, init=False, repr=False)
+    _metadata: Optional[Dict[str, Dict[str, Any]]] = field(default=None, init=False, repr=False)
+    _metadata_loaded_at: float = field(default=0.0, init=False, repr=False)
+    _metadata_lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.base_url = self.base_url.rstrip("/")
-        self._session = self.session or requests.Session()
+        self.coalesce = frozenset(self.coalesce)
+        unknown = self.coalesce - COALESCED_READS
+        if unknown:
+            raise ValueError(f"Cannot coalesce {sorted(unknown)}; supported: {sorted(COALESCED_READS)}")
+        if self.session is None:
+            self._sessions = ThreadSessions(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+                pool_block=self.pool_block,
+            )
+        self._transport = Transport(
+            self.session,
+            session_factory=self._sessions.get if self._sessions is not None else None,
+            timeout=Timeout(read=self.timeout, connect=self.connect_timeout),
+            retry=self.retry,
+            breaker=self.breaker,
+            limiter=self.rate_limiter,
+            error=PasteError,
+        )
+
+    @property
+    def _session(self) -> Session:
+        """The calling thread's session (or the ``session`` passed in)."""
+        if self._sessions is None:
+            assert self.session is not None
+            return self.session
+        return self._sessions.get()
+
+    def close(self) -> None:
+        """Close the sessions and pool when the client created them."""
+        if self._sessions is not None:
+            self._sessions.close()
 
     # ------------------------------------------------------------------ utils
     def _headers(self, *, content_type: Optional[str] = None) -> Dict[str, str]:
@@ -38,21 +135,27 @@ class PasteClient:
             headers["Authorization"] = f"Bearer {self.token}"
         return headers
 
-    def _error_message(self, response: Response) -> str:
-        body = (response.text or "").strip()
-        if body:
-            return f"{response.status_code}: {body}"
-        return f"{response.status_code}: {response.reason}"
+    def _check(self, response: Response) -> Response:
+        return self._transport.check(response)
+
+    def _coalesced(self, method: str, key: Tuple[Hashable, ...], func: Callable[[], R]) -> R:
+        if method not in self.coalesce:
+            return func()
+        return self._flights.do((method, *key), func)
+
+    @property
+    def coalesce_stats(self) -> FlightStats:
+        """Counters of calls that shared another thread's in-flight request."""
+        return self._flights.stats
+
+    def _result(self, response: Response, save_raw: Optional[Destination], validate: bool) -> Dict[str, Any]:
+        if save_raw is None:
+            return self._json(response)
+        return self._transport.save(response, save_raw, validate=validate)
 
     def _json(self, response: Response) -> Dict[str, Any]:
-        try:
-            response.raise_for_status()
-        except requests.HTTPError as exc:
-            raise PasteError(self._error_message(response)) from exc
-        try:
-            return response.json()
-        except ValueError as exc:
-            raise PasteError("Paste API returned invalid JSON") from exc
+        self._check(response)
+        return _decode_json(response)
 
     # ---------------------------------------------------------------- API ops
     def create_paste(
@@ -62,51 +165,125 @@ class PasteClient:
         paste_id: Optional[str] = None,
         ttl: Optional[int] = None,
         as_plaintext: bool = False,
+        save_raw: Optional[Destination] = None,
+        validate: bool = False,
     ) -> Dict[str, Any]:
+        """Create a paste from *text* and return the API response.
+
+        With *save_raw* the response body is streamed to that path or
+        binary file unchanged (see :meth:`list_pastes`).
+        """
         if not isinstance(text, str) or not text:
             raise ValueError("text must be a non-empty string")
 
-        params: Dict[str, Any] = {}
-        if paste_id:
-            params["id"] = paste_id
-        if ttl is not None:
-            params["ttl"] = int(ttl)
-
+        params = _create_params(paste_id, ttl)
         url = f"{self.base_url}/api/paste"
+        # Re-sending a paste with an explicit id overwrites it; without one
+        # a retry could create a duplicate.
+        idempotent = bool(paste_id)
+        # Raw responses are streamed to disk by Transport.save.
+        extra: Dict[str, Any] = {"stream": True} if save_raw is not None else {}
 
         if as_plaintext:
             headers = self._headers(content_type="text/plain; charset=utf-8")
-            response = self._session.post(
+            response = self._transport.request(
+                "post",
                 url,
+                idempotent=idempotent,
+                check=False,
+                **extra,
                 params=params,
                 data=text,
                 headers=headers,
-                timeout=self.timeout,
             )
         else:
             headers = self._headers(content_type="application/json")
-            response = self._session.post(
+            response = self._transport.request(
+                "post",
                 url,
+                idempotent=idempotent,
+                check=False,
+                **extra,
                 params=params,
                 json={"text": text},
                 headers=headers,
-                timeout=self.timeout,
             )
-        return self._json(response)
+        result = self._result(response, save_raw, validate)
+        # The listing changed; pick up the new paste on the next enrichment.
+        self.invalidate_metadata()
+        return result
 
-    def fetch_paste(self, paste_id: str, *, raw: bool = False) -> Union[str, Dict[str, Any]]:
-        url = f"{self.base_url}/raw/{paste_id}"
-        response = self._session.get(
-            url,
-            headers=self._headers(),
-            timeout=self.timeout,
-        )
-        try:
-            response.raise_for_status()
-        except requests.HTTPError as exc:
-            raise PasteError(self._error_message(response)) from exc
+    def upload_paste(
+        self,
+        source: Union[str, Path, BinaryIO],
+        *,
+        paste_id: Optional[str] = None,
+        ttl: Optional[int] = None,
+        as_plaintext: bool = True,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        save_raw: Optional[Destination] = None,
+        validate: bool = False,
+    ) -> Dict[str, Any]:
+        """Create a paste from a file, ``"-"`` (stdin) or a binary stream.
+
+        The body is never materialised as a Python string.  In plaintext
+        mode regular files are streamed with a known ``Content-Length`` and
+        pipes are sent with chunked transfer encoding.  In JSON mode the
+        ``{"text": ...}`` document is encoded chunk by chunk on the fly.
+        Empty and whitespace-only sources raise :class:`ValueError`.
+        """
+        params = _create_params(paste_id, ttl)
+        url = f"{self.base_url}/api/paste"
+        with _open_source(source) as fh:
+            regular = as_plaintext and _is_regular_file(fh)
+            # A caller's stream may already be positioned past byte 0.
+            start = fh.tell() if regular else 0
+            first = _read_head(fh, chunk_size)
+            if as_plaintext:
+                headers = self._headers(content_type="text/plain; charset=utf-8")
+                if regular:
+                    fh.seek(start)
+                    body: Any = fh
+                else:
+                    body = _read_chunks(fh, chunk_size, first)
+            else:
+                headers = self._headers(content_type="application/json")
+                body = _json_text_chunks(_read_chunks(fh, chunk_size, first))
+            # Streamed bodies cannot be replayed, so uploads are never retried.
+            response = self._transport.request(
+                "post",
+                url,
+                retries=False,
+                check=False,
+                params=params,
+                data=body,
+                headers=headers,
+                **({"stream": True} if save_raw is not None else {}),
+            )
+        result = self._result(response, save_raw, validate)
+        self.invalidate_metadata()
+        return result
 
-        text = response.text
+    def fetch_paste(
+        self,
+        paste_id: str,
+        *,
+        raw: bool = False,
+        enrich: bool = True,
+    ) -> Union[str, Dict[str, Any]]:
+        """Fetch a paste's text, merged with its listing metadata unless *raw*.
+
+        Metadata comes from a shared id -> metadata index that is built from
+        one ``/api/list`` call and reused until ``metadata_ttl`` expires or a
+        paste is created.  Pass ``enrich=False`` to skip it altogether.
+        Identical concurrent calls share one request and the same result
+        object (see ``coalesce``), so treat it as read-only.
+        """
+        fetch = partial(self._fetch_paste, paste_id, raw=raw, enrich=enrich)
+        return self._coalesced("fetch_paste", (paste_id, raw, enrich), fetch)
+
+    def _fetch_paste(self, paste_id: str, *, raw: bool, enrich: bool) -> Union[str, Dict[str, Any]]:
+        text = self._fetch_text(paste_id)
         if raw:
             return text
 
@@ -115,25 +292,248 @@ class PasteClient:
             "url": f"{self.base_url}/{paste_id}",
             "text": text,
         }
+        if enrich:
+            details.update(self.paste_metadata(paste_id))
+        return details
 
+    def fetch_pastes(
+        self,
+        paste_ids: Iterable[str],
+        *,
+        raw: bool = False,
+        enrich: bool = True,
+        max_workers: int = 4,
+    ) -> List[Union[str, Dict[str, Any]]]:
+        """Fetch several pastes (in order) with at most one listing call."""
+        ids = list(paste_ids)
+        if enrich and not raw:
+            self._metadata_index()
+        results: List[Union[str, Dict[str, Any]]] = []
+        fetch = partial(self.fetch_paste, raw=raw, enrich=enrich)
+        for _, result, error in ordered_map(fetch, ids, max_workers=max_workers):
+            if error is not None:
+                raise error
+            results.append(result)
+        return results
+
+    def download_paste(
+        self,
+        paste_id: str,
+        destination: Union[str, Path, BinaryIO],
+        *,
+        checksum: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """Stream a paste's raw bytes to *destination* without decoding them.
+
+        *destination* is a path or a binary file object (``sys.stdout.buffer``
+        works).  Paths are written via a ``.part`` file that is renamed once
+        the download completes.  When *checksum* names a :mod:`hashlib`
+        algorithm, its hex digest is computed on the fly and returned under ``digest``.
+        """
+        digest = hashlib.new(checksum) if checksum else None
+        url = f"{self.base_url}/raw/{paste_id}"
+        response = self._transport.request(
+            "get",
+            url,
+            check=False,
+            headers=self._headers(),
+            stream=True,
+        )
+        summary: Dict[str, Any] = {"id": paste_id}
+        try:
+            self._check(response)
+            summary.update(save_chunks(response.iter_content(chunk_size), destination, digest=digest))
+        finally:
+            response.close()
+        if digest is not None:
+            summary["algorithm"] = digest.name
+            summary["digest"] = digest.hexdigest()
+        return summary
+
+    def list_pastes(
+        self,
+        *,
+        save_raw: Optional[Destination] = None,
+        validate: bool = False,
+    ) -> Dict[str, Any]:
+        """Return the ``/api/list`` listing, shared by concurrent callers.
+
+        With *save_raw* the response body is streamed byte for byte to that
+        path or binary file instead of being parsed, and only a
+        ``{"bytes", "path"}`` summary is returned.  The HTTP status is still
+        checked; *validate* additionally parses the JSON incrementally while
+        it is written, raising :class:`PasteError` (and leaving no file) if
+        it is malformed.  The metadata index is not refreshed in this mode.
+        """
+        if save_raw is not None:
+            url = f"{self.base_url}/api/list"
+            response = self._transport.request("get", url, check=False, stream=True, headers=self._headers())
+            return self._result(response, save_raw, validate)
+        return self._coalesced("list_pastes", (), self._list_pastes)
+
+    def _list_pastes(self) -> Dict[str, Any]:
+        url = f"{self.base_url}/api/list"
+        response = self._transport.request("get", url, check=False, headers=self._headers())
+        listing = self._json(response)
+        self._store_metadata(listing)
+        return listing
+
+    # ------------------------------------------------------------- metadata
+    def paste_metadata(self, paste_id: str) -> Dict[str, Any]:
+        """Return listing metadata for *paste_id* (without ``text``), or ``{}``."""
+        return dict(self._metadata_index().get(paste_id, {}))
+
+    def refresh_metadata(self) -> None:
+        """Reload the metadata index from ``/api/list`` right away."""
+        self.list_pastes()
+
+    def invalidate_metadata(self) -> None:
+        """Drop the metadata index so the next enrichment reloads it."""
+        with self._metadata_lock:
+            self._metadata = None
+
+    def _metadata_index(self) -> Dict[str, Dict[str, Any]]:
+        with self._metadata_lock:
+            if self._metadata is not None and not self._metadata_expired():
+                return self._metadata
+        # Never wait on the (coalesced) listing while holding the lock: the
+        # thread leading that flight needs it to store the result.
         try:
-            listing = self.list_pastes()
+            self.list_pastes()
         except PasteError:
-            return details
-
-        pastes = listing.get("pastes") if isinstance(listing, dict) else None
-        if isinstance(pastes, list):
-            for item in pastes:
-                if isinstance(item, dict) and item.get("id") == paste_id:
-                    details.update({k: v for k, v in item.items() if k != "text"})
-                    break
-        return details
+            # Enrichment is best effort; don't retry the listing on every fetch.
+            with self._metadata_lock:
+                self._metadata = {}
+                self._metadata_loaded_at = time.monotonic()
+        with self._metadata_lock:
+            return self._metadata or {}
+
+    def _metadata_expired(self) -> bool:
+        if self.metadata_ttl is None:
+            return False
+        return time.monotonic() - self._metadata_loaded_at >= self.metadata_ttl
+
+    def _store_metadata(self, listing: Any) -> None:
+        # A listing without a pastes array still counts as loaded; otherwise
+        # every enriched fetch would list again.
+        index = _metadata_from_listing(listing)
+        with self._metadata_lock:
+            self._metadata = index if index is not None else {}
+            self._metadata_loaded_at = time.monotonic()
+
+    def _fetch_text(self, paste_id: str) -> str:
+        url = f"{self.base_url}/raw/{paste_id}"
+        response = self._transport.request("get", url, headers=self._headers())
+        return response.text
 
-    def list_pastes(self) -> Dict[str, Any]:
+    def iter_pastes(self, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield paste metadata entries one by one from a streamed listing.
+
+        The ``pastes`` array is parsed incrementally from the response body,
+        so memory use does not grow with the number of pastes.
+        """
         url = f"{self.base_url}/api/list"
-        response = self._session.get(
+        response = self._transport.request(
+            "get",
             url,
+            check=False,
             headers=self._headers(),
-            timeout=self.timeout,
+            stream=True,
         )
-        return self._json(response)
+        try:
+            self._check(response)
+            for item in iter_array_items(response.iter_content(chunk_size), LISTING_KEYS):
+                if isinstance(item, dict):
+                    yield item
+        except ValueError as exc:
+            raise PasteError("Paste API returned invalid JSON") from exc
+        finally:
+            response.close()
+
+
+def _decode_json(response: Any) -> Any:
+    """Decode a checked ``requests`` or ``httpx`` response body as JSON."""
+    try:
+        return response.json()
+    except ValueError as exc:
+        raise PasteError("Paste API returned invalid JSON") from exc
+
+
+def _metadata_from_listing(listing: Any) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Build the id -> metadata index from a listing (``None`` if it has no pastes)."""
+    pastes = listing.get("pastes") if isinstance(listing, dict) else None
+    if not isinstance(pastes, list):
+        return None
+    index: Dict[str, Dict[str, Any]] = {}
+    for item in pastes:
+        if isinstance(item, dict) and isinstance(item.get("id"), str):
+            index[item["id"]] = {k: v for k, v in item.items() if k != "text"}
+    return index
+
+
+def _create_params(paste_id: Optional[str], ttl: Optional[int]) -> Dict[str, Any]:
+    params: Dict[str, Any] = {}
+    if paste_id:
+        params["id"] = paste_id
+    if ttl is not None:
+        params["ttl"] = int(ttl)
+    return params
+
+
+@contextmanager
+def _open_source(source: Union[str, Path, BinaryIO]) -> Iterator[BinaryIO]:
+    if hasattr(source, "read"):
+        yield source  # type: ignore[misc]
+    elif str(source) == "-":
+        yield sys.stdin.buffer
+    else:
+        with Path(source).expanduser().open("rb") as fh:
+            yield fh
+
+
+def _is_regular_file(fh: BinaryIO) -> bool:
+    try:
+        return stat.S_ISREG(os.fstat(fh.fileno()).st_mode) and fh.seekable()
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def _read_head(fh: BinaryIO, chunk_size: int) -> bytes:
+    """Read up to the first chunk with non-whitespace content.
+
+    Raises :class:`ValueError` for empty and whitespace-only sources, like
+    :func:`icakad.common.resolve_text_input` does for in-memory text.
+    """
+    head: List[bytes] = []
+    while True:
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            raise ValueError("The supplied text is empty.")
+        head.append(chunk)
+        if chunk.strip():
+            return b"".join(head)
+
+
+def _read_chunks(fh: BinaryIO, chunk_size: int, first: bytes = b"") -> Iterator[bytes]:
+    if first:
+        yield first
+    while True:
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _json_text_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Encode UTF-8 *chunks* as the JSON document ``{"text": "..."}`` piecewise."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    yield b'{"text": "'
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield json.dumps(text, ensure_ascii=False)[1:-1].encode("utf-8")
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield json.dumps(tail, ensure_ascii=False)[1:-1].encode("utf-8")
+    yield b'"}'
@@ -0,0 +1,306 @@
+"""Process-wide registry of pooled shorturl and paste clients."""
+
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from requests import Session
+    from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_IDLE_TIMEOUT = 300.0
+
+__all__ = [
+    "ClientRegistry",
+    "ThreadSessions",
+    "close_all",
+    "configure_pool",
+    "get_registry",
+    "make_session",
+]
+
+
+def make_session(
+    *,
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+    pool_block: bool = False,
+) -> Session:
+    """Return a :class:`requests.Session` with explicitly sized connection pools."""
+    adapter = _make_adapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    return _mounted_session(adapter)
+
+
+def _make_adapter(*, pool_connections: int, pool_maxsize: int, pool_block: bool) -> HTTPAdapter:
+    from requests.adapters import HTTPAdapter
+
+    return HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+
+
+def _mounted_session(adapter: HTTPAdapter) -> Session:
+    import requests
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class ThreadSessions:
+    """One :class:`requests.Session` per thread over a single shared connection pool.
+
+    ``requests`` does not promise that a session is safe to use from several
+    threads (cookies, mutable headers and adapter mounting are unguarded),
+    but urllib3's pool manager is.  Each thread therefore gets its own
+    lightweight session, and all of them mount the same sized
+    :class:`~requests.adapters.HTTPAdapter`, so keep-alive connections are
+    still shared.  Size ``pool_maxsize`` to at least the number of threads
+    calling the same host: with ``pool_block=False`` surplus requests open
+    throwaway connections, with ``pool_block=True`` they wait for a free one.
+    Sessions of finished threads are dropped together with the thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+    ) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._adapter: Optional[HTTPAdapter] = None
+        self._sessions: "weakref.WeakSet[Session]" = weakref.WeakSet()
+
+    @property
+    def adapter(self) -> HTTPAdapter:
+        """The connection pool shared by every thread's session."""
+        with self._lock:
+            if self._adapter is None:
+                self._adapter = _make_adapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=self.pool_maxsize,
+                    pool_block=self.pool_block,
+                )
+            return self._adapter
+
+    def get(self) -> Session:
+        """Return the calling thread's session, creating it on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = _mounted_session(self.adapter)
+            self._local.session = session
+            with self._lock:
+                self._sessions.add(session)
+        return session
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def close(self) -> None:
+        """Close every live session and the shared pool."""
+        with self._lock:
+            sessions = list(self._sessions)
+            adapter = self._adapter
+        for session in sessions:
+            session.close()
+        if adapter is not None:
+            adapter.close()
+
+
+@dataclass
+class _Entry:
+    client: Any
+    sessions: Optional[ThreadSessions]
+    last_used: float
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+        elif self.sessions is not None:
+            self.sessions.close()
+
+
+class ClientRegistry:
+    """Thread-safe cache of clients keyed by ``(type, base_url, token, timeout)``.
+
+    Every client handed out by the registry owns a connection pool of the
+    configured size (see :class:`ThreadSessions`), so repeated calls
+    against the same worker reuse keep-alive connections instead of paying
+    a new TCP/TLS handshake, from any number of threads.  Clients that were not requested for
+    ``idle_timeout`` seconds are closed and dropped on the next lookup.
+    """
+
+    def __init__(
+        self,
+        *,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        pool_block: bool = False,
+        idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[Hashable, ...], _Entry] = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def configure(
+        self,
+        *,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        pool_block: Optional[bool] = None,
+        idle_timeout: Optional[float] = None,
+    ) -> None:
+        """Update pool settings; only clients created afterwards are affected."""
+        with self._lock:
+            if pool_connections is not None:
+                self.pool_connections = pool_connections
+            if pool_maxsize is not None:
+                self.pool_maxsize = pool_maxsize
+            if pool_block is not None:
+                self.pool_block = pool_block
+            if idle_timeout is not None:
+                self.idle_timeout = idle_timeout
+
+    def get(
+        self,
+        factory: Callable[..., Any],
+        *,
+        base_url: str,
+        token: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_connections: Optional[int] = None,
+        pool_maxsize: Optional[int] = None,
+        pool_block: Optional[bool] = None,
+    ) -> Any:
+        """Return a cached client built by *factory*, creating it on first use.
+
+        The ``pool_*`` arguments override the registry defaults for this
+        client (and are part of its cache key).
+        """
+        key = (factory, base_url.rstrip("/"), token, timeout, pool_connections, pool_maxsize, pool_block)
+        now = self._clock()
+        with self._lock:
+            stale = self._pop_idle(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                kwargs: Dict[str, Any] = {
+                    "base_url": base_url,
+                    "token": token,
+                    "pool_connections": pool_connections or self.pool_connections,
+                    "pool_maxsize": pool_maxsize or self.pool_maxsize,
+                    "pool_block": self.pool_block if pool_block is None else pool_block,
+                }
+                if timeout is not None:
+                    kwargs["timeout"] = timeout
+                entry = _Entry(client=factory(**kwargs), sessions=None, last_used=now)
+                self._entries[key] = entry
+            entry.last_used = now
+            client = entry.client
+        for old in stale:
+            old.close()
+        return client
+
+    def session(self, name: Hashable, *, pool_maxsize: Optional[int] = None) -> Session:
+        """Return the calling thread's session for *name*.
+
+        Used by callers that need keep-alive connections but no client
+        object, such as :class:`icakad.ai.AI`.  Every caller using *name*
+        shares one :class:`ThreadSessions` (so one connection pool), with a
+        session per thread.  *pool_maxsize* overrides the registry default
+        when the pool is first created.
+        """
+        key = ("session", name)
+        now = self._clock()
+        with self._lock:
+            stale = self._pop_idle(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                sessions = ThreadSessions(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=pool_maxsize or self.pool_maxsize,
+                    pool_block=self.pool_block,
+                )
+                entry = _Entry(client=None, sessions=sessions, last_used=now)
+                self._entries[key] = entry
+            entry.last_used = now
+            sessions = entry.sessions
+        for old in stale:
+            old.close()
+        assert sessions is not None
+        return sessions.get()
+
+    def evict_idle(self) -> int:
+        """Close clients idle for longer than ``idle_timeout``; return how many."""
+        with self._lock:
+            stale = self._pop_idle(self._clock())
+        for entry in stale:
+            entry.close()
+        return len(stale)
+
+    def close_all(self) -> None:
+        """Close every pooled session and forget all cached clients."""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            entry.close()
+
+    def _pop_idle(self, now: float) -> List[_Entry]:
+        if self.idle_timeout is None:
+            return []
+        expired = [
+            key
+            for key, entry in self._entries.items()
+            if now - entry.last_used > self.idle_timeout
+        ]
+        return [self._entries.pop(key) for key in expired]
+
+
+_default_registry = ClientRegistry()
+
+
+def get_registry() -> ClientRegistry:
+    """Return the registry used by the module-level helpers."""
+    return _default_registry
+
+
+def configure_pool(**options: Any) -> None:
+    """Shortcut for ``get_registry().configure(**options)``."""
+    _default_registry.configure(**options)
+
+
+def close_all() -> None:
+    """Close all pooled clients held by the default registry."""
+    _default_registry.close_all()
+
+
+atexit.register(close_all)
@@ -0,0 +1,235 @@
+"""Process-wide, adaptive client-side rate limiting per worker origin."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_RECOVERY = 0.05
+WILDCARD = "*"
+
+__all__ = [
+    "TokenBucket",
+    "configure_rate_limits",
+    "get_rate_limiter",
+    "origin",
+    "parse_rate_limits",
+    "reset_rate_limits",
+]
+
+_Limit = Tuple[float, float]
+
+_lock = threading.Lock()
+_limits: Dict[str, _Limit] = {}
+_buckets: Dict[str, "TokenBucket"] = {}
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate adapts to throttling (AIMD).
+
+    Up to *burst* requests may go out back to back; after that callers are
+    paced at *rate* requests per second.  :meth:`on_throttle` (a ``429``)
+    halves the current rate, never below *min_rate*, and pauses the bucket
+    for the server's ``Retry-After``.  Each :meth:`on_success` adds back a
+    small fraction of the configured rate, so a bulk job settles just below
+    the limit the worker actually enforces instead of looping on errors.
+
+    Threads call :meth:`acquire`; coroutines call :meth:`acquire_async`,
+    which draws from the same tokens but waits with ``asyncio.sleep``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        *,
+        min_rate: Optional[float] = None,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        recovery: float = DEFAULT_RECOVERY,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        async_sleep: Optional[Callable[[float], Awaitable[Any]]] = None,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst) if burst is not None else max(1.0, float(rate))
+        self.min_rate = float(min_rate) if min_rate is not None else self.max_rate / 20
+        self.backoff_factor = backoff_factor
+        self.recovery = recovery
+        self.throttled = 0
+        self.waited = 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until *tokens* are available; return the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            delay = self._take(tokens, waited)
+            if delay is None:
+                return waited
+            self._sleep(delay)
+            waited += delay
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Like :meth:`acquire`, but wait without blocking the event loop."""
+        sleep = self._async_sleep
+        if sleep is None:
+            import asyncio
+
+            sleep = asyncio.sleep
+        waited = 0.0
+        while True:
+            delay = self._take(tokens, waited)
+            if delay is None:
+                return waited
+            await sleep(delay)
+            waited += delay
+
+    def _take(self, tokens: float, waited: float) -> Optional[float]:
+        """Take *tokens* and return ``None``, or return how long to wait first."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self.waited += waited
+                return None
+            return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take *tokens* if they are available right now."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self._paused_until or self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Record a ``429``: slow down and honour *retry_after* seconds."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate * self.backoff_factor)
+            self._tokens = 0.0
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+    def on_success(self) -> None:
+        """Record an accepted request: creep back towards the configured rate."""
+        if self.rate >= self.max_rate:
+            return
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+
+def origin(url: str) -> str:
+    """Return ``scheme://host[:port]`` of *url*, lower-cased (``"*"`` is kept).
+
+    Limits, buckets and :meth:`icakad.ai.AI.get_breaker` are keyed by it;
+    a bare host is taken as ``https``.
+    """
+    if url == WILDCARD:
+        return url
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+
+def parse_rate_limits(raw: Mapping[str, Any]) -> Dict[str, _Limit]:
+    """Normalise the ``rate_limits`` config section.
+
+    Keys are base URLs (only scheme and host matter) or ``"*"`` for every
+    other origin.  Values are a rate in requests per second or an object
+    with ``rate`` and optional ``burst``.
+    """
+    limits: Dict[str, _Limit] = {}
+    for key, value in raw.items():
+        if isinstance(value, Mapping):
+            rate = value.get("rate")
+            burst = value.get("burst")
+        else:
+            rate, burst = value, None
+        try:
+            rate = float(rate)  # type: ignore[arg-type]
+            burst = float(burst) if burst is not None else max(1.0, rate)
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f"Invalid rate limit for {key!r}: {value!r}") from exc
+        if rate <= 0 or burst <= 0:
+            raise ValueError(f"Rate limit for {key!r} must be positive")
+        limits[origin(str(key))] = (rate, burst)
+    return limits
+
+
+def configure_rate_limits(raw: Mapping[str, Any], *, replace: bool = False) -> None:
+    """Install per-origin limits shared by every client in the process.
+
+    Origins whose limit is unchanged keep their bucket (and its adapted
+    rate).  With *replace*, origins missing from *raw* lose their limit.
+    """
+    limits = parse_rate_limits(raw)
+    with _lock:
+        if replace:
+            for host in set(_limits) - set(limits):
+                del _limits[host]
+                _drop_buckets(host)
+        for host, limit in limits.items():
+            if _limits.get(host) != limit:
+                _limits[host] = limit
+                _drop_buckets(host)
+
+
+def _drop_buckets(key: str) -> None:
+    if key != WILDCARD:
+        _buckets.pop(key, None)
+        return
+    # Buckets created from the wildcard limit are keyed by their own origin.
+    for host in [host for host in _buckets if host not in _limits]:
+        del _buckets[host]
+
+
+def reset_rate_limits() -> None:
+    """Remove every configured limit (mainly for tests)."""
+    with _lock:
+        _limits.clear()
+        _buckets.clear()
+
+
+def get_rate_limiter(url: str) -> Optional[TokenBucket]:
+    """Return the shared bucket for *url*'s origin, or ``None`` if unlimited."""
+    if not _limits:
+        return None
+    host = origin(url)
+    bucket = _buckets.get(host)
+    if bucket is not None:
+        return bucket
+    with _lock:
+        key = host if host in _limits else WILDCARD
+        limit = _limits.get(key)
+        if limit is None:
+            return None
+        bucket = _buckets.get(host)
+        if bucket is None:
+            # Each origin gets its own bucket, even when sharing the "*" limit.
+            bucket = _buckets[host] = TokenBucket(limit[0], limit[1])
+        return bucket
@@ -2,19 +2,106 @@
 
 from __future__ import annotations
 
+import csv
+import json
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from functools import partial
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    BinaryIO,
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-import requests
-from requests import Response, Session
+from .common.concurrency import ordered_map
+from .common.jsonstream import iter_array_items
+from .common.singleflight import FlightStats, SingleFlight
+from .pool import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE, ThreadSessions
+from .transport import CircuitBreaker, RetryPolicy, Timeout, Transport
+
+if TYPE_CHECKING:  # pragma: no cover
+    from requests import Response, Session
+
+    from .index import SlugIndex
+    from .ratelimit import TokenBucket
 
 DEFAULT_TIMEOUT = 10
+DEFAULT_BULK_WORKERS = 8
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_PAGE_SIZE = 1000
+LISTING_KEYS = ("items", "list")
+
+#: Четения, при които едновременните еднакви заявки споделят един отговор.
+COALESCED_READS: FrozenSet[str] = frozenset({"list_links"})
+
+BULK_OPERATIONS = ("add", "update", "delete")
+_OPERATION_ALIASES = {"edit": "update", "set": "add", "remove": "delete"}
+
+R = TypeVar("R")
+#: Къде се записва суровото тяло на отговора (път или двоичен файлов обект).
+Destination = Union[str, Path, BinaryIO]
 
 
 class ShortURLError(RuntimeError):
     """Фатална грешка, върната от shorturl API."""
 
 
+def _raw_kwargs(save_raw: Optional[Destination]) -> Dict[str, Any]:
+    # Raw responses are checked by Transport.save, which also closes them.
+    return {"check": False, "stream": True} if save_raw is not None else {}
+
+
+def _normalize_item(item: Mapping[str, object]) -> Optional[Tuple[str, str]]:
+    slug = (
+        item.get("slug")
+        or item.get("key")
+        or item.get("id")
+        or item.get("name")
+    )
+    url = item.get("url") or item.get("value")
+    if isinstance(slug, str) and isinstance(url, str):
+        return slug, url
+    return None
+
+
+def _extract_cursor(payload: object) -> Optional[str]:
+    """Връща курсора за следващата страница или ``None`` при последна страница."""
+    if not isinstance(payload, dict) or payload.get("list_complete") is True:
+        return None
+    info = payload.get("result_info")
+    cursor = (
+        payload.get("cursor")
+        or payload.get("next_cursor")
+        or (info.get("cursor") if isinstance(info, dict) else None)
+    )
+    return cursor if isinstance(cursor, str) and cursor else None
+
+
+def _json_object(response: Any) -> Dict[str, object]:
+    """Декодира JSON обект от ``requests`` или ``httpx`` отговор."""
+    try:
+        data = response.json()
+    except ValueError as exc:
+        raise ShortURLError("ShortURL API returned invalid JSON") from exc
+    if not isinstance(data, dict):
+        raise ShortURLError("ShortURL API returned an unexpected payload")
+    return data
+
+
 def _extract_items(payload: object) -> List[Dict[str, object]]:
     if isinstance(payload, dict):
         items = payload.get("items") or payload.get("list")
@@ -26,19 +113,182 @@ def _extract_items(payload: object) -> List[Dict[str, object]]:
     return []
 
 
+@dataclass(frozen=True)
+class BulkOperation:
+    """Една add/update/delete операция за :meth:`ShortURLClient.bulk`."""
+
+    op: str
+    slug: str
+    url: Optional[str] = None
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any], *, default_op: str = "add") -> "BulkOperation":
+        op = str(data.get("op") or data.get("action") or default_op).strip().lower()
+        op = _OPERATION_ALIASES.get(op, op)
+        if op not in BULK_OPERATIONS:
+            raise ValueError(f"Unsupported operation: {op!r}")
+        slug = data.get("slug")
+        if not isinstance(slug, str) or not slug.strip():
+            raise ValueError("Each operation requires a non-empty 'slug'")
+        url = data.get("url") or None
+        if op != "delete" and not isinstance(url, str):
+            raise ValueError(f"Operation {op!r} for {slug!r} requires a 'url'")
+        return cls(op=op, slug=slug.strip(), url=url)
+
+
+@dataclass
+class BulkResult:
+    """Резултат от една операция в пакетно изпълнение."""
+
+    index: int
+    op: str
+    slug: str
+    ok: bool
+    response: Optional[Dict[str, object]] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"index": self.index, "op": self.op, "slug": self.slug, "ok": self.ok}
+        if self.ok:
+            data["response"] = self.response
+        else:
+            data["error"] = self.error
+        return data
+
+
+@dataclass
+class LinkPage:
+    """Една страница от списъка с къси линкове."""
+
+    links: Dict[str, str]
+    cursor: Optional[str] = None
+    etag: Optional[str] = None
+
+    @property
+    def is_last(self) -> bool:
+        return self.cursor is None
+
+
+def read_bulk_operations(
+    source: Union[str, Path, Iterable[str]],
+    *,
+    fmt: Optional[str] = None,
+    default_op: str = "add",
+) -> Iterator[Union[BulkOperation, ValueError]]:
+    """Чете операции от CSV или JSONL файл (или итерируеми редове).
+
+    CSV файловете трябва да имат заглавен ред с колони ``slug``, ``url`` и по
+    желание ``op``. Невалидните редове се връщат като :class:`ValueError`,
+    за да може пакетът да продължи.
+    """
+    if isinstance(source, (str, Path)):
+        path = Path(source).expanduser()
+        if fmt is None:
+            fmt = "csv" if path.suffix.lower() in (".csv", ".tsv") else "jsonl"
+        with path.open("r", encoding="utf-8", newline="") as fh:
+            delimiter = "\t" if path.suffix.lower() == ".tsv" else ","
+            yield from _parse_operations(fh, fmt, default_op, delimiter)
+    else:
+        yield from _parse_operations(source, fmt or "jsonl", default_op, ",")
+
+
+def _parse_operations(
+    lines: Iterable[str],
+    fmt: str,
+    default_op: str,
+    delimiter: str,
+) -> Iterator[Union[BulkOperation, ValueError]]:
+    if fmt == "csv":
+        rows: Iterable[Any] = csv.DictReader(lines, delimiter=delimiter)
+    elif fmt == "jsonl":
+        rows = (line for line in lines if line.strip())
+    else:
+        raise ValueError(f"Unsupported bulk input format: {fmt!r}")
+
+    for row in rows:
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+                if not isinstance(row, dict):
+                    raise ValueError("Each JSONL line must be an object")
+            yield BulkOperation.from_mapping(row, default_op=default_op)
+        except ValueError as exc:
+            yield exc
+
+
+def _coerce_operation(
+    operation: Union[BulkOperation, Mapping[str, Any], Exception],
+) -> Union[BulkOperation, Exception]:
+    if isinstance(operation, (BulkOperation, Exception)):
+        return operation
+    try:
+        return BulkOperation.from_mapping(operation)
+    except ValueError as exc:
+        return exc
+
+
 @dataclass
 class ShortURLClient:
-    """Лек HTTP клиент за CRUD операции върху shorturl работника."""
+    """Лек HTTP клиент за CRUD операции върху shorturl работника.
+
+    Един клиент може да се ползва едновременно от много нишки. Без подадена
+    ``session`` всяка нишка получава своя сесия, а всички споделят един пул
+    от ``pool_maxsize`` връзки (вж. :class:`icakad.pool.ThreadSessions`);
+    дръжте го поне колкото броя нишки. Подадена ``session`` се споделя от
+    всички нишки без промяна.
+    """
 
     base_url: str
     token: Optional[str] = None
     timeout: int = DEFAULT_TIMEOUT
     session: Optional[Session] = None
-    _session: Session = field(init=False, repr=False)
+    index: Optional[SlugIndex] = None
+    connect_timeout: Optional[float] = None
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    breaker: Optional[CircuitBreaker] = field(default_factory=CircuitBreaker)
+    rate_limiter: Optional[TokenBucket] = None
+    coalesce: Collection[str] = COALESCED_READS
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    pool_block: bool = False
+    _sessions: Optional[ThreadSessions] = field(default=None, init=False, repr=False)
+    _transport: Transport = field(init=False, repr=False)
+    _flights: SingleFlight = field(default_factory=SingleFlight, init=False, repr=False)
 
     def __post_init__(self) -> None:
         self.base_url = self.base_url.rstrip("/")
-        self._session = self.session or requests.Session()
+        self.coalesce = frozenset(self.coalesce)
+        unknown = self.coalesce - COALESCED_READS
+        if unknown:
+            raise ValueError(f"Cannot coalesce {sorted(unknown)}; supported: {sorted(COALESCED_READS)}")
+        if self.session is None:
+            self._sessions = ThreadSessions(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize,
+                pool_block=self.pool_block,
+            )
+        self._transport = Transport(
+            self.session,
+            session_factory=self._sessions.get if self._sessions is not None else None,
+            timeout=Timeout(read=self.timeout, connect=self.connect_timeout),
+            retry=self.retry,
+            breaker=self.breaker,
+            limiter=self.rate_limiter,
+            error=ShortURLError,
+        )
+
+    @property
+    def _session(self) -> Session:
+        """Сесията на текущата нишка (или подадената ``session``)."""
+        if self._sessions is None:
+            assert self.session is not None
+            return self.session
+        return self._sessions.get()
+
+    def close(self) -> None:
+        """Затваря сесиите и пула, ако са създадени от клиента."""
+        if self._sessions is not None:
+            self._sessions.close()
 
     # ---------------------------------------------------------------- utils
     def _headers(self) -> Dict[str, str]:
@@ -47,62 +297,333 @@ class ShortURLClient:
             headers["Authorization"] = f"Bearer {self.token}"
         return headers
 
-    def _request(self, method: str, path: str, **kwargs: object) -> Response:
-        url = f"{self.base_url}{path}"
-        session_method = getattr(self._session, method)
-        response = session_method(
-            url,
-            headers=self._headers(),
-            timeout=self.timeout,
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        extra_headers: Optional[Dict[str, str]] = None,
+        idempotent: Optional[bool] = None,
+        **kwargs: object,
+    ) -> Response:
+        headers = self._headers()
+        if extra_headers:
+            headers.update(extra_headers)
+        return self._transport.request(
+            method,
+            f"{self.base_url}{path}",
+            idempotent=idempotent,
+            headers=headers,
             **kwargs,
         )
-        try:
-            response.raise_for_status()
-        except requests.HTTPError as exc:
-            raise ShortURLError(f"{response.status_code}: {response.text}") from exc
-        return response
+
+    def _coalesced(self, method: str, key: Tuple[Hashable, ...], func: Callable[[], R]) -> R:
+        if method not in self.coalesce:
+            return func()
+        return self._flights.do((method, *key), func)
+
+    @property
+    def coalesce_stats(self) -> FlightStats:
+        """Броячи колко извиквания са споделили чужда заявка в движение."""
+        return self._flights.stats
+
+    def _result(
+        self,
+        response: Response,
+        save_raw: Optional[Destination],
+        validate: bool,
+    ) -> Dict[str, object]:
+        if save_raw is None:
+            return self._json(response)
+        return self._transport.save(response, save_raw, validate=validate)
 
     # ----------------------------------------------------------- API methods
-    def add_link(self, slug: str, url: str) -> Dict[str, object]:
+    #
+    # With *save_raw* the response body is streamed there byte for byte
+    # (never decoded or re-serialised) and only the ``{"bytes", "path"}``
+    # summary is returned.  The status is still checked; *validate* also
+    # parses the JSON incrementally while it is written.
+    def add_link(
+        self,
+        slug: str,
+        url: str,
+        *,
+        save_raw: Optional[Destination] = None,
+        validate: bool = False,
+    ) -> Dict[str, object]:
         payload = {"slug": slug, "url": url}
-        response = self._request("post", "/api", json=payload)
-        return self._json(response)
+        # Setting a slug is safe to repeat, so transient failures are retried.
+        response = self._request("post", "/api", json=payload, idempotent=True, **_raw_kwargs(save_raw))
+        data = self._result(response, save_raw, validate)
+        if self.index is not None:
+            self.index.upsert(slug, url)
+        return data
 
-    def edit_link(self, slug: str, url: str) -> Dict[str, object]:
+    def edit_link(
+        self,
+        slug: str,
+        url: str,
+        *,
+        save_raw: Optional[Destination] = None,
+        validate: bool = False,
+    ) -> Dict[str, object]:
         payload = {"slug": slug, "url": url}
-        response = self._request("post", f"/api/{slug}", json=payload)
-        return self._json(response)
+        response = self._request(
+            "post", f"/api/{slug}", json=payload, idempotent=True, **_raw_kwargs(save_raw)
+        )
+        data = self._result(response, save_raw, validate)
+        if self.index is not None:
+            self.index.upsert(slug, url)
+        return data
+
+    def delete_link(
+        self,
+        slug: str,
+        *,
+        save_raw: Optional[Destination] = None,
+        validate: bool = False,
+    ) -> Dict[str, object]:
+        response = self._request("delete", f"/api/{slug}", **_raw_kwargs(save_raw))
+        data = self._result(response, save_raw, validate)
+        if self.index is not None:
+            self.index.delete(slug)
+        return data
+
+    def bulk(
+        self,
+        operations: Iterable[Union[BulkOperation, Mapping[str, Any], Exception]],
+        *,
+        max_workers: int = DEFAULT_BULK_WORKERS,
+    ) -> List[BulkResult]:
+        """Изпълнява много операции паралелно и връща резултат за всяка от тях."""
+        return list(self.iter_bulk(operations, max_workers=max_workers))
+
+    def iter_bulk(
+        self,
+        operations: Iterable[Union[BulkOperation, Mapping[str, Any], Exception]],
+        *,
+        max_workers: int = DEFAULT_BULK_WORKERS,
+    ) -> Iterator[BulkResult]:
+        """Като :meth:`bulk`, но връща резултатите поточно, в реда на входа.
+
+        Всички заявки минават през сесията на клиента; за пълен паралелизъм
+        пулът ѝ трябва да е поне ``max_workers`` връзки.
+        """
+        prepared = enumerate(_coerce_operation(operation) for operation in operations)
+        outcomes = ordered_map(self._apply_operation, prepared, max_workers=max_workers)
+        for (index, operation), response, error in outcomes:
+            op = operation.op if isinstance(operation, BulkOperation) else "invalid"
+            slug = operation.slug if isinstance(operation, BulkOperation) else ""
+            if error is None:
+                yield BulkResult(index=index, op=op, slug=slug, ok=True, response=response)
+            else:
+                yield BulkResult(index=index, op=op, slug=slug, ok=False, error=str(error))
+
+    def _apply_operation(self, indexed: Any) -> Dict[str, object]:
+        _, operation = indexed
+        if isinstance(operation, Exception):
+            raise operation
+        if operation.op == "delete":
+            return self.delete_link(operation.slug)
+        if operation.op == "update":
+            return self.edit_link(operation.slug, operation.url or "")
+        return self.add_link(operation.slug, operation.url or "")
+
+    def save_links(
+        self,
+        destination: Destination,
+        *,
+        limit: Optional[int] = None,
+        validate: bool = False,
+    ) -> Dict[str, object]:
+        """Записва суровия отговор на ``GET /api`` в *destination*.
+
+        Тялото се записва точно както го е върнал работникът, без парсване.
+        Това е една заявка: ако работникът страницира, файлът съдържа само
+        първата страница заедно с нейния курсор. Локалният индекс не се
+        обновява.
+        """
+        params = {"limit": int(limit)} if limit is not None else None
+        response = self._request("get", "/api", params=params, **_raw_kwargs(destination))
+        return self._result(response, destination, validate)
+
+    def list_links(self, *, page_size: Optional[int] = None) -> Dict[str, str]:
+        """Връща всички линкове, като следва курсорите за продължение.
+
+        С *page_size* списъкът се тегли на страници с такъв ``limit``.
+        Едновременни извиквания от няколко нишки споделят една заявка и
+        получават един и същ речник (вж. ``coalesce``), затова не го
+        променяйте на място.
+        """
+        return self._coalesced("list_links", (page_size,), partial(self._list_links, page_size))
+
+    def _list_links(self, page_size: Optional[int]) -> Dict[str, str]:
+        first = self.list_page(limit=page_size)
+        links = self._collect(first, page_size=page_size)
+        if self.index is not None:
+            self.index.replace_all(links, etag=first.etag if first.is_last else None)
+        return links
+
+    def list_page(self, *, cursor: Optional[str] = None, limit: Optional[int] = None) -> LinkPage:
+        """Тегли една страница от списъка (``GET /api?cursor=…&limit=…``)."""
+        params: Dict[str, object] = {}
+        if cursor:
+            params["cursor"] = cursor
+        if limit is not None:
+            params["limit"] = int(limit)
+        response = self._request("get", "/api", params=params or None)
+        return self._page_from_response(response)
+
+    def iter_pages(
+        self,
+        *,
+        page_size: Optional[int] = DEFAULT_PAGE_SIZE,
+        prefetch: bool = True,
+    ) -> Iterator[LinkPage]:
+        """Обхожда списъка страница по страница, следвайки курсорите.
+
+        При *prefetch* следващата страница се тегли във фонов поток, докато
+        извикващият обработва текущата.
+        """
+        first = self.list_page(limit=page_size)
+        return self._pages_from(first, page_size=page_size, prefetch=prefetch)
 
-    def delete_link(self, slug: str) -> Dict[str, object]:
-        response = self._request("delete", f"/api/{slug}")
-        return self._json(response)
+    def _pages_from(
+        self,
+        page: LinkPage,
+        *,
+        page_size: Optional[int],
+        prefetch: bool,
+    ) -> Iterator[LinkPage]:
+        seen = {page.cursor}
+        if page.is_last or not prefetch:
+            yield page
+            while page.cursor is not None:
+                page = self._next_page(page, seen, page_size)
+                yield page
+            return
 
-    def list_links(self) -> Dict[str, str]:
-        response = self._request("get", "/api")
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            while True:
+                upcoming = None
+                if page.cursor is not None:
+                    upcoming = pool.submit(self._next_page, page, seen, page_size)
+                yield page
+                if upcoming is None:
+                    return
+                page = upcoming.result()
+
+    def _next_page(
+        self,
+        page: LinkPage,
+        seen: Set[Optional[str]],
+        page_size: Optional[int],
+    ) -> LinkPage:
+        following = self.list_page(cursor=page.cursor, limit=page_size)
+        if following.cursor in seen:
+            # A repeated cursor would loop forever; treat it as the end.
+            following.cursor = None
+        seen.add(following.cursor)
+        return following
+
+    def _collect(self, first: LinkPage, *, page_size: Optional[int]) -> Dict[str, str]:
+        links: Dict[str, str] = {}
+        for page in self._pages_from(first, page_size=page_size, prefetch=False):
+            links.update(page.links)
+        return links
+
+    def iter_links(self, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[str, str]]:
+        """Поточно връща двойки ``(slug, url)`` от списъка на работника.
+
+        Всяка страница се чете на парчета и се парсва инкрементално, а
+        курсорите за продължение се следват както в :meth:`list_links`,
+        така че паметта не зависи от размера на списъка.
+        """
+        cursor: Optional[str] = None
+        seen: Set[Optional[str]] = {None}
+        while True:
+            if cursor:
+                response = self._request("get", "/api", params={"cursor": cursor}, stream=True)
+            else:
+                response = self._request("get", "/api", stream=True)
+            members: Dict[str, object] = {}
+            try:
+                items = iter_array_items(response.iter_content(chunk_size), LISTING_KEYS, members)
+                for item in items:
+                    if isinstance(item, dict):
+                        pair = _normalize_item(item)
+                        if pair is not None:
+                            yield pair
+            except ValueError as exc:
+                raise ShortURLError("ShortURL API returned invalid JSON") from exc
+            finally:
+                response.close()
+            cursor = _extract_cursor(members)
+            # A repeated cursor would loop forever; treat it as the end.
+            if cursor in seen:
+                return
+            seen.add(cursor)
+
+    # ------------------------------------------------------------ slug index
+    def refresh_index(self, *, force: bool = False) -> bool:
+        """Опреснява локалния индекс, ако е изтекъл (или при *force*).
+
+        Когато индексът пази ETag, заявката е условна (``If-None-Match``) и
+        отговор ``304`` само удължава валидността му. Връща ``True``, ако
+        е направена заявка към работника.
+        """
+        if self.index is None:
+            raise ShortURLError("No slug index is attached to this client")
+        if not force and self.index.is_fresh():
+            return False
+        etag = self.index.etag
+        extra = {"If-None-Match": etag} if etag else None
+        response = self._request("get", "/api", extra_headers=extra)
+        if response.status_code == 304:
+            self.index.touch()
+        else:
+            first = self._page_from_response(response)
+            links = self._collect(first, page_size=None)
+            self.index.replace_all(links, etag=first.etag if first.is_last else None)
+        return True
+
+    def get_link(self, slug: str) -> Optional[str]:
+        """Връща URL адреса за *slug* от индекса (или ``None``)."""
+        if self.index is None:
+            return self.list_links().get(slug)
+        self.refresh_index()
+        return self.index.get(slug)
+
+    def exists(self, slug: str) -> bool:
+        """Проверява дали *slug* съществува, без да тегли целия списък."""
+        return self.get_link(slug) is not None
+
+    # --------------------------------------------------------------- helpers
+    def _page_from_response(self, response: Response) -> LinkPage:
+        payload = self._payload(response)
+        headers = getattr(response, "headers", None)
+        etag = headers.get("ETag") if isinstance(headers, Mapping) else None
+        return LinkPage(
+            links=self._links_from_payload(payload),
+            cursor=_extract_cursor(payload),
+            etag=etag,
+        )
+
+    def _payload(self, response: Response) -> object:
         try:
-            payload = response.json()
+            return response.json()
         except ValueError as exc:
             raise ShortURLError("ShortURL API returned invalid JSON") from exc
 
+    def _links_from_payload(self, payload: object) -> Dict[str, str]:
         links: Dict[str, str] = {}
         for item in _extract_items(payload):
-            slug = (
-                item.get("slug")
-                or item.get("key")
-                or item.get("id")
-                or item.get("name")
-            )
-            url = item.get("url") or item.get("value")
-            if isinstance(slug, str) and isinstance(url, str):
-                links[slug] = url
+            pair = _normalize_item(item)
+            if pair is not None:
+                links[pair[0]] = pair[1]
         return links
 
-    # --------------------------------------------------------------- helpers
     def _json(self, response: Response) -> Dict[str, object]:
-        try:
-            data = response.json()
-        except ValueError as exc:
-            raise ShortURLError("ShortURL API returned invalid JSON") from exc
-        if not isinstance(data, dict):
-            raise ShortURLError("ShortURL API returned an unexpected payload")
-        return data
+        return _json_object(response)
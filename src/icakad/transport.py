@@ -0,0 +1,486 @@
+"""Shared HTTP transport: per-phase timeouts, retries and a circuit breaker.
+
+Every client (:class:`~icakad.shorturl.ShortURLClient`,
+:class:`~icakad.paste.PasteClient` and :class:`~icakad.ai.AI`) sends its
+requests through a :class:`Transport`, which
+
+* passes ``(connect, read)`` timeouts to ``requests`` when a connect timeout
+  is configured (a single number otherwise);
+* retries idempotent calls on connection errors and on ``429``/``502``/
+  ``503``/``504`` with jittered exponential backoff, honouring
+  ``Retry-After``;
+* paces requests through the origin's shared :class:`~icakad.ratelimit.TokenBucket`
+  (when limits are configured) and feeds ``429`` responses back into it;
+* fails fast through a :class:`CircuitBreaker` while the worker keeps
+  failing;
+* maps HTTP error responses to the client's exception type.
+
+The asyncio clients in :mod:`icakad.aio` go through :func:`send_async` and
+:func:`check_response`, which apply the same retry, rate-limit, breaker
+and error-mapping rules to ``httpx`` responses.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Awaitable, BinaryIO, Callable, Dict, FrozenSet, Optional, Tuple, Type, Union
+from urllib.parse import urlsplit
+
+from .common import save_chunks
+from .ratelimit import get_rate_limiter
+
+if TYPE_CHECKING:  # pragma: no cover
+    from requests import Response, Session
+
+    from .ratelimit import TokenBucket
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "NO_RETRY",
+    "RetryPolicy",
+    "Timeout",
+    "Transport",
+    "check_response",
+    "send_async",
+]
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without touching the network while a circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class Timeout:
+    """Connect and read timeouts in seconds (``connect=None`` reuses *read*)."""
+
+    read: Optional[float]
+    connect: Optional[float] = None
+
+    def for_requests(self) -> Union[None, float, Tuple[Optional[float], Optional[float]]]:
+        if self.connect is None:
+            return self.read
+        return (self.connect, self.read)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a request.
+
+    *attempts* counts the first try, so ``attempts=1`` disables retries.
+    Backoff before retry *n* is uniformly drawn from
+    ``[0, min(max_backoff, backoff * 2 ** n)]`` ("full jitter") unless the
+    response carries a ``Retry-After`` of at most *max_retry_after* seconds.
+    """
+
+    attempts: int = 3
+    backoff: float = 0.5
+    max_backoff: float = 10.0
+    statuses: FrozenSet[int] = RETRY_STATUSES
+    methods: FrozenSet[str] = IDEMPOTENT_METHODS
+    max_retry_after: float = 60.0
+
+    def is_idempotent(self, method: str) -> bool:
+        return method.upper() in self.methods
+
+    def backoff_delay(self, retry: int, rng: Callable[[float, float], float] = random.uniform) -> float:
+        ceiling = min(self.max_backoff, self.backoff * (2 ** retry))
+        return rng(0.0, ceiling)
+
+    def retry_after(self, response: Any) -> Optional[float]:
+        """Seconds requested by the ``Retry-After`` header, if any."""
+        headers = getattr(response, "headers", None) or {}
+        value = headers.get("Retry-After") if hasattr(headers, "get") else None
+        if value is None:
+            return None
+        value = str(value).strip()
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, when.timestamp() - time.time())
+
+
+NO_RETRY = RetryPolicy(attempts=1)
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker.
+
+    After *failure_threshold* failures in a row the circuit opens and calls
+    fail immediately for *reset_timeout* seconds.  Then a single trial call
+    is let through ("half-open"): success closes the circuit, failure opens
+    it again.
+    """
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def remaining(self) -> float:
+        """Seconds until the next trial call is allowed (0 when closed)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._clock() - self._opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial_running = False
+
+    def release(self) -> None:
+        """End a trial call that neither succeeded nor failed (e.g. a client bug)."""
+        with self._lock:
+            self._trial_running = False
+
+
+class Transport:
+    """Sends requests through a ``requests`` session with the shared policies.
+
+    Pass either a *session* or a *session_factory* returning one, so callers
+    with a lazily shared session (like :class:`~icakad.ai.AI`) can defer
+    the lookup.  Without an explicit *limiter* the process-wide limit for
+    the request's origin applies (see :func:`~icakad.ratelimit.configure_rate_limits`).
+    HTTP errors raise *error* (``"<status>: <body>"``); with
+    ``error=None`` the original :class:`requests.HTTPError` propagates.
+    Transport-level failures (:class:`requests.ConnectionError`,
+    :class:`requests.Timeout`) are re-raised unchanged once retries run out.
+    """
+
+    def __init__(
+        self,
+        session: Optional[Session] = None,
+        *,
+        session_factory: Optional[Callable[[], Session]] = None,
+        timeout: Timeout,
+        retry: RetryPolicy = RetryPolicy(),
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[TokenBucket] = None,
+        error: Optional[Type[Exception]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if session is None and session_factory is None:
+            raise ValueError("Transport needs a session or a session_factory")
+        self._session = session
+        self._session_factory = session_factory
+        self.timeout = timeout
+        self.retry = retry
+        self.breaker = breaker
+        self.limiter = limiter
+        self.error = error
+        self._sleep = sleep
+
+    @property
+    def session(self) -> Session:
+        if self._session is not None:
+            return self._session
+        assert self._session_factory is not None
+        return self._session_factory()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        idempotent: Optional[bool] = None,
+        retries: bool = True,
+        check: bool = True,
+        session: Optional[Session] = None,
+        timeout: Optional[Timeout] = None,
+        **kwargs: Any,
+    ) -> Response:
+        """Send one logical request and return the final response.
+
+        *idempotent* overrides the policy's method list (``POST`` calls that
+        merely set a value can opt in).  Non-idempotent calls are retried
+        only on ``429`` and connect failures, where the server cannot have
+        acted on them.  ``retries=False`` disables retrying, e.g. for bodies
+        that cannot be replayed.  With ``check=False`` error responses are
+        returned instead of raised.
+        """
+        import requests
+
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow():
+            self._circuit_open(url, breaker)
+
+        policy = self.retry if retries else NO_RETRY
+        if idempotent is None:
+            idempotent = policy.is_idempotent(method)
+        sender = getattr(session if session is not None else self.session, method.lower())
+        request_timeout = (timeout or self.timeout).for_requests()
+        limiter = self.limiter if self.limiter is not None else get_rate_limiter(url)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            last_try = attempt >= policy.attempts
+            if limiter is not None:
+                limiter.acquire()
+            try:
+                response = sender(url, timeout=request_timeout, **kwargs)
+            except requests.ConnectionError as exc:
+                if breaker is not None:
+                    breaker.record_failure()
+                # A failed connect never reached the server; anything else only
+                # may be retried when repeating the call is harmless.
+                safe = idempotent or isinstance(exc, requests.ConnectTimeout) or _not_sent(exc)
+                if last_try or not safe:
+                    raise
+                self._sleep(policy.backoff_delay(attempt - 1))
+                continue
+            except requests.Timeout:
+                if breaker is not None:
+                    breaker.record_failure()
+                if last_try or not idempotent:
+                    raise
+                self._sleep(policy.backoff_delay(attempt - 1))
+                continue
+            except BaseException:
+                # Anything else says nothing about the worker's health, but a
+                # half-open trial must not stay claimed forever.
+                if breaker is not None:
+                    breaker.release()
+                raise
+
+            status = getattr(response, "status_code", 200)
+            if not isinstance(status, int):
+                status = 200
+            _record_response(status, response, policy, breaker, limiter)
+            delay = _retry_delay(policy, response, status, attempt, idempotent)
+            if delay is not None:
+                _close(response)
+                self._sleep(delay)
+                continue
+
+            if check:
+                self.check(response)
+            return response
+
+    def check(self, response: Response) -> Response:
+        """Raise the configured error for HTTP error responses."""
+        return check_response(response, self.error)
+
+    def save(
+        self,
+        response: Response,
+        destination: Union[str, Path, BinaryIO],
+        *,
+        validate: bool = False,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Dict[str, Any]:
+        """Check *response* and stream its body bytes to *destination* unchanged.
+
+        Meant for ``stream=True`` responses fetched with ``check=False``: the
+        body is never decoded or re-serialised.  With *validate* the bytes
+        are also parsed as JSON while they are written (one value at a time,
+        see :func:`~icakad.common.jsonstream.validate_json`); invalid JSON
+        raises *error* and leaves no file behind.  The response is closed
+        either way.  Returns the :func:`~icakad.common.save_chunks` summary.
+        """
+        try:
+            self.check(response)
+            chunks = response.iter_content(chunk_size)
+            if not validate:
+                return save_chunks(chunks, destination)
+            from .common.jsonstream import validate_json
+
+            try:
+                return save_chunks(chunks, destination, consume=validate_json)
+            except ValueError as exc:
+                if self.error is None:
+                    raise
+                raise self.error(f"Response is not valid JSON: {exc}") from exc
+        finally:
+            _close(response)
+
+    def _circuit_open(self, url: str, breaker: CircuitBreaker) -> None:
+        raise _circuit_open_error(url, breaker, self.error)
+
+
+async def send_async(
+    send: Callable[[], Awaitable[Any]],
+    url: str,
+    *,
+    idempotent: bool,
+    retry: RetryPolicy = RetryPolicy(),
+    breaker: Optional[CircuitBreaker] = None,
+    limiter: Optional[TokenBucket] = None,
+    error: Optional[Type[Exception]] = None,
+) -> Any:
+    """Await ``send()`` (an ``httpx`` call) with the rules of :meth:`Transport.request`.
+
+    Each attempt passes *breaker* and takes a token from *limiter* (default:
+    the shared bucket for *url*'s origin) without blocking the event loop;
+    ``5xx`` responses and network errors count as breaker failures and
+    ``429`` is fed back to the limiter.  Statuses in ``retry.statuses`` are
+    retried when *idempotent* (a ``429`` always), waiting for
+    ``Retry-After`` or a jittered backoff; network errors only when
+    *idempotent* or the connection was never made.  The last response is
+    returned unchecked (see :func:`check_response`).
+    """
+    import asyncio
+
+    import httpx
+
+    if breaker is not None and not breaker.allow():
+        raise _circuit_open_error(url, breaker, error)
+    if limiter is None:
+        limiter = get_rate_limiter(url)
+    attempt = 0
+    while True:
+        attempt += 1
+        last_try = attempt >= retry.attempts
+        if limiter is not None:
+            await limiter.acquire_async()
+        try:
+            response = await send()
+        except (httpx.TimeoutException, httpx.NetworkError) as exc:
+            if breaker is not None:
+                breaker.record_failure()
+            safe = idempotent or isinstance(exc, (httpx.ConnectError, httpx.ConnectTimeout))
+            if last_try or not safe:
+                raise
+            await asyncio.sleep(retry.backoff_delay(attempt - 1))
+            continue
+        except BaseException:
+            if breaker is not None:
+                breaker.release()
+            raise
+
+        status = response.status_code
+        _record_response(status, response, retry, breaker, limiter)
+        delay = _retry_delay(retry, response, status, attempt, idempotent)
+        if delay is not None:
+            await response.aclose()
+            await asyncio.sleep(delay)
+            continue
+        return response
+
+
+def check_response(response: Any, error: Optional[Type[Exception]] = None) -> Any:
+    """Raise for an error *response* from ``requests`` or ``httpx``.
+
+    With *error* the exception is ``error("<status>: <body or reason>")``
+    (see :func:`error_message`); without it the HTTP library's own error
+    propagates.  Other responses are returned unchanged.
+    """
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int) and status < 400:
+        return response
+    try:
+        response.raise_for_status()
+    except Exception as exc:  # requests.HTTPError or httpx.HTTPStatusError
+        if error is None:
+            raise
+        raise error(error_message(response)) from exc
+    return response
+
+
+def error_message(response: Any) -> str:
+    """Format an error response as ``"<status>: <body or reason>"``."""
+    body = (getattr(response, "text", "") or "").strip()
+    if body:
+        return f"{response.status_code}: {body}"
+    reason = getattr(response, "reason", None) or getattr(response, "reason_phrase", "")
+    return f"{response.status_code}: {reason}"
+
+
+def _circuit_open_error(url: str, breaker: CircuitBreaker, error: Optional[Type[Exception]]) -> Exception:
+    host = urlsplit(url).netloc or url
+    message = f"Circuit open for {host}; retry in {breaker.remaining():.1f}s"
+    return CircuitOpenError(message) if error is None else error(message)
+
+
+def _record_response(
+    status: int,
+    response: Any,
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker],
+    limiter: Optional[TokenBucket],
+) -> None:
+    # A 429 means the worker is healthy but busy; Retry-After and the rate
+    # limiter handle that, so it must not open the circuit.
+    if breaker is not None:
+        if status >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    if limiter is not None:
+        if status == 429:
+            limiter.on_throttle(policy.retry_after(response))
+        elif status < 400:
+            limiter.on_success()
+
+
+def _retry_delay(policy: RetryPolicy, response: Any, status: int, attempt: int, idempotent: bool) -> Optional[float]:
+    """Seconds to wait before retrying after *response*, or ``None`` to stop."""
+    if attempt >= policy.attempts or status not in policy.statuses or not (idempotent or status == 429):
+        return None
+    delay = policy.retry_after(response)
+    if delay is None:
+        delay = policy.backoff_delay(attempt - 1)
+    return delay if delay <= policy.max_retry_after else None
+
+
+def _not_sent(exc: Exception) -> bool:
+    # urllib3 wraps "could not connect" failures in NewConnectionError.
+    text = repr(exc)
+    return "NewConnectionError" in text or "NameResolutionError" in text
+
+
+def _close(response: Any) -> None:
+    close = getattr(response, "close", None)
+    if close is not None:
+        close()
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _no_daemon(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Run CLI commands in-process even if a developer's daemon is listening."""
+    monkeypatch.setenv("ICAKAD_NO_DAEMON", "1")
@@ -0,0 +1,275 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import requests
+
+from icakad import cli
+from icakad.ai import AI, read_batch
+from icakad.cache import ResponseCache
+from icakad.pool import DEFAULT_POOL_MAXSIZE, ClientRegistry
+
+
+class StreamResponse:
+    def __init__(
+        self,
+        *,
+        lines: Optional[List[bytes]] = None,
+        content_type: str = "text/event-stream",
+        payload: Any = None,
+        status: int = 200,
+    ) -> None:
+        self._lines = lines or []
+        self._payload = payload
+        self.status_code = status
+        self.headers = {"Content-Type": content_type}
+        self.closed = False
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError("boom")
+
+    def iter_lines(self):
+        return iter(self._lines)
+
+    def json(self) -> Any:
+        return self._payload
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class RecordingSession:
+    def __init__(self, response: StreamResponse) -> None:
+        self.response = response
+        self.calls: List[Dict[str, Any]] = []
+
+    def post(self, url: str, **kwargs: Any) -> StreamResponse:
+        self.calls.append({"url": url, **kwargs})
+        return self.response
+
+
+class StreamTests(unittest.TestCase):
+    def test_sse_deltas_are_yielded_until_done(self) -> None:
+        lines = [
+            b'data: {"response": "\xd0\x97\xd0\xb4"}',
+            b"",
+            b'data: {"response": "rasti"}',
+            b"",
+            b": keep-alive comment",
+            b'data: {"response": "", "usage": {}}',
+            b"",
+            b"data: [DONE]",
+            b"",
+            b'data: {"response": "ignored"}',
+        ]
+        session = RecordingSession(StreamResponse(lines=lines))
+        chunks = list(AI.stream("Hi", session=session))
+
+        self.assertEqual(chunks, ["Зд", "rasti"])
+        call = session.calls[0]
+        self.assertTrue(call["stream"])
+        self.assertTrue(call["json"]["stream"])
+        self.assertIn("text/event-stream", call["headers"]["Accept"])
+        self.assertTrue(session.response.closed)
+
+    def test_openai_style_and_ndjson_payloads(self) -> None:
+        lines = [
+            json.dumps({"choices": [{"delta": {"content": "a"}}]}).encode(),
+            b"",
+            json.dumps({"choices": [{"delta": {"content": "b"}}]}).encode(),
+        ]
+        session = RecordingSession(StreamResponse(lines=lines, content_type="application/x-ndjson"))
+        self.assertEqual("".join(AI.stream("Hi", session=session)), "ab")
+
+    def test_falls_back_to_one_shot_json(self) -> None:
+        response = StreamResponse(content_type="application/json", payload={"response": "whole"})
+        session = RecordingSession(response)
+        self.assertEqual(list(AI.stream("Hi", session=session)), ["whole"])
+
+    def test_one_shot_payload_is_validated(self) -> None:
+        response = StreamResponse(content_type="application/json", payload={"nope": 1})
+        with self.assertRaises(ValueError):
+            list(AI.stream("Hi", session=RecordingSession(response)))
+
+    def test_cli_ai_ask_stream_prints_tokens(self) -> None:
+        with patch.object(AI, "stream", return_value=iter(["Hel", "lo"])) as mocked_stream:
+            stdout = StringIO()
+            with redirect_stdout(stdout):
+                rc = cli.main(["ai", "ask", "Hi there", "--stream"])
+        self.assertEqual(rc, 0)
+        self.assertEqual(stdout.getvalue(), "Hello\n")
+        mocked_stream.assert_called_once_with("Hi there", url=None, timeout=None)
+
+    def test_cli_ai_ask_rejects_stream_with_cache(self) -> None:
+        stderr = StringIO()
+        with patch.object(AI, "stream") as mocked_stream, redirect_stderr(stderr):
+            with self.assertRaises(SystemExit):
+                cli.main(["ai", "ask", "Hi there", "--stream", "--cache"])
+        mocked_stream.assert_not_called()
+        self.assertIn("--cache cannot be combined with --stream", stderr.getvalue())
+
+
+class CachedAskTests(unittest.TestCase):
+    def test_identical_requests_hit_the_cache(self) -> None:
+        session = RecordingSession(StreamResponse(content_type="application/json", payload={"response": "42"}))
+        cache = ResponseCache()
+        messages = [{"role": "user", "content": "Колко?"}]
+
+        first = AI.ask("", messages=messages, session=session, cache=cache)
+        second = AI.ask("", messages=[dict(messages[0])], session=session, cache=cache)
+        other_url = AI.ask("", messages=messages, url="https://other.test", session=session, cache=cache)
+
+        self.assertEqual((first, second, other_url), ("42", "42", "42"))
+        self.assertEqual(len(session.calls), 2)
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 2)
+
+    def test_class_level_cache_is_used_by_default(self) -> None:
+        session = RecordingSession(StreamResponse(content_type="application/json", payload={"response": "ok"}))
+        cache = ResponseCache()
+        with patch.object(AI, "cache", cache):
+            AI.ask("Hi", session=session)
+            AI.ask("Hi", session=session)
+        self.assertEqual(len(session.calls), 1)
+
+    def test_failed_requests_are_not_cached(self) -> None:
+        session = RecordingSession(StreamResponse(content_type="application/json", payload={}, status=500))
+        cache = ResponseCache()
+        with self.assertRaises(requests.HTTPError):
+            AI.ask("Hi", session=session, cache=cache)
+        self.assertEqual(len(cache), 0)
+
+
+class EchoSession:
+    """Replies with the last message; a prompt of "boom" fails."""
+
+    def __init__(self, delay: float = 0.0) -> None:
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def post(self, url: str, **kwargs: Any) -> StreamResponse:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            content = kwargs["json"]["messages"][-1]["content"]
+            if content == "boom":
+                return StreamResponse(content_type="application/json", payload={}, status=500)
+            return StreamResponse(content_type="application/json", payload={"response": content.upper()})
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class AskManyTests(unittest.TestCase):
+    def test_results_keep_input_order_and_capture_errors(self) -> None:
+        items = [
+            "a",
+            {"id": 7, "prompt": "b"},
+            "boom",
+            [{"role": "user", "content": "c"}],
+            {"messages": [{"role": "user", "content": "d"}], "id": "x"},
+            {"nothing": True},
+        ]
+        results = AI.ask_many(items, max_concurrency=4, session=EchoSession(delay=0.01))
+
+        self.assertEqual([r.index for r in results], list(range(6)))
+        self.assertEqual([r.reply for r in results], ["A", "B", None, "C", "D", None])
+        self.assertEqual([r.ok for r in results], [True, True, False, True, True, False])
+        self.assertEqual(results[1].to_dict(), {"index": 1, "id": 7, "ok": True, "reply": "B"})
+        self.assertIn("requires", results[5].error)
+
+    def test_concurrency_is_bounded(self) -> None:
+        session = EchoSession(delay=0.02)
+        AI.ask_many([str(i) for i in range(20)], max_concurrency=3, session=session)
+        self.assertGreater(session.peak, 1)
+        self.assertLessEqual(session.peak, 3)
+
+    def test_results_are_written_incrementally(self) -> None:
+        output = StringIO()
+        seen = []
+        for result in AI.iter_ask_many(["a", "b"], max_concurrency=2, session=EchoSession(), output=output):
+            seen.append(len(output.getvalue().splitlines()))
+        self.assertEqual(seen, [1, 2])
+        self.assertEqual(json.loads(output.getvalue().splitlines()[1])["reply"], "B")
+
+    def test_read_batch_reports_bad_lines_in_place(self) -> None:
+        source = StringIO('{"prompt": "a"}\n\n"b"\nnot json\n[{"role": "user", "content": "c"}]\n3\n')
+        items = list(read_batch(source))
+        self.assertEqual(items[0], {"prompt": "a"})
+        self.assertEqual(items[1], "b")
+        self.assertIsInstance(items[2], ValueError)
+        self.assertEqual(items[3], {"messages": [{"role": "user", "content": "c"}]})
+        self.assertIsInstance(items[4], ValueError)
+
+    def test_ask_many_uses_a_session_per_worker_thread(self) -> None:
+        sessions: Dict[int, EchoSession] = {}
+        lock = threading.Lock()
+
+        def per_thread() -> EchoSession:
+            with lock:
+                return sessions.setdefault(threading.get_ident(), EchoSession(delay=0.02))
+
+        with patch.object(AI, "get_session", side_effect=per_thread):
+            results = AI.ask_many(["a", "b", "c", "d"], max_concurrency=4)
+        self.assertTrue(all(result.ok for result in results))
+        self.assertGreater(len(sessions), 1)
+        self.assertTrue(all(session.peak == 1 for session in sessions.values()))
+
+    def test_pool_size_gets_its_own_session_pool(self) -> None:
+        registry = ClientRegistry()
+        with patch("icakad.ai.get_registry", return_value=registry):
+            sized = AI.get_session(40)
+            default = AI.get_session()
+        self.assertEqual(sized.get_adapter("https://x.test")._pool_maxsize, 40)
+        self.assertEqual(default.get_adapter("https://x.test")._pool_maxsize, DEFAULT_POOL_MAXSIZE)
+        self.assertEqual(registry.pool_maxsize, DEFAULT_POOL_MAXSIZE)
+        registry.close_all()
+
+    def test_cli_ai_batch_sizes_the_pool_without_touching_the_registry(self) -> None:
+        registry = ClientRegistry()
+        with tempfile.TemporaryDirectory() as tmp:
+            source = f"{tmp}/in.jsonl"
+            with open(source, "w", encoding="utf-8") as handle:
+                handle.write('"hi"\n')
+            with patch("icakad.pool._default_registry", registry), patch.object(
+                AI, "get_session", return_value=EchoSession()
+            ) as mocked_session, redirect_stdout(StringIO()):
+                rc = cli.main(["ai", "batch", source, f"{tmp}/out.jsonl", "--concurrency", "40", "--quiet"])
+
+        self.assertEqual(rc, 0)
+        mocked_session.assert_called_with(40)
+        self.assertEqual(registry.pool_maxsize, DEFAULT_POOL_MAXSIZE)
+
+    def test_cli_ai_batch_writes_jsonl(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = f"{tmp}/in.jsonl"
+            target = f"{tmp}/out.jsonl"
+            with open(source, "w", encoding="utf-8") as handle:
+                handle.write('{"id": 1, "prompt": "hi"}\n{"prompt": "boom"}\n')
+            with patch.object(AI, "get_session", return_value=EchoSession()):
+                stdout = StringIO()
+                with redirect_stdout(stdout):
+                    rc = cli.main(["ai", "batch", source, target, "--concurrency", "2"])
+            with open(target, encoding="utf-8") as handle:
+                lines = [json.loads(line) for line in handle]
+
+        self.assertEqual(rc, 1)
+        self.assertEqual(lines[0], {"index": 0, "id": 1, "ok": True, "reply": "HI"})
+        self.assertFalse(lines[1]["ok"])
+        summary = json.loads(stdout.getvalue())
+        self.assertEqual((summary["total"], summary["failed"]), (2, 1))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
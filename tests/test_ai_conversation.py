@@ -2,13 +2,14 @@
 
 from __future__ import annotations
 
+import json
 import unittest
 from contextlib import redirect_stdout
 from io import StringIO
 from typing import Any, Dict, List
 
 from icakad import ai as ai_module
-from icakad.ai import AI
+from icakad.ai import AI, Conversation, estimate_tokens
 
 
 class _DummyResponse:
@@ -77,5 +78,74 @@ class AIConversationTests(unittest.TestCase):
         self.assertEqual(recorded["payload"]["messages"], [{"role": "user", "content": "Здравей"}])
 
 
+class ConversationBudgetTests(unittest.TestCase):
+    def test_history_accumulates_within_budget(self) -> None:
+        session = _DummySession()
+        chat = Conversation("Бъди кратък.", session=session)
+        chat.ask("Първи въпрос")
+        chat.ask("Втори въпрос")
+
+        roles = [m["role"] for m in session.posts[-1]["payload"]["messages"]]
+        self.assertEqual(roles, ["system", "user", "assistant", "user"])
+        self.assertEqual(len(chat), 5)
+        self.assertEqual(chat.bytes_saved, 0)
+        self.assertEqual(chat.requests, 2)
+
+    def test_trim_keeps_request_size_bounded(self) -> None:
+        session = _DummySession()
+        chat = Conversation("Система", max_tokens=120, session=session)
+        for number in range(30):
+            chat.ask(f"Въпрос номер {number} " + "x" * 40)
+
+        sizes = [len(json.dumps(post["payload"]).encode("utf-8")) for post in session.posts]
+        self.assertLess(max(sizes[10:]), 2 * sizes[2])
+        for post in session.posts:
+            messages = post["payload"]["messages"]
+            self.assertEqual(messages[0], {"role": "system", "content": "Система"})
+            self.assertTrue(messages[-1]["content"].startswith("Въпрос номер"))
+        self.assertLessEqual(chat.tokens - chat.turns[-1].tokens, 120)
+        self.assertGreater(chat.bytes_saved, 0)
+
+    def test_byte_budget_is_enforced(self) -> None:
+        session = _DummySession()
+        chat = Conversation(max_tokens=10_000, max_bytes=600, session=session)
+        for number in range(10):
+            chat.ask(f"ред {number}")
+        for post in session.posts:
+            self.assertLessEqual(len(json.dumps(post["payload"]).encode("utf-8")), 600)
+
+    def test_summarize_replaces_older_turns(self) -> None:
+        session = _DummySession()
+        summaries: List[List[Dict[str, str]]] = []
+
+        def summarizer(messages: List[Dict[str, str]]) -> str:
+            summaries.append(messages)
+            return "кратко"
+
+        chat = Conversation(
+            "Система",
+            max_tokens=80,
+            strategy="summarize",
+            keep_recent=2,
+            summarizer=summarizer,
+            session=session,
+        )
+        for number in range(6):
+            chat.ask(f"Въпрос {number} " + "y" * 30)
+
+        self.assertTrue(summaries)
+        messages = session.posts[-1]["payload"]["messages"]
+        self.assertEqual(messages[0]["content"], "Система")
+        self.assertTrue(any(m["content"].endswith("кратко") for m in messages[1:]))
+        self.assertEqual(len(session.posts), 6)
+
+    def test_invalid_arguments_are_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            Conversation(strategy="forget")
+        with self.assertRaises(ValueError):
+            Conversation().ask("   ")
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+
+
 if __name__ == "__main__":
     unittest.main()
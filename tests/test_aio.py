@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+import tempfile
+import threading
+import unittest
+from io import BytesIO, RawIOBase, StringIO
+from pathlib import Path
+from typing import Callable, List
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+from icakad.paste import PasteError
+from icakad.ratelimit import configure_rate_limits, get_rate_limiter, reset_rate_limits
+from icakad.shorturl import ShortURLError
+from icakad.transport import NO_RETRY, CircuitBreaker, RetryPolicy
+
+if httpx is not None:
+    from icakad.aio import AsyncAI, AsyncPasteClient, AsyncShortURLClient, aclose_all, get_async_client
+
+
+Handler = Callable[["httpx.Request"], "httpx.Response"]
+
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class AsyncTestCase(unittest.IsolatedAsyncioTestCase):
+    def make_client(self, handler: Handler) -> "httpx.AsyncClient":
+        self.requests: List[httpx.Request] = []
+
+        def recording(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return handler(request)
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(recording))
+        self.addAsyncCleanup(client.aclose)
+        return client
+
+
+class AsyncShortURLTests(AsyncTestCase):
+    async def test_add_link_sends_auth_and_returns_json(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(200, json={"ok": True}))
+        shorturl = AsyncShortURLClient("https://short.test/", token="tok", client=client)
+
+        result = await shorturl.add_link("docs", "https://example.com")
+
+        self.assertEqual(result, {"ok": True})
+        request = self.requests[0]
+        self.assertEqual(str(request.url), "https://short.test/api")
+        self.assertEqual(request.headers["Authorization"], "Bearer tok")
+        self.assertEqual(json.loads(request.content), {"slug": "docs", "url": "https://example.com"})
+
+    async def test_closing_leaves_an_injected_client_open(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(200, json={"ok": True}))
+        async with AsyncShortURLClient("https://short.test", client=client) as shorturl:
+            await shorturl.delete_link("a")
+        async with AsyncPasteClient("https://short.test", client=client):
+            pass
+        self.assertFalse(client.is_closed)
+        self.assertEqual(await AsyncShortURLClient("https://short.test", client=client).delete_link("b"), {"ok": True})
+
+    async def test_http_errors_raise_shorturl_error(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(403, text="nope"))
+        shorturl = AsyncShortURLClient("https://short.test", client=client)
+        with self.assertRaises(ShortURLError) as ctx:
+            await shorturl.delete_link("docs")
+        self.assertIn("403", str(ctx.exception))
+
+    async def test_open_circuit_fails_fast_without_a_request(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(503, text="down"))
+        shorturl = AsyncShortURLClient(
+            "https://short.test", client=client, retry=NO_RETRY, breaker=CircuitBreaker(failure_threshold=1)
+        )
+        with self.assertRaises(ShortURLError):
+            await shorturl.delete_link("a")
+        with self.assertRaises(ShortURLError) as ctx:
+            await shorturl.delete_link("b")
+        self.assertIn("Circuit open for short.test", str(ctx.exception))
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_invalid_json_raises_the_sync_client_error(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(200, text="not json"))
+        with self.assertRaisesRegex(ShortURLError, "invalid JSON"):
+            await AsyncShortURLClient("https://short.test", client=client).delete_link("a")
+        with self.assertRaisesRegex(PasteError, "invalid JSON"):
+            await AsyncPasteClient("https://short.test", client=client).list_pastes()
+
+    async def test_list_links_follows_cursors(self) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.params.get("cursor") == "c1":
+                return httpx.Response(200, json={"items": [{"slug": "b", "url": "B"}], "list_complete": True})
+            return httpx.Response(200, json={"items": [{"slug": "a", "url": "A"}], "cursor": "c1"})
+
+        shorturl = AsyncShortURLClient("https://short.test", client=self.make_client(handler))
+        self.assertEqual(await shorturl.list_links(), {"a": "A", "b": "B"})
+        self.assertTrue(await shorturl.exists("b"))
+
+    async def test_bulk_keeps_order_and_reports_failures(self) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/bad"):
+                return httpx.Response(500, text="boom")
+            return httpx.Response(200, json={"path": request.url.path})
+
+        shorturl = AsyncShortURLClient("https://short.test", client=self.make_client(handler))
+        results = await shorturl.bulk(
+            [
+                {"slug": "a", "url": "https://a"},
+                {"op": "delete", "slug": "bad"},
+                {"op": "update", "slug": "c", "url": "https://c"},
+                {"op": "bogus", "slug": "d"},
+            ],
+            max_concurrency=2,
+        )
+        self.assertEqual([r.ok for r in results], [True, False, True, False])
+        self.assertEqual(results[2].response, {"path": "/api/c"})
+        self.assertEqual(results[3].op, "invalid")
+
+
+class AsyncRateLimitTests(AsyncTestCase):
+    def setUp(self) -> None:
+        configure_rate_limits({"https://short.test": {"rate": 1000, "burst": 10}})
+        self.addCleanup(reset_rate_limits)
+
+    async def test_429_feeds_the_shared_limiter_and_is_retried(self) -> None:
+        replies = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json={"ok": True})]
+        client = self.make_client(lambda request: replies.pop(0))
+        shorturl = AsyncShortURLClient("https://short.test", client=client)
+
+        self.assertEqual(await shorturl.add_link("docs", "https://example.com"), {"ok": True})
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(get_rate_limiter("https://short.test/api").throttled, 1)
+
+    async def test_transient_errors_are_retried_per_policy(self) -> None:
+        replies = [httpx.Response(503), httpx.Response(502), httpx.Response(200, json={"ok": True})]
+        client = self.make_client(lambda request: replies.pop(0))
+        shorturl = AsyncShortURLClient("https://short.test", client=client, retry=RetryPolicy(backoff=0.0))
+        self.assertEqual(await shorturl.delete_link("docs"), {"ok": True})
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_pastes_without_an_id_are_not_retried_on_5xx(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(502, text="bad gateway"))
+        pastes = AsyncPasteClient("https://short.test", client=client, retry=RetryPolicy(backoff=0.0))
+        with self.assertRaises(PasteError):
+            await pastes.create_paste("hello")
+        self.assertEqual(len(self.requests), 1)
+
+
+class AsyncPasteTests(AsyncTestCase):
+    async def test_fetch_pastes_share_one_listing_call(self) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/api/list":
+                return httpx.Response(200, json={"pastes": [{"id": "a", "ttl": 5, "text": "x"}]})
+            return httpx.Response(200, text=f"text of {request.url.path.rsplit('/', 1)[-1]}")
+
+        paste = AsyncPasteClient("https://paste.test", client=self.make_client(handler))
+        results = await paste.fetch_pastes(["a", "b", "a"])
+
+        self.assertEqual(results[0]["ttl"], 5)
+        self.assertEqual(results[1]["text"], "text of b")
+        self.assertNotIn("ttl", results[1])
+        listing_calls = [r for r in self.requests if r.url.path == "/api/list"]
+        self.assertEqual(len(listing_calls), 1)
+
+    async def test_errors_raise_paste_error(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(404, text="missing"))
+        paste = AsyncPasteClient("https://paste.test", client=client)
+        with self.assertRaises(PasteError):
+            await paste.fetch_paste("nope", raw=True)
+
+    async def test_upload_streams_json_body(self) -> None:
+        client = self.make_client(lambda request: httpx.Response(200, json={"id": "new"}))
+        paste = AsyncPasteClient("https://paste.test", client=client)
+
+        result = await paste.upload_paste(BytesIO("Здравей".encode("utf-8")), ttl=60, as_plaintext=False)
+
+        self.assertEqual(result, {"id": "new"})
+        request = self.requests[0]
+        self.assertEqual(request.url.params["ttl"], "60")
+        self.assertEqual(json.loads(request.content), {"text": "Здравей"})
+
+    async def test_upload_rejects_whitespace_only_sources(self) -> None:
+        paste = AsyncPasteClient("https://paste.test", client=self.make_client(lambda request: httpx.Response(200)))
+        with self.assertRaises(ValueError):
+            await paste.upload_paste(BytesIO(b"\n  \n\n"), chunk_size=2)
+        self.assertEqual(self.requests, [])
+
+    async def test_upload_reads_the_source_off_the_event_loop(self) -> None:
+        released = threading.Event()
+
+        class SlowPipe(RawIOBase):
+            def __init__(self) -> None:
+                self._data = BytesIO(b"piped text")
+
+            def readable(self) -> bool:
+                return True
+
+            def read(self, size: int = -1) -> bytes:
+                # Blocking the loop here would keep release() from running.
+                if not released.wait(timeout=2):
+                    raise AssertionError("read() ran on the event loop")
+                return self._data.read(size)
+
+        async def release() -> None:
+            await asyncio.sleep(0.01)
+            released.set()
+
+        client = self.make_client(lambda request: httpx.Response(200, json={"id": "p"}))
+        paste = AsyncPasteClient("https://paste.test", client=client)
+        result, _ = await asyncio.gather(paste.upload_paste(SlowPipe(), chunk_size=4), release())
+        self.assertEqual(result, {"id": "p"})
+        self.assertEqual(self.requests[0].content, b"piped text")
+
+    async def test_download_writes_file_and_checksum(self) -> None:
+        body = b"raw paste bytes" * 100
+        client = self.make_client(lambda request: httpx.Response(200, content=body))
+        paste = AsyncPasteClient("https://paste.test", client=client)
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "out.txt"
+            summary = await paste.download_paste("a", target, checksum="sha256", chunk_size=64)
+            self.assertEqual(target.read_bytes(), body)
+        self.assertEqual(summary["bytes"], len(body))
+        self.assertEqual(summary["digest"], hashlib.sha256(body).hexdigest())
+
+
+class AsyncAITests(AsyncTestCase):
+    async def test_ask_and_ask_many(self) -> None:
+        def handler(request: httpx.Request) -> httpx.Response:
+            content = json.loads(request.content)["messages"][-1]["content"]
+            if content == "boom":
+                return httpx.Response(500)
+            return httpx.Response(200, json={"response": content.upper()})
+
+        client = self.make_client(handler)
+        self.assertEqual(await AsyncAI.ask("hi", client=client), "HI")
+
+        output = StringIO()
+        results = await AsyncAI.ask_many(
+            ["a", "boom", {"id": 3, "prompt": "c"}], max_concurrency=2, client=client, output=output
+        )
+        self.assertEqual([r.reply for r in results], ["A", None, "C"])
+        self.assertFalse(results[1].ok)
+        self.assertEqual(json.loads(output.getvalue().splitlines()[2])["id"], 3)
+
+    async def test_stream_parses_sse(self) -> None:
+        body = b'data: {"response": "He"}\n\ndata: {"response": "llo"}\n\ndata: [DONE]\n\n'
+        client = self.make_client(
+            lambda request: httpx.Response(200, content=body, headers={"Content-Type": "text/event-stream"})
+        )
+        chunks = [chunk async for chunk in AsyncAI.stream("hi", client=client)]
+        self.assertEqual(chunks, ["He", "llo"])
+        self.assertTrue(json.loads(self.requests[0].content)["stream"])
+
+    async def test_calls_can_be_cancelled(self) -> None:
+        started = asyncio.Event()
+
+        async def slow(request: httpx.Request) -> httpx.Response:
+            started.set()
+            await asyncio.sleep(10)
+            return httpx.Response(200, json={"response": "late"})
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(slow))
+        self.addAsyncCleanup(client.aclose)
+        task = asyncio.ensure_future(AsyncAI.ask("hi", client=client))
+        await started.wait()
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+
+class SharedPoolTests(AsyncTestCase):
+    async def test_one_client_per_loop_until_closed(self) -> None:
+        first = get_async_client()
+        self.assertIs(get_async_client(), first)
+        await aclose_all()
+        self.assertTrue(first.is_closed)
+        second = get_async_client()
+        self.assertIsNot(second, first)
+        await aclose_all()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from icakad import cli
+from icakad.batch import read_commands, run_commands
+from icakad.config import Settings
+from icakad.shorturl import ShortURLError
+
+SETTINGS = Settings(shorturl_base="https://short.test", paste_base="https://paste.test", token="tok")
+
+
+class BatchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.shorturl = MagicMock()
+        self.paste = MagicMock()
+        patchers = [
+            patch("icakad._client_from_settings", return_value=self.shorturl),
+            patch("icakad._paste_client_from_settings", return_value=self.paste),
+        ]
+        self.factories = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+
+    def test_mixed_commands_run_over_shared_clients(self) -> None:
+        self.shorturl.add_link.return_value = {"ok": True}
+        self.paste.fetch_paste.return_value = "text"
+        commands = [
+            {"op": "shorturl.add", "slug": "a", "url": "https://a", "id": "first"},
+            {"op": "paste.get", "paste_id": "p1", "raw": True},
+            {"op": "shorturl.add", "slug": "b", "url": "https://b"},
+        ]
+
+        results = [r.to_dict() for r in run_commands(commands, settings=SETTINGS)]
+
+        self.assertEqual(
+            results[0], {"index": 0, "op": "shorturl.add", "id": "first", "ok": True, "result": {"ok": True}}
+        )
+        self.assertEqual(results[1]["result"], "text")
+        self.paste.fetch_paste.assert_called_once_with("p1", raw=True, enrich=True)
+        # Clients are resolved once per run, not once per command.
+        self.assertEqual([factory.call_count for factory in self.factories], [1, 1])
+
+    def test_bad_lines_and_failures_are_reported_in_place(self) -> None:
+        self.shorturl.delete_link.side_effect = ShortURLError("404: missing")
+        source = StringIO(
+            "\n".join(
+                [
+                    "not json",
+                    json.dumps({"op": "shorturl.delete", "slug": "gone"}),
+                    json.dumps({"op": "shorturl.add", "slug": "x"}),
+                    json.dumps({"op": "nope"}),
+                    "[1, 2]",
+                ]
+            )
+        )
+        results = list(run_commands(read_commands(source), settings=SETTINGS))
+
+        self.assertEqual([r.ok for r in results], [False] * 5)
+        self.assertIn("line 1: invalid JSON", results[0].error)
+        self.assertEqual(results[1].error, "404: missing")
+        self.assertEqual(results[2].error, "'shorturl.add' needs a 'url' field")
+        self.assertIn("unknown op 'nope'", results[3].error)
+        self.assertEqual(results[4].op, "invalid")
+
+    def test_parallel_runs_keep_input_order(self) -> None:
+        active = []
+        lock = threading.Lock()
+
+        def fetch(paste_id: str, **kwargs: object) -> str:
+            with lock:
+                active.append(paste_id)
+            time.sleep(0.01 if paste_id == "p0" else 0)
+            return paste_id.upper()
+
+        self.paste.fetch_paste.side_effect = fetch
+        commands = [{"op": "paste.get", "paste_id": f"p{i}"} for i in range(20)]
+        results = list(run_commands(commands, max_workers=4, settings=SETTINGS))
+        self.assertEqual([r.result for r in results], [f"P{i}" for i in range(20)])
+        self.assertEqual(len(active), 20)
+
+    def test_cli_streams_one_result_line_per_command(self) -> None:
+        self.shorturl.list_links.return_value = {"a": "https://a"}
+        stdin = StringIO(json.dumps({"op": "shorturl.list"}) + "\n" + json.dumps({"op": "paste.get"}) + "\n")
+        out, err = StringIO(), StringIO()
+        with patch("sys.stdin", stdin), redirect_stdout(out), redirect_stderr(err):
+            code = cli.main(["--token", "tok", "batch"])
+
+        self.assertEqual(code, 1)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(lines[0]["result"], {"a": "https://a"})
+        self.assertEqual(lines[1]["error"], "'paste.get' needs a 'paste_id' field")
+        self.assertEqual(json.loads(err.getvalue())["failed"], 1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.fakeworker import FakeWorker
+from benchmarks.run import _run_child, bench_parse, compare, main, percentile, summarize
+from icakad.ai import AI
+from icakad.paste import PasteClient
+from icakad.shorturl import ShortURLClient
+
+
+class FakeWorkerTests(unittest.TestCase):
+    def test_clients_round_trip(self) -> None:
+        with FakeWorker() as worker:
+            worker.seed_links(5)
+            shorturl = ShortURLClient(worker.base_url)
+            shorturl.add_link("docs", "https://example.com/docs")
+            self.assertEqual(len(shorturl.list_links(page_size=2)), 6)
+            shorturl.delete_link("docs")
+            self.assertIsNone(shorturl.get_link("docs"))
+            shorturl.close()
+
+            paste = PasteClient(worker.base_url)
+            created = paste.create_paste("hello", paste_id="p1")
+            self.assertEqual(created["id"], "p1")
+            self.assertEqual(paste.fetch_paste("p1", raw=True), "hello")
+            self.assertEqual(paste.fetch_paste("p1")["size"], 5)
+            self.assertEqual([item["id"] for item in paste.iter_pastes()], ["p1"])
+            paste.close()
+
+            self.assertEqual(AI.ask("ping", url=worker.llm_url), "echo: ping")
+
+
+class MeasurementTests(unittest.TestCase):
+    def test_percentiles_and_summary(self) -> None:
+        samples = [0.001 * n for n in range(1, 101)]
+        self.assertAlmostEqual(percentile(samples, 50), 0.050)
+        self.assertAlmostEqual(percentile(samples, 99), 0.099)
+        summary = summarize([0.5, 0.5])
+        self.assertEqual((summary["iterations"], summary["ops_per_sec"], summary["p50_ms"]), (2, 2.0, 500.0))
+
+    def test_parse_suite_checks_item_counts(self) -> None:
+        results = bench_parse([25], repeats=1)
+        self.assertEqual(
+            sorted(results),
+            ["parse.links.json.25", "parse.links.stream.25", "parse.pastes.json.25", "parse.pastes.stream.25"],
+        )
+        self.assertGreater(results["parse.links.json.25"]["peak_bytes"], 0)
+
+    @unittest.skipUnless(hasattr(os, "wait4"), "needs wait4")
+    def test_child_rss_excludes_the_parents_peak(self) -> None:
+        ballast = b"x" * (256 * 1024 * 1024)  # resident, unlike a zeroed bytearray
+        elapsed, rss = _run_child([sys.executable, "-c", "print('hi')"])
+        del ballast
+        self.assertGreater(elapsed, 0)
+        self.assertLess(rss, 128 * 1024 * 1024)
+
+
+class CompareTests(unittest.TestCase):
+    def test_direction_threshold_and_noise_floor(self) -> None:
+        baseline = {
+            "client.x": {"ops_per_sec": 1000.0, "p50_ms": 1.0, "p99_ms": 2.0, "iterations": 10},
+            "parse.y": {"seconds": 1.0},
+            "gone": {"seconds": 1.0},
+        }
+        current = {
+            "client.x": {"ops_per_sec": 400.0, "p50_ms": 0.9, "p99_ms": 3.5, "iterations": 99},
+            "parse.y": {"seconds": 0.5},
+        }
+        rows = {(row["name"], row["metric"]): row for row in compare(current, baseline, threshold=0.5)}
+        self.assertEqual(len(rows), 4)
+        self.assertTrue(rows["client.x", "ops_per_sec"]["regressed"])
+        self.assertAlmostEqual(rows["client.x", "ops_per_sec"]["change"], 1.5)
+        self.assertFalse(rows["client.x", "p50_ms"]["regressed"])
+        # +75%, but 1.5ms is within the p99 noise floor.
+        self.assertFalse(rows["client.x", "p99_ms"]["regressed"])
+        self.assertLess(rows["parse.y", "seconds"]["change"], 0)
+
+    def test_main_exits_non_zero_on_regression(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / "baseline.json"
+            argv = ["--suite", "parse", "--sizes", "2000", "--output", str(Path(tmp) / "out.json")]
+            with redirect_stdout(StringIO()), redirect_stderr(StringIO()):
+                self.assertEqual(main(argv + ["--save-baseline", str(baseline)]), 0)
+                self.assertEqual(main(argv + ["--baseline", str(baseline), "--threshold", "100"]), 0)
+
+                stored = json.loads(baseline.read_text())
+                stored["results"]["parse.links.json.2000"]["peak_bytes"] = 1
+                baseline.write_text(json.dumps(stored))
+                self.assertEqual(main(argv + ["--baseline", str(baseline), "--threshold", "100"]), 1)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,108 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from icakad.cache import ResponseCache, cache_key
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+MESSAGES = [{"role": "user", "content": "Здравей"}]
+
+
+class CacheKeyTests(unittest.TestCase):
+    def test_key_is_stable_and_url_normalized(self) -> None:
+        first = cache_key(MESSAGES, "https://llm.test")
+        self.assertEqual(first, cache_key([dict(MESSAGES[0])], "https://llm.test/"))
+        self.assertEqual(len(first), 64)
+
+    def test_key_depends_on_messages_and_url(self) -> None:
+        base = cache_key(MESSAGES, "https://llm.test/")
+        self.assertNotEqual(base, cache_key([{"role": "system", "content": "Здравей"}], "https://llm.test/"))
+        self.assertNotEqual(base, cache_key(MESSAGES, "https://other.test/"))
+
+
+class MemoryTierTests(unittest.TestCase):
+    def test_hits_misses_and_lru_eviction(self) -> None:
+        cache = ResponseCache(max_entries=2)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "A")
+        cache.put("b", "B")
+        self.assertEqual(cache.get("a"), "A")
+        cache.put("c", "C")  # evicts "b", the least recently used
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats.hits, 2)
+        self.assertEqual(cache.stats.misses, 2)
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertAlmostEqual(cache.stats.to_dict()["hit_rate"], 0.5)
+
+    def test_ttl_expires_entries(self) -> None:
+        clock = FakeClock()
+        cache = ResponseCache(ttl=10, clock=clock)
+        cache.put("a", "A")
+        clock.now += 9
+        self.assertEqual(cache.get("a"), "A")
+        clock.now += 1
+        self.assertIsNone(cache.get("a"))
+        self.assertNotIn("a", cache)
+
+
+class DiskTierTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "nested" / "replies.sqlite3"
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_replies_survive_reopening(self) -> None:
+        cache = ResponseCache(self.path)
+        cache.put("a", "Отговор")
+        cache.close()
+
+        reopened = ResponseCache(self.path)
+        self.assertEqual(reopened.get("a"), "Отговор")
+        self.assertEqual(reopened.stats.disk_hits, 1)
+        self.assertEqual(reopened.get("a"), "Отговор")
+        self.assertEqual(reopened.stats.memory_hits, 1)
+        reopened.close()
+
+    def test_size_cap_drops_least_recently_used(self) -> None:
+        clock = FakeClock()
+        cache = ResponseCache(self.path, max_entries=0, max_bytes=10, clock=clock)
+        cache.put("a", "aaaa")
+        clock.now += 1
+        cache.put("b", "bbbb")
+        clock.now += 1
+        self.assertEqual(cache.get("a"), "aaaa")  # "a" is now the fresher one
+        clock.now += 1
+        cache.put("c", "cccc")
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.stats.evictions, 1)
+        cache.close()
+
+    def test_expired_rows_are_purged_on_write(self) -> None:
+        clock = FakeClock()
+        cache = ResponseCache(self.path, max_entries=0, ttl=5, clock=clock)
+        cache.put("old", "x")
+        clock.now += 6
+        cache.put("new", "y")
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get("old"))
+        cache.close()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -1,7 +1,10 @@
+import json
+import tempfile
 import unittest
-from contextlib import redirect_stdout
+from pathlib import Path
+from contextlib import redirect_stderr, redirect_stdout
 from io import StringIO
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from icakad import cli
 
@@ -39,6 +42,25 @@ class CLITests(unittest.TestCase):
             base_url=None,
         )
 
+    def test_paste_create_streams_text_files(self) -> None:
+        with patch("icakad.cli.upload_paste", return_value={"ok": True}) as mocked_upload, patch(
+            "icakad.cli.resolve_text_input"
+        ) as mocked_resolve:
+            rc = cli.main(["paste", "create", "--text-file", "-", "--plain", "--quiet"])
+
+        self.assertEqual(rc, 0)
+        mocked_resolve.assert_not_called()
+        mocked_upload.assert_called_once_with(
+            "-",
+            paste_id=None,
+            ttl=None,
+            as_plaintext=True,
+            save_to=None,
+            config_path=None,
+            token=None,
+            base_url=None,
+        )
+
     def test_paste_get_raw_prints_plain_text(self) -> None:
         with patch("icakad.cli.fetch_paste", return_value="hello") as mocked_fetch:
             stdout = StringIO()
@@ -49,6 +71,110 @@ class CLITests(unittest.TestCase):
         mocked_fetch.assert_called_once()
         self.assertEqual(stdout.getvalue().strip(), "hello")
 
+    def test_build_parser_only_populates_selected_command(self) -> None:
+        parser = cli.build_parser(["shorturl", "list"])
+        args = parser.parse_args(["shorturl", "list", "--quiet"])
+        self.assertEqual((args.command, args.action, args.quiet), ("shorturl", "list", True))
+        subparsers = next(a for a in parser._actions if a.dest == "command")
+        self.assertIsNone(subparsers.choices["paste"]._subparsers)
+        self.assertIsNotNone(subparsers.choices["shorturl"]._subparsers)
+
+    def test_shorturl_import_reports_summary_and_results(self) -> None:
+        from icakad.shorturl import BulkResult
+
+        def fake_bulk(ops, max_workers):
+            for index, op in enumerate(ops):
+                failed = op.slug == "bad"
+                yield BulkResult(index=index, op=op.op, slug=op.slug, ok=not failed, error="boom" if failed else None)
+
+        client = MagicMock()
+        client.iter_bulk.side_effect = fake_bulk
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "ops.csv"
+            source.write_text("slug,url\na,https://a\nbad,https://b\n", encoding="utf-8")
+            results_path = Path(tmp) / "results.jsonl"
+            stdout = StringIO()
+            with patch("icakad._client_from_settings", return_value=client), redirect_stdout(stdout):
+                rc = cli.main(["shorturl", "import", str(source), "--workers", "2", "--output", str(results_path)])
+            lines = [json.loads(line) for line in results_path.read_text(encoding="utf-8").splitlines()]
+
+        self.assertEqual(rc, 1)
+        self.assertEqual([line["slug"] for line in lines], ["a", "bad"])
+        summary = json.loads(stdout.getvalue())
+        self.assertEqual((summary["total"], summary["failed"]), (2, 1))
+        self.assertEqual(client.iter_bulk.call_args.kwargs["max_workers"], 2)
+
+    def test_shorturl_import_sizes_its_client_pool_not_the_registry(self) -> None:
+        from icakad.pool import DEFAULT_POOL_MAXSIZE, ClientRegistry
+
+        registry = ClientRegistry()
+        client = MagicMock()
+        client.iter_bulk.return_value = iter([])
+        with tempfile.TemporaryDirectory() as tmp:
+            source = Path(tmp) / "ops.csv"
+            source.write_text("slug,url\n", encoding="utf-8")
+            with patch("icakad.pool._default_registry", registry), patch(
+                "icakad._client_from_settings", return_value=client
+            ) as mocked_client, redirect_stdout(StringIO()):
+                cli.main(["shorturl", "import", str(source), "--workers", "40", "--quiet"])
+
+        self.assertEqual(mocked_client.call_args.kwargs["settings"].pool_maxsize, 40)
+        self.assertEqual(registry.pool_maxsize, DEFAULT_POOL_MAXSIZE)
+
+    def test_shorturl_import_rejects_non_positive_workers(self) -> None:
+        with patch("icakad.cli.bulk_short_links") as mocked_bulk:
+            with self.assertRaises(SystemExit) as ctx:
+                cli.main(["shorturl", "import", "-", "--workers", "0"])
+        self.assertEqual(str(ctx.exception), "--workers must be at least 1")
+        mocked_bulk.assert_not_called()
+
+    def test_output_raw_requests_passthrough(self) -> None:
+        summary = {"bytes": 10, "path": "/tmp/links.json"}
+        with patch("icakad.cli.list_short_links", return_value=summary) as mocked_list:
+            rc = cli.main(["shorturl", "list", "--output-raw", "links.json", "--validate-json", "--quiet"])
+        self.assertEqual(rc, 0)
+        kwargs = mocked_list.call_args.kwargs
+        self.assertEqual((kwargs["save_to"], kwargs["raw_output"], kwargs["validate"]), ("links.json", True, True))
+
+        with patch("icakad.cli.list_pastes") as mocked_pastes, redirect_stderr(StringIO()):
+            with self.assertRaises(SystemExit):
+                cli.main(["paste", "list", "--output", "a.json", "--output-raw", "b.json"])
+            with self.assertRaises(SystemExit):
+                cli.main(["paste", "list", "--validate-json"])
+        mocked_pastes.assert_not_called()
+
+    def test_format_is_passed_to_list_helpers(self) -> None:
+        with patch("icakad.cli.list_short_links") as mocked_list:
+            rc = cli.main(["shorturl", "list", "--format", "tsv", "--page-size", "100"])
+        self.assertEqual(rc, 0)
+        kwargs = mocked_list.call_args.kwargs
+        self.assertEqual((kwargs["output_format"], kwargs["page_size"], kwargs["save_to"]), ("tsv", 100, None))
+
+        with patch("icakad.cli.list_pastes") as mocked_pastes, redirect_stderr(StringIO()):
+            with self.assertRaises(SystemExit):
+                cli.main(["paste", "list", "--format", "ndjson", "--output-raw", "b.json"])
+            with self.assertRaises(SystemExit):
+                cli.main(["paste", "list", "--format", "xml"])
+        mocked_pastes.assert_not_called()
+
+    def test_paste_get_stream_writes_to_output(self) -> None:
+        summary = {"id": "abc", "bytes": 5, "path": "/tmp/x", "algorithm": "sha256", "digest": "d"}
+        with patch("icakad.cli.download_paste", return_value=summary) as mocked_download:
+            stdout = StringIO()
+            with redirect_stdout(stdout):
+                rc = cli.main(["paste", "get", "abc", "--raw", "--stream", "--checksum", "sha256", "--output", "x.log"])
+
+        self.assertEqual(rc, 0)
+        mocked_download.assert_called_once_with(
+            "abc",
+            "x.log",
+            checksum="sha256",
+            config_path=None,
+            token=None,
+            base_url=None,
+        )
+        self.assertEqual(json.loads(stdout.getvalue())["digest"], "d")
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
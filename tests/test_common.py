@@ -4,14 +4,19 @@ import unittest
 from contextlib import redirect_stdout
 from io import StringIO
 from pathlib import Path
+from unittest.mock import patch
 
+from icakad.common.concurrency import ordered_map
 from icakad.common import (
     comma_separated,
     ensure_parent,
     print_json,
     read_text_file,
     resolve_text_input,
+    save_chunks,
+    save_rows,
     write_json,
+    write_rows,
     write_text,
 )
 
@@ -44,6 +49,10 @@ class CommonHelpersTests(unittest.TestCase):
             resolved = resolve_text_input(text_file=path)
             self.assertEqual(resolved, "file contents")
 
+    def test_read_text_file_accepts_dash_for_stdin(self) -> None:
+        with patch("sys.stdin", StringIO("piped text")):
+            self.assertEqual(read_text_file("-"), "piped text")
+
     def test_resolve_text_input_rejects_empty_payload(self) -> None:
         with tempfile.TemporaryDirectory() as tmp:
             path = Path(tmp) / "empty.txt"
@@ -62,5 +71,114 @@ class CommonHelpersTests(unittest.TestCase):
         self.assertEqual(sentence, "alpha, 42, omega")
 
 
+class SaveChunksTests(unittest.TestCase):
+    def test_writes_atomically_and_reports_size(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "nested" / "body.bin"
+            target.parent.mkdir()
+            target.write_bytes(b"old")
+            summary = save_chunks(iter([b"ab", b"", b"cd"]), target)
+            self.assertEqual(target.read_bytes(), b"abcd")
+            self.assertEqual(summary, {"bytes": 4, "path": str(target.resolve())})
+            self.assertEqual([p.name for p in target.parent.iterdir()], ["body.bin"])
+
+    def test_failing_consumer_keeps_previous_file(self) -> None:
+        def reject(chunks):
+            for chunk in chunks:
+                if b"!" in chunk:
+                    raise ValueError("bad chunk")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "body.bin"
+            target.write_bytes(b"old")
+            with self.assertRaises(ValueError):
+                save_chunks(iter([b"ok", b"!"]), target, consume=reject)
+            self.assertEqual(target.read_bytes(), b"old")
+            self.assertEqual([p.name for p in Path(tmp).iterdir()], ["body.bin"])
+
+
+class RowWriterTests(unittest.TestCase):
+    ROWS = [{"slug": "a", "url": "https://a.test"}, {"slug": "b,c", "url": "https://b.test", "tags": ["x"]}]
+
+    def write(self, fmt, rows=None, **kwargs):
+        out = StringIO()
+        count = write_rows(iter(self.ROWS if rows is None else rows), fmt, out, **kwargs)
+        return count, out.getvalue()
+
+    def test_json_formats(self) -> None:
+        count, text = self.write("json")
+        self.assertEqual(count, 2)
+        self.assertEqual(json.loads(text), self.ROWS)
+        self.assertEqual(len(text.splitlines()), 4)
+        self.assertEqual(self.write("json", [])[1], "[]\n")
+        count, text = self.write("ndjson")
+        self.assertEqual([json.loads(line) for line in text.splitlines()], self.ROWS)
+
+    def test_table_formats(self) -> None:
+        self.assertEqual(
+            self.write("csv")[1],
+            'slug,url\na,https://a.test\n"b,c",https://b.test\n',
+        )
+        self.assertEqual(
+            self.write("tsv", fields=["slug", "tags"])[1],
+            'slug\ttags\na\t\nb,c\t"[""x""]"\n',
+        )
+        self.assertEqual(self.write("tsv", [], fields=["slug", "url"])[1], "slug\turl\n")
+
+    def test_rows_are_written_as_they_are_produced(self) -> None:
+        out = StringIO()
+        seen = []
+
+        def rows():
+            for index in range(3):
+                seen.append(out.getvalue().count("\n"))
+                yield {"n": index}
+
+        write_rows(rows(), "ndjson", out)
+        self.assertEqual(seen, [0, 1, 2])
+
+    def test_unknown_format_and_failed_save(self) -> None:
+        with self.assertRaises(ValueError):
+            write_rows([], "xml", StringIO())
+
+        def broken():
+            yield {"n": 1}
+            raise RuntimeError("listing failed")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "rows.csv"
+            with self.assertRaises(RuntimeError):
+                save_rows(broken(), target, "csv")
+            self.assertEqual(list(Path(tmp).iterdir()), [])
+            summary = save_rows(iter(self.ROWS), target, "csv")
+            self.assertEqual(summary, {"rows": 2, "format": "csv", "path": str(target.resolve())})
+
+
+class OrderedMapTests(unittest.TestCase):
+    def test_results_follow_input_order_and_capture_errors(self) -> None:
+        def work(value: int) -> int:
+            if value == 3:
+                raise ValueError("three")
+            return value * 2
+
+        outcomes = list(ordered_map(work, range(10), max_workers=4, window=3))
+        self.assertEqual([item for item, _, _ in outcomes], list(range(10)))
+        self.assertEqual(outcomes[4], (4, 8, None))
+        self.assertIsInstance(outcomes[3][2], ValueError)
+
+    def test_input_is_consumed_lazily(self) -> None:
+        consumed = []
+
+        def source():
+            for value in range(100):
+                consumed.append(value)
+                yield value
+
+        iterator = ordered_map(lambda v: v, source(), max_workers=2, window=4)
+        next(iterator)
+        self.assertLessEqual(len(consumed), 5)
+        iterator.close()
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
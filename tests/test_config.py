@@ -5,7 +5,14 @@ import unittest
 from pathlib import Path
 from unittest.mock import patch
 
-from icakad.config import DEFAULT_SHORTURL_BASE, Settings, load_settings
+from icakad import config as config_module
+from icakad.config import (
+    DEFAULT_SHORTURL_BASE,
+    Settings,
+    clear_settings_cache,
+    freeze_settings,
+    load_settings,
+)
 
 
 class SettingsTests(unittest.TestCase):
@@ -32,6 +39,25 @@ class SettingsTests(unittest.TestCase):
             with self.assertRaises(ValueError):
                 load_settings(config_path=cfg)
 
+    def test_rate_limits_are_read_from_the_config_file(self) -> None:
+        limits = {"https://linkove.icu": {"rate": 5, "burst": 10}, "*": 20}
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = Path(tmp) / "config.json"
+            cfg.write_text(json.dumps({"rate_limits": limits}), encoding="utf-8")
+            settings = load_settings(config_path=cfg, token="t")
+        self.assertEqual(settings.rate_limits, limits)
+        self.assertEqual(settings.token, "t")
+
+    def test_pool_options_are_read_and_validated(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = Path(tmp) / "config.json"
+            cfg.write_text(json.dumps({"pool_maxsize": 64, "pool_block": True}), encoding="utf-8")
+            settings = load_settings(config_path=cfg)
+            self.assertEqual((settings.pool_connections, settings.pool_maxsize, settings.pool_block), (None, 64, True))
+            cfg.write_text(json.dumps({"pool_maxsize": "lots"}), encoding="utf-8")
+            with self.assertRaises(ValueError):
+                load_settings(config_path=cfg)
+
     def test_environment_overrides_take_precedence(self) -> None:
         env = {
             "ICAKAD_SHORTURL_BASE": "https://env-short",
@@ -45,5 +71,66 @@ class SettingsTests(unittest.TestCase):
         self.assertEqual(settings.token, "direct-token")
 
 
+class SettingsCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        clear_settings_cache()
+        self.addCleanup(clear_settings_cache)
+        self.addCleanup(freeze_settings, False)
+
+    def test_repeated_loads_parse_the_file_once(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = Path(tmp) / "config.json"
+            cfg.write_text(json.dumps({"token": "cached"}), encoding="utf-8")
+            with patch.object(config_module, "_load_json", wraps=config_module._load_json) as mocked:
+                first = load_settings(config_path=cfg)
+                second = load_settings(config_path=cfg)
+        self.assertEqual(first, second)
+        self.assertEqual(mocked.call_count, 1)
+
+    def test_file_changes_invalidate_the_cache(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = Path(tmp) / "config.json"
+            cfg.write_text(json.dumps({"token": "one"}), encoding="utf-8")
+            self.assertEqual(load_settings(config_path=cfg).token, "one")
+            cfg.write_text(json.dumps({"token": "second"}), encoding="utf-8")
+            self.assertEqual(load_settings(config_path=cfg).token, "second")
+
+    def test_environment_is_part_of_the_cache_key(self) -> None:
+        with patch.dict(os.environ, {"ICAKAD_TOKEN": "env-one"}, clear=False):
+            self.assertEqual(load_settings().token, "env-one")
+        with patch.dict(os.environ, {"ICAKAD_TOKEN": "env-two"}, clear=False):
+            self.assertEqual(load_settings().token, "env-two")
+
+    def test_direct_overrides_are_not_cached(self) -> None:
+        self.assertEqual(load_settings(token="a").token, "a")
+        self.assertEqual(load_settings(token="b").token, "b")
+
+    def test_frozen_mode_skips_stat_calls(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = Path(tmp) / "config.json"
+            cfg.write_text(json.dumps({"token": "frozen"}), encoding="utf-8")
+            load_settings(config_path=cfg)
+            freeze_settings()
+            cfg.write_text(json.dumps({"token": "ignored!"}), encoding="utf-8")
+            with patch.object(config_module.os, "stat") as mocked_stat:
+                settings = load_settings(config_path=cfg)
+        mocked_stat.assert_not_called()
+        self.assertEqual(settings.token, "frozen")
+
+    def test_freeze_env_var_is_parsed_as_a_boolean(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = Path(tmp) / "config.json"
+            cfg.write_text(json.dumps({"token": "one"}), encoding="utf-8")
+            load_settings(config_path=cfg)
+            cfg.write_text(json.dumps({"token": "second"}), encoding="utf-8")
+            for value in ("0", "false", "No", ""):
+                with self.subTest(value=value), patch.dict(os.environ, {"ICAKAD_FREEZE_CONFIG": value}):
+                    self.assertEqual(load_settings(config_path=cfg).token, "second")
+            cfg.write_text(json.dumps({"token": "third!"}), encoding="utf-8")
+            for value in ("1", "true", "YES", "on"):
+                with self.subTest(value=value), patch.dict(os.environ, {"ICAKAD_FREEZE_CONFIG": value}):
+                    self.assertEqual(load_settings(config_path=cfg).token, "second")
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from pathlib import Path
+from typing import List, Optional, Tuple
+from unittest.mock import patch
+
+from icakad import cli
+from icakad.daemon import _forwardable, _serialise_args, forward, request
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+
+class ListingHandler(BaseHTTPRequestHandler):
+    """Serves ``GET /api`` with one link, or 500 when the path is ``/broken/api``."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        if self.path.startswith("/broken"):
+            status, body = 500, b"boom"
+        else:
+            status, body = 200, json.dumps({"items": [{"slug": "docs", "url": "https://example.com"}]}).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def run_cli(argv: List[str]) -> Tuple[int, str, str]:
+    out, err = StringIO(), StringIO()
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            code = cli.main(argv)
+        except SystemExit as exc:
+            code = exc.code if isinstance(exc.code, int) else 1
+    return code, out.getvalue(), err.getvalue()
+
+
+@unittest.skipUnless(hasattr(__import__("socket"), "AF_UNIX"), "Unix sockets are not available")
+class DaemonTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), ListingHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.socket = Path(cls.tmp.name) / "icakad.sock"
+        env = dict(os.environ, PYTHONPATH=str(SRC))
+        env.pop("ICAKAD_NO_DAEMON", None)
+        cls.process = subprocess.Popen(
+            [sys.executable, "-m", "icakad", "daemon", "--socket", str(cls.socket)],
+            env=env,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 20
+        while request({"op": "status"}, socket_path=cls.socket) is None:
+            if time.monotonic() > deadline or cls.process.poll() is not None:
+                cls.process.kill()
+                raise RuntimeError("daemon did not start")
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        request({"op": "stop"}, socket_path=cls.socket)
+        try:
+            cls.process.wait(10)
+        except subprocess.TimeoutExpired:  # pragma: no cover - stuck daemon
+            cls.process.kill()
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.tmp.cleanup()
+
+    def setUp(self) -> None:
+        patcher = patch.dict(os.environ, {"ICAKAD_DAEMON_SOCKET": str(self.socket)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        os.environ.pop("ICAKAD_NO_DAEMON", None)
+
+    def served(self) -> int:
+        status = request({"op": "status"}, socket_path=self.socket)
+        assert status is not None
+        return status["served"]
+
+    def test_commands_run_in_the_daemon(self) -> None:
+        before = self.served()
+        code, out, _ = run_cli(["--shorturl-base", self.base, "shorturl", "list"])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out), {"docs": "https://example.com"})
+        self.assertEqual(self.served(), before + 1)
+
+    def test_errors_and_exit_codes_are_relayed(self) -> None:
+        code, _, err = run_cli(["--shorturl-base", f"{self.base}/broken", "shorturl", "list"])
+        self.assertEqual(code, 1)
+        self.assertIn("ShortURLError: 500: boom", err)
+
+        code, _, err = run_cli(["shorturl"])
+        self.assertEqual(code, 2)
+        self.assertIn("Please provide a shorturl action", err)
+
+    def test_output_paths_are_resolved_for_the_daemon(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                code, _, _ = run_cli(["--shorturl-base", self.base, "shorturl", "list", "--quiet", "--output", "links.json"])
+            finally:
+                os.chdir(cwd)
+            self.assertEqual(code, 0)
+            self.assertEqual(json.loads((Path(tmp) / "links.json").read_text()), {"docs": "https://example.com"})
+
+    def test_opt_out_runs_in_process(self) -> None:
+        before = self.served()
+        with patch.dict(os.environ, {"ICAKAD_NO_DAEMON": "1"}), patch.object(cli, "run", return_value=0) as local:
+            self.assertEqual(cli.main(["shorturl", "list"]), 0)
+        local.assert_called_once()
+        self.assertEqual(self.served(), before)
+
+    def test_daemon_declines_a_different_environment(self) -> None:
+        args = cli.build_parser().parse_args(["shorturl", "list"])
+        with patch.dict(os.environ, {"ICAKAD_TOKEN": "other-token"}):
+            self.assertIsNone(forward(args, socket_path=self.socket))
+
+    def test_daemon_declines_a_working_directory_config(self) -> None:
+        args = cli.build_parser().parse_args(["shorturl", "list"])
+        with tempfile.TemporaryDirectory() as tmp:
+            cwd = os.getcwd()
+            os.chdir(tmp)
+            try:
+                (Path(tmp) / "icakad.config.json").write_text(json.dumps({"shorturl_base": self.base}))
+                self.assertIsNone(forward(args, socket_path=self.socket))
+            finally:
+                os.chdir(cwd)
+
+    def test_status_command(self) -> None:
+        code, out, _ = run_cli(["daemon", "status", "--socket", str(self.socket)])
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out)["pid"], self.process.pid)
+
+
+class ForwardingRulesTests(unittest.TestCase):
+    def parse(self, argv: List[str]) -> argparse.Namespace:
+        return cli.build_parser().parse_args(argv)
+
+    def test_stdin_stdout_and_binary_commands_stay_local(self) -> None:
+        self.assertTrue(_forwardable(self.parse(["paste", "get", "abc", "--raw"])))
+        self.assertFalse(_forwardable(self.parse(["paste", "create", "--text-file", "-"])))
+        self.assertFalse(_forwardable(self.parse(["paste", "get", "abc", "--raw", "--stream"])))
+        self.assertFalse(_forwardable(self.parse(["ai", "ask", "-"])))
+        self.assertFalse(_forwardable(self.parse(["daemon", "status"])))
+
+    def test_relative_paths_become_absolute(self) -> None:
+        payload = _serialise_args(self.parse(["shorturl", "list", "--output", "out.json"]))
+        self.assertEqual(payload["output"], os.path.abspath("out.json"))
+
+    def test_missing_or_stale_socket_falls_back(self) -> None:
+        args = self.parse(["shorturl", "list"])
+        with tempfile.TemporaryDirectory() as tmp:
+            missing: Optional[Path] = Path(tmp) / "none.sock"
+            self.assertIsNone(forward(args, socket_path=missing))
+            stale = Path(tmp) / "stale.sock"
+            stale.write_text("")
+            self.assertIsNone(forward(args, socket_path=stale))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
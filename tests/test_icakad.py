@@ -2,6 +2,8 @@ import json
 import os
 import tempfile
 import unittest
+from contextlib import redirect_stdout
+from io import StringIO
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -15,6 +17,7 @@ from icakad import (
     create_paste,
     delete_short_link,
     fetch_paste,
+    list_pastes,
     list_short_links,
     update_short_link,
 )
@@ -129,6 +132,32 @@ class HighLevelHelpersTests(unittest.TestCase):
             stored = json.loads(output.read_text(encoding="utf-8"))
             self.assertEqual(stored, data)
 
+    def test_list_short_links_streams_rows_page_by_page(self):
+        fake_client = MagicMock()
+        fake_client.iter_pages.return_value = iter(
+            [MagicMock(links={"a": "https://a.test"}), MagicMock(links={"b": "https://b.test"})]
+        )
+        out = StringIO()
+        with patch("icakad._client_from_settings", return_value=fake_client), redirect_stdout(out):
+            summary = list_short_links(output_format="ndjson", page_size=50)
+        self.assertEqual(summary, {"rows": 2, "format": "ndjson"})
+        self.assertEqual(
+            [json.loads(line) for line in out.getvalue().splitlines()],
+            [{"slug": "a", "url": "https://a.test"}, {"slug": "b", "url": "https://b.test"}],
+        )
+        fake_client.iter_pages.assert_called_once_with(page_size=50)
+        fake_client.list_links.assert_not_called()
+
+    def test_list_pastes_saves_rows_as_csv(self):
+        fake_client = MagicMock()
+        fake_client.iter_pastes.return_value = iter([{"id": "a", "size": 3}, {"id": "b", "size": 5}])
+        with tempfile.TemporaryDirectory() as tmp, patch("icakad._paste_client_from_settings", return_value=fake_client):
+            output = Path(tmp) / "pastes.csv"
+            summary = list_pastes(save_to=output, output_format="csv", print_output=False)
+            self.assertEqual(output.read_text(encoding="utf-8"), "id,size\na,3\nb,5\n")
+        self.assertEqual(summary["rows"], 2)
+        fake_client.list_pastes.assert_not_called()
+
     def test_fetch_paste_raw_output(self):
         fake_client = MagicMock()
         fake_client.fetch_paste.return_value = "hello world"
@@ -162,20 +191,30 @@ class HighLevelHelpersTests(unittest.TestCase):
 
 class AITests(unittest.TestCase):
     def test_ask_posts_prompt_to_worker(self):
-        with patch("icakad.ai.requests.post") as mocked_post:
-            mocked_post.return_value = make_response(
-                json_data={"response": "Здрасти"}
-            )
+        shared = MagicMock()
+        shared.post.return_value = make_response(json_data={"response": "Здрасти"})
+        with patch.object(AI, "get_session", return_value=shared):
             reply = AI.ask("Hello from Pythonista")
 
         self.assertEqual(reply, "Здрасти")
-        mocked_post.assert_called_with(
+        shared.post.assert_called_with(
             "https://llama.icakad.workers.dev/",
             json={"messages": [{"role": "user", "content": "Hello from Pythonista"}]},
             headers={"Content-Type": "application/json"},
             timeout=20.0,
         )
 
+    def test_ask_reuses_one_pooled_session(self):
+        from icakad.pool import ClientRegistry
+
+        registry = ClientRegistry()
+        with patch("icakad.ai.get_registry", return_value=registry):
+            first = AI.get_session()
+            second = AI.get_session()
+        self.assertIs(first, second)
+        registry.close_all()
+        self.assertEqual(len(registry), 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,63 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from icakad.index import SlugIndex, default_index_path
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SlugIndexTests(unittest.TestCase):
+    def test_replace_all_and_lookups(self) -> None:
+        index = SlugIndex()
+        index.replace_all({"one": "https://one", "two": "https://two"}, etag='"v1"')
+        self.assertEqual(index.get("one"), "https://one")
+        self.assertIsNone(index.get("missing"))
+        self.assertIn("two", index)
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.etag, '"v1"')
+
+    def test_freshness_follows_ttl(self) -> None:
+        clock = FakeClock()
+        index = SlugIndex(ttl=60, clock=clock)
+        self.assertFalse(index.is_fresh())
+        index.replace_all({})
+        self.assertTrue(index.is_fresh())
+        clock.now += 61
+        self.assertFalse(index.is_fresh())
+        index.touch()
+        self.assertTrue(index.is_fresh())
+
+    def test_local_edits_drop_the_etag(self) -> None:
+        index = SlugIndex()
+        index.replace_all({"one": "https://one"}, etag='"v1"')
+        index.upsert("two", "https://two")
+        self.assertIsNone(index.etag)
+        index.delete("one")
+        self.assertEqual(index.as_dict(), {"two": "https://two"})
+
+    def test_contents_persist_on_disk(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "nested" / "slugs.sqlite3"
+            first = SlugIndex(path)
+            first.replace_all({"one": "https://one"}, etag='"v1"')
+            first.close()
+            reopened = SlugIndex(path)
+            self.assertEqual(reopened.get("one"), "https://one")
+            self.assertEqual(reopened.etag, '"v1"')
+            self.assertTrue(reopened.is_fresh())
+            reopened.close()
+
+    def test_default_path_depends_on_base_url(self) -> None:
+        self.assertEqual(default_index_path("https://a.test/"), default_index_path("https://a.test"))
+        self.assertNotEqual(default_index_path("https://a.test"), default_index_path("https://b.test"))
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,101 @@
+import json
+import unittest
+
+from icakad.common.jsonstream import iter_array_items, iter_chunks, validate_json
+
+KEYS = ("items", "list")
+
+
+class IterArrayItemsTests(unittest.TestCase):
+    def test_any_chunking_yields_the_same_items(self) -> None:
+        items = [{"slug": f"слъг-{i}", "url": f"https://x/{i}", "score": 1.5e3} for i in range(200)]
+        document = {"meta": {"nested": [1, {"tricky": "]},"}]}, "items": items, "done": True}
+        raw = json.dumps(document, ensure_ascii=False).encode("utf-8")
+        for size in (1, 2, 3, 7, 64, len(raw)):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_array_items(iter_chunks(raw, size), KEYS)), items)
+
+    def test_top_level_arrays_and_split_numbers(self) -> None:
+        self.assertEqual(list(iter_array_items(iter_chunks(b"[10, 200,3000]", 1), KEYS)), [10, 200, 3000])
+
+    def test_empty_array_falls_through_to_next_key(self) -> None:
+        raw = '{"items": [], "other": {"a": 1}, "list": [{"key": "k"}]}'
+        self.assertEqual(list(iter_array_items([raw], KEYS)), [{"key": "k"}])
+
+    def test_key_order_wins_over_document_order(self) -> None:
+        cases = {
+            b'{"list": [1, 2], "items": [3]}': [3],
+            b'{"list": [1, 2], "items": []}': [1, 2],
+            b'{"list": [1, 2]}': [1, 2],
+            b'{"list": [1], "items": {"odd": true}}': [],
+        }
+        for raw, expected in cases.items():
+            for size in (1, 4, len(raw)):
+                with self.subTest(raw=raw, size=size):
+                    self.assertEqual(list(iter_array_items(iter_chunks(raw, size), KEYS)), expected)
+                    self.assertEqual(list(iter_array_items(iter_chunks(raw, size), KEYS, {})), expected)
+
+    def test_documents_without_matching_keys_yield_nothing(self) -> None:
+        self.assertEqual(list(iter_array_items([b'{"ok": true}'], KEYS)), [])
+        self.assertEqual(list(iter_array_items([b'"scalar"'], KEYS)), [])
+        self.assertEqual(list(iter_array_items([], KEYS)), [])
+
+    def test_malformed_input_raises_value_error(self) -> None:
+        malformed = (
+            b'{"items": [1,',
+            b'{"items": [1 2]}',
+            b'{"items": [,1]}',
+            b'{"items" [1]}',
+            b'{"items": [{"a": }]}',
+        )
+        for raw in malformed:
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                list(iter_array_items(iter_chunks(raw, 3), KEYS))
+
+    def test_items_are_produced_before_the_input_is_exhausted(self) -> None:
+        consumed = []
+
+        def chunks():
+            yield b'{"items": [1, 2, '
+            consumed.append("first")
+            yield b"3]}"
+            consumed.append("second")
+
+        iterator = iter_array_items(chunks(), KEYS)
+        self.assertEqual(next(iterator), 1)
+        self.assertEqual(consumed, [])
+
+
+class MembersTests(unittest.TestCase):
+    def test_members_after_the_array_are_collected(self) -> None:
+        raw = b'{"items": [1, 2], "cursor": "next", "list": [9], "info": {"n": 2}}'
+        for size in (1, 4):
+            members: dict = {}
+            items = list(iter_array_items(iter_chunks(raw, size), KEYS, members))
+            self.assertEqual(items, [1, 2])
+            self.assertEqual(members, {"cursor": "next", "info": {"n": 2}})
+
+
+class ValidateJSONTests(unittest.TestCase):
+    def test_valid_documents_pass_at_any_chunking(self) -> None:
+        documents = (b'{"pastes": [{"id": "a", "ttl": 3.5e2}], "ok": true}', b"[]", b" 3.25 ", b'"x"')
+        for raw in documents:
+            for size in (1, 2, 5):
+                with self.subTest(raw=raw, size=size):
+                    validate_json(iter_chunks(raw, size))
+
+    def test_malformed_documents_raise(self) -> None:
+        malformed = (b"", b"[1,]", b'{"a": 1,}', b"{1: 2}", b'{"a": [1]', b"[1] [2]", b"[3.]")
+        for raw in malformed:
+            with self.subTest(raw=raw), self.assertRaises(ValueError):
+                validate_json(iter_chunks(raw, 2))
+
+    def test_numbers_split_inside_fraction_or_exponent(self) -> None:
+        raw = b"[3.5, 1e5, -2.25E-3]"
+        for size in (1, 2, 3):
+            with self.subTest(size=size):
+                self.assertEqual(list(iter_array_items(iter_chunks(raw, size), KEYS)), [3.5, 1e5, -2.25e-3])
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
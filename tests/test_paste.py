@@ -1,9 +1,15 @@
+import hashlib
+import io
+import json
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import requests
 
-from icakad.paste import PasteClient, PasteError
+from icakad.paste import PasteClient, PasteError, _json_text_chunks
+from icakad.transport import NO_RETRY
 
 
 class DummyResponse:
@@ -13,6 +19,14 @@ class DummyResponse:
         self.text = text
         self.reason = reason
 
+    def iter_content(self, chunk_size: int = 1):
+        body = self.text if isinstance(self.text, bytes) else self.text.encode("utf-8")
+        for start in range(0, len(body), 4):
+            yield body[start : start + 4]
+
+    def close(self) -> None:
+        pass
+
     def raise_for_status(self) -> None:
         if self.status_code >= 400:
             raise requests.HTTPError("boom")
@@ -80,6 +94,215 @@ class PasteClientTests(unittest.TestCase):
         result = client.list_pastes()
         self.assertEqual(result, {"pastes": []})
 
+    def test_iter_pastes_streams_listing_entries(self) -> None:
+        session = MagicMock()
+        session.get.return_value = DummyResponse(
+            text='{"ok": true, "pastes": [{"id": "a", "size": 1}, "junk", {"id": "b"}]}'
+        )
+        client = PasteClient(base_url="https://example.com", session=session)
+        self.assertEqual(list(client.iter_pastes()), [{"id": "a", "size": 1}, {"id": "b"}])
+        self.assertTrue(session.get.call_args.kwargs["stream"])
+
+    def test_iter_pastes_raises_paste_error_for_http_failures(self) -> None:
+        session = MagicMock()
+        session.get.return_value = DummyResponse(status=503, text="down")
+        client = PasteClient(base_url="https://example.com", session=session, retry=NO_RETRY)
+        with self.assertRaises(PasteError):
+            list(client.iter_pastes())
+
+
+class PasteMetadataIndexTests(unittest.TestCase):
+    def _session(self, listing):
+        session = MagicMock()
+
+        def get(url, **kwargs):
+            if url.endswith("/api/list"):
+                return DummyResponse(payload=listing)
+            paste_id = url.rsplit("/", 1)[-1]
+            return DummyResponse(text=f"body of {paste_id}")
+
+        session.get.side_effect = get
+        return session
+
+    def _listing_calls(self, session) -> int:
+        return sum(1 for call in session.get.call_args_list if call.args[0].endswith("/api/list"))
+
+    def test_listing_is_downloaded_once_for_many_fetches(self) -> None:
+        listing = {"pastes": [{"id": f"p{i}", "size": i, "text": "x"} for i in range(5)]}
+        session = self._session(listing)
+        client = PasteClient(base_url="https://example.com", session=session)
+        for i in range(5):
+            fetched = client.fetch_paste(f"p{i}")
+            self.assertEqual(fetched["size"], i)
+            self.assertEqual(fetched["text"], f"body of p{i}")
+        self.assertEqual(self._listing_calls(session), 1)
+
+    def test_create_paste_and_ttl_invalidate_the_index(self) -> None:
+        session = self._session({"pastes": [{"id": "a", "size": 1}]})
+        session.post.return_value = DummyResponse(payload={"ok": True, "id": "b"})
+        client = PasteClient(base_url="https://example.com", session=session, metadata_ttl=None)
+        client.fetch_paste("a")
+        client.fetch_paste("a")
+        client.create_paste("hello")
+        client.fetch_paste("a")
+        self.assertEqual(self._listing_calls(session), 2)
+
+        client.metadata_ttl = 0
+        client.fetch_paste("a")
+        self.assertEqual(self._listing_calls(session), 3)
+
+    def test_enrichment_can_be_skipped(self) -> None:
+        session = self._session({"pastes": []})
+        client = PasteClient(base_url="https://example.com", session=session)
+        fetched = client.fetch_paste("a", enrich=False)
+        self.assertEqual(fetched, {"id": "a", "url": "https://example.com/a", "text": "body of a"})
+        self.assertEqual(self._listing_calls(session), 0)
+
+    def test_listing_failures_are_not_retried_on_every_fetch(self) -> None:
+        session = MagicMock()
+        session.get.return_value = DummyResponse(text="hello")
+        client = PasteClient(base_url="https://example.com", session=session)
+        with patch.object(client, "list_pastes", side_effect=PasteError("nope")) as mocked_list:
+            client.fetch_paste("a")
+            client.fetch_paste("b")
+        self.assertEqual(mocked_list.call_count, 1)
+
+    def test_listing_without_pastes_is_not_refetched(self) -> None:
+        session = self._session({"ok": True})
+        client = PasteClient(base_url="https://example.com", session=session)
+        self.assertNotIn("size", client.fetch_paste("a"))
+        client.fetch_paste("b")
+        self.assertEqual(self._listing_calls(session), 1)
+
+    def test_fetch_pastes_uses_a_single_listing_call(self) -> None:
+        listing = {"pastes": [{"id": "a", "lang": "py"}, {"id": "b", "lang": "md"}]}
+        session = self._session(listing)
+        client = PasteClient(base_url="https://example.com", session=session)
+        results = client.fetch_pastes(["b", "a", "c"])
+        self.assertEqual([r["id"] for r in results], ["b", "a", "c"])
+        self.assertEqual(results[0]["lang"], "md")
+        self.assertNotIn("lang", results[2])
+        self.assertEqual(self._listing_calls(session), 1)
+
+
+class DownloadPasteTests(unittest.TestCase):
+    BODY = "ред 1\nline 2\n".encode("utf-8") * 50
+
+    def test_download_to_path_streams_bytes_and_checksums(self) -> None:
+        session = MagicMock()
+        session.get.return_value = DummyResponse(text=self.BODY)
+        client = PasteClient(base_url="https://example.com", session=session)
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "out" / "paste.log"
+            summary = client.download_paste("abc", target, checksum="sha256")
+            self.assertEqual(target.read_bytes(), self.BODY)
+            self.assertFalse(target.with_name("paste.log.part").exists())
+        self.assertEqual(summary["bytes"], len(self.BODY))
+        self.assertEqual(summary["digest"], hashlib.sha256(self.BODY).hexdigest())
+        self.assertTrue(session.get.call_args.kwargs["stream"])
+        self.assertEqual(session.get.call_args.args[0], "https://example.com/raw/abc")
+
+    def test_download_to_binary_stream(self) -> None:
+        session = MagicMock()
+        session.get.return_value = DummyResponse(text=self.BODY)
+        client = PasteClient(base_url="https://example.com", session=session)
+        sink = io.BytesIO()
+        summary = client.download_paste("abc", sink)
+        self.assertEqual(sink.getvalue(), self.BODY)
+        self.assertNotIn("digest", summary)
+
+    def test_failed_download_leaves_no_file(self) -> None:
+        session = MagicMock()
+        session.get.return_value = DummyResponse(status=404, text="missing")
+        client = PasteClient(base_url="https://example.com", session=session)
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "paste.log"
+            with self.assertRaises(PasteError):
+                client.download_paste("abc", target)
+            self.assertEqual(list(Path(tmp).iterdir()), [])
+
+
+class UploadPasteTests(unittest.TestCase):
+    def _client(self):
+        session = MagicMock()
+        bodies = []
+
+        def post(url, *, params, data, headers, timeout):
+            bodies.append(data if isinstance(data, (bytes, str)) else None)
+            if hasattr(data, "read"):
+                bodies[-1] = ("file", data.read())
+            elif bodies[-1] is None:
+                bodies[-1] = ("chunks", b"".join(data))
+            return DummyResponse(payload={"ok": True, "id": "new"})
+
+        session.post.side_effect = post
+        return PasteClient(base_url="https://example.com", token="tok", session=session), session, bodies
+
+    def test_regular_files_are_sent_as_file_objects(self) -> None:
+        client, session, bodies = self._client()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "big.log"
+            path.write_bytes(b"line\n" * 1000)
+            result = client.upload_paste(path, paste_id="x", ttl=60)
+        self.assertTrue(result["ok"])
+        self.assertEqual(bodies, [("file", b"line\n" * 1000)])
+        kwargs = session.post.call_args.kwargs
+        self.assertEqual(kwargs["params"], {"id": "x", "ttl": 60})
+        self.assertEqual(kwargs["headers"]["Content-Type"], "text/plain; charset=utf-8")
+
+    def test_open_files_are_sent_from_their_current_position(self) -> None:
+        client, _, bodies = self._client()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "report.txt"
+            path.write_bytes(b"HEADER\nbody\n")
+            with path.open("rb") as fh:
+                fh.readline()
+                client.upload_paste(fh, chunk_size=4)
+        self.assertEqual(bodies, [("file", b"body\n")])
+
+    def test_pipes_are_streamed_in_chunks(self) -> None:
+        client, _, bodies = self._client()
+
+        class Pipe(io.RawIOBase):
+            def __init__(self, data: bytes) -> None:
+                self._data = io.BytesIO(data)
+
+            def readable(self) -> bool:
+                return True
+
+            def read(self, size: int = -1) -> bytes:
+                return self._data.read(size)
+
+        client.upload_paste(Pipe(b"abcdef" * 10), chunk_size=4)
+        self.assertEqual(bodies, [("chunks", b"abcdef" * 10)])
+
+    def test_stdin_is_used_for_dash(self) -> None:
+        client, _, bodies = self._client()
+        fake_stdin = MagicMock()
+        fake_stdin.buffer = io.BytesIO(b"from a pipe")
+        with patch("icakad.paste.sys.stdin", fake_stdin):
+            client.upload_paste("-", as_plaintext=False)
+        self.assertEqual(json.loads(bodies[0][1]), {"text": "from a pipe"})
+
+    def test_json_mode_encodes_incrementally(self) -> None:
+        raw = 'здравей "свят"\n\t\\'.encode("utf-8")
+        pieces = [raw[i : i + 1] for i in range(len(raw))]
+        encoded = b"".join(_json_text_chunks(pieces))
+        self.assertEqual(json.loads(encoded), {"text": raw.decode("utf-8")})
+
+    def test_empty_sources_are_rejected(self) -> None:
+        client, session, _ = self._client()
+        with self.assertRaises(ValueError):
+            client.upload_paste(io.BytesIO(b""))
+        with self.assertRaises(ValueError):
+            client.upload_paste(io.BytesIO(b" \n\t\r\n" * 5), chunk_size=4)
+        session.post.assert_not_called()
+
+    def test_leading_whitespace_is_kept_when_there_is_content(self) -> None:
+        client, _, bodies = self._client()
+        client.upload_paste(io.BytesIO(b"\n\n\n\n  text\n"), chunk_size=2, as_plaintext=False)
+        self.assertEqual(json.loads(bodies[0][1]), {"text": "\n\n\n\n  text\n"})
+
 
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
@@ -0,0 +1,236 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Set, Tuple
+from unittest.mock import patch
+
+from icakad import _client_from_settings, _paste_client_from_settings
+from icakad.common.concurrency import ordered_map
+from icakad.config import Settings
+from icakad.paste import PasteClient
+from icakad.pool import ClientRegistry, ThreadSessions, make_session
+from icakad.shorturl import ShortURLClient
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Keep-alive handler answering ``GET /raw/<id>`` with ``<id>``."""
+
+    protocol_version = "HTTP/1.1"
+    peers: Set[Tuple[str, int]] = set()
+    lock = threading.Lock()
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        with self.lock:
+            self.peers.add(self.client_address)
+        body = self.path.rsplit("/", 1)[-1].encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MakeSessionTests(unittest.TestCase):
+    def test_adapters_use_requested_pool_sizes(self) -> None:
+        session = make_session(pool_connections=3, pool_maxsize=32, pool_block=True)
+        adapter = session.get_adapter("https://linkove.icu")
+        self.assertEqual(adapter._pool_connections, 3)
+        self.assertEqual(adapter._pool_maxsize, 32)
+        self.assertTrue(adapter._pool_block)
+        session.close()
+
+
+class ThreadSessionsTests(unittest.TestCase):
+    def test_each_thread_gets_its_own_session_over_one_pool(self) -> None:
+        sessions = ThreadSessions(pool_maxsize=16)
+        mine = sessions.get()
+        self.assertIs(sessions.get(), mine)
+        others = []
+        thread = threading.Thread(target=lambda: others.append(sessions.get()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(others[0], mine)
+        self.assertIs(others[0].get_adapter("https://a.test"), mine.get_adapter("https://a.test"))
+        self.assertEqual(mine.get_adapter("https://a.test")._pool_maxsize, 16)
+        with patch.object(mine, "close") as mocked_close:
+            sessions.close()
+        mocked_close.assert_called_once_with()
+
+    def test_clients_are_safe_under_heavy_thread_concurrency(self) -> None:
+        EchoHandler.peers = set()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        client = PasteClient(base, pool_maxsize=8, pool_block=True)
+        self.addCleanup(client.close)
+
+        ids = [f"p{i}" for i in range(320)]
+        fetch = lambda paste_id: client.fetch_paste(paste_id, raw=True)  # noqa: E731
+        outcomes = list(ordered_map(fetch, ids, max_workers=64))
+
+        self.assertEqual([error for _, _, error in outcomes], [None] * len(ids))
+        self.assertEqual([result for _, result, _ in outcomes], ids)
+        # A blocking pool of 8 never opens more than 8 connections.
+        self.assertLessEqual(len(EchoHandler.peers), 8)
+
+    def test_explicit_session_is_used_as_is(self) -> None:
+        session = make_session()
+        client = ShortURLClient("https://a.test", session=session)
+        self.assertIs(client._session, session)
+        with patch.object(session, "close") as mocked_close:
+            client.close()
+        mocked_close.assert_not_called()
+        session.close()
+
+
+class ClientRegistryTests(unittest.TestCase):
+    def test_same_key_reuses_client_and_session(self) -> None:
+        registry = ClientRegistry()
+        first = registry.get(ShortURLClient, base_url="https://a.test/", token="t", timeout=5)
+        second = registry.get(ShortURLClient, base_url="https://a.test", token="t", timeout=5)
+        self.assertIs(first, second)
+        self.assertEqual(first.timeout, 5)
+        self.assertEqual(len(registry), 1)
+        registry.close_all()
+
+    def test_distinct_keys_get_distinct_clients(self) -> None:
+        registry = ClientRegistry()
+        one = registry.get(ShortURLClient, base_url="https://a.test", token="t1")
+        two = registry.get(ShortURLClient, base_url="https://a.test", token="t2")
+        paste = registry.get(PasteClient, base_url="https://a.test", token="t1")
+        self.assertIsNot(one, two)
+        self.assertIsInstance(paste, PasteClient)
+        self.assertEqual(len(registry), 3)
+        registry.close_all()
+
+    def test_idle_clients_are_evicted_and_closed(self) -> None:
+        clock = FakeClock()
+        registry = ClientRegistry(idle_timeout=10, clock=clock)
+        client = registry.get(ShortURLClient, base_url="https://a.test")
+        with patch.object(client._session, "close") as mocked_close:
+            clock.now = 11
+            self.assertEqual(registry.evict_idle(), 1)
+            mocked_close.assert_called_once_with()
+        self.assertEqual(len(registry), 0)
+        replacement = registry.get(ShortURLClient, base_url="https://a.test")
+        self.assertIsNot(client, replacement)
+        registry.close_all()
+
+    def test_recent_use_keeps_client_alive(self) -> None:
+        clock = FakeClock()
+        registry = ClientRegistry(idle_timeout=10, clock=clock)
+        client = registry.get(ShortURLClient, base_url="https://a.test")
+        clock.now = 8
+        registry.get(ShortURLClient, base_url="https://a.test")
+        clock.now = 16
+        self.assertIs(registry.get(ShortURLClient, base_url="https://a.test"), client)
+        registry.close_all()
+
+    def test_close_all_closes_every_session(self) -> None:
+        registry = ClientRegistry()
+        clients = [
+            registry.get(ShortURLClient, base_url="https://a.test"),
+            registry.get(PasteClient, base_url="https://b.test"),
+        ]
+        patches = [patch.object(c._session, "close") for c in clients]
+        mocks = [p.start() for p in patches]
+        try:
+            registry.close_all()
+        finally:
+            for p in patches:
+                p.stop()
+        for mocked in mocks:
+            mocked.assert_called_once_with()
+        self.assertEqual(len(registry), 0)
+
+    def test_named_sessions_are_shared_and_closed(self) -> None:
+        registry = ClientRegistry()
+        session = registry.session("ai", pool_maxsize=20)
+        self.assertIs(registry.session("ai"), session)
+        self.assertEqual(session.get_adapter("https://x.test")._pool_maxsize, 20)
+        with patch.object(session, "close") as mocked_close:
+            registry.close_all()
+        mocked_close.assert_called_once_with()
+
+    def test_named_sessions_are_per_thread_over_one_pool(self) -> None:
+        registry = ClientRegistry()
+        main = registry.session("ai")
+        other = []
+        thread = threading.Thread(target=lambda: other.append(registry.session("ai")))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], main)
+        self.assertIs(other[0].get_adapter("https://x.test"), main.get_adapter("https://x.test"))
+        self.assertEqual(len(registry), 1)
+        registry.close_all()
+
+    def test_configure_applies_to_new_clients(self) -> None:
+        registry = ClientRegistry()
+        registry.configure(pool_maxsize=64)
+        client = registry.get(ShortURLClient, base_url="https://a.test")
+        self.assertEqual(client._session.get_adapter("https://a.test")._pool_maxsize, 64)
+        registry.close_all()
+
+    def test_concurrent_lookups_create_a_single_client(self) -> None:
+        registry = ClientRegistry()
+        seen = []
+
+        def worker() -> None:
+            seen.append(registry.get(ShortURLClient, base_url="https://a.test"))
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(client) for client in seen}), 1)
+        registry.close_all()
+
+
+class HelperFactoryTests(unittest.TestCase):
+    def test_helpers_reuse_pooled_clients(self) -> None:
+        registry = ClientRegistry()
+        settings = Settings(shorturl_base="https://short.test", paste_base="https://paste.test", token="tok")
+        with patch("icakad.get_registry", return_value=registry):
+            first = _client_from_settings(settings=settings)
+            second = _client_from_settings(settings=settings)
+            paste = _paste_client_from_settings(settings=settings)
+        self.assertIs(first, second)
+        self.assertEqual(first.base_url, "https://short.test")
+        self.assertEqual(paste.base_url, "https://paste.test")
+        registry.close_all()
+
+    def test_settings_size_the_client_pool(self) -> None:
+        registry = ClientRegistry()
+        settings = Settings(shorturl_base="https://short.test", pool_maxsize=64, pool_block=True)
+        with patch("icakad.get_registry", return_value=registry):
+            client = _client_from_settings(settings=settings)
+        self.assertEqual((client.pool_maxsize, client.pool_block), (64, True))
+        self.assertEqual(client._session.get_adapter("https://short.test")._pool_maxsize, 64)
+        registry.close_all()
+
+    def test_base_url_override_is_honoured(self) -> None:
+        registry = ClientRegistry()
+        with patch("icakad.get_registry", return_value=registry):
+            client = _client_from_settings(base_url="https://override.test", token="tok")
+        self.assertEqual(client.base_url, "https://override.test")
+        self.assertEqual(client.token, "tok")
+        registry.close_all()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+import unittest
+from typing import List
+from unittest.mock import MagicMock, patch
+
+from icakad import _client_from_settings
+from icakad.config import Settings
+from icakad.pool import ClientRegistry
+from icakad.ratelimit import (
+    TokenBucket,
+    configure_rate_limits,
+    get_rate_limiter,
+    origin,
+    parse_rate_limits,
+    reset_rate_limits,
+)
+from icakad.shorturl import ShortURLClient
+
+
+class FakeClock:
+    """Clock whose sleep advances time instantly."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: List[float] = []
+        self._lock = threading.Lock()
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+    async def async_sleep(self, seconds: float) -> None:
+        self.sleep(seconds)
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_burst_then_paced_at_rate(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            self.assertEqual(bucket.acquire(), 0.0)
+        self.assertAlmostEqual(bucket.acquire(), 0.1)
+        self.assertFalse(bucket.try_acquire())
+        clock.now += 0.1
+        self.assertTrue(bucket.try_acquire())
+
+    def test_async_acquire_shares_tokens_with_threads(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep, async_sleep=clock.async_sleep)
+        self.assertEqual(bucket.acquire(), 0.0)
+        self.assertEqual(asyncio.run(bucket.acquire_async()), 0.0)
+        self.assertAlmostEqual(asyncio.run(bucket.acquire_async()), 0.1)
+        bucket.on_throttle(retry_after=2)
+        self.assertGreaterEqual(asyncio.run(bucket.acquire_async()), 2.0)
+
+    def test_throttle_halves_rate_and_honours_retry_after(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=8, burst=1, clock=clock, sleep=clock.sleep)
+        bucket.on_throttle(retry_after=2)
+        self.assertEqual(bucket.rate, 4)
+        self.assertEqual(bucket.throttled, 1)
+        waited = bucket.acquire()
+        self.assertGreaterEqual(waited, 2.0)
+
+    def test_rate_recovers_on_success_but_not_beyond_max(self) -> None:
+        bucket = TokenBucket(rate=10, min_rate=1)
+        for _ in range(10):
+            bucket.on_throttle()
+        self.assertEqual(bucket.rate, 1)
+        for _ in range(100):
+            bucket.on_success()
+        self.assertEqual(bucket.rate, 10)
+
+    def test_invalid_rate_is_rejected(self) -> None:
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+
+
+class RegistryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        reset_rate_limits()
+        self.addCleanup(reset_rate_limits)
+
+    def test_unconfigured_origins_are_unlimited(self) -> None:
+        self.assertIsNone(get_rate_limiter("https://linkove.icu/api"))
+
+    def test_origin_keeps_only_scheme_and_host(self) -> None:
+        self.assertEqual(origin("HTTPS://Linkove.ICU:8443/api?x=1"), "https://linkove.icu:8443")
+        self.assertEqual(origin("linkove.icu/api"), "https://linkove.icu")
+        self.assertEqual(origin("*"), "*")
+
+    def test_buckets_are_shared_per_origin(self) -> None:
+        configure_rate_limits({"https://linkove.icu/": {"rate": 5, "burst": 2}, "*": 50})
+        short = get_rate_limiter("https://linkove.icu/api")
+        paste = get_rate_limiter("https://LINKOVE.icu/api/paste")
+        other = get_rate_limiter("https://llama.icakad.workers.dev/")
+        self.assertIs(short, paste)
+        self.assertEqual((short.max_rate, short.burst), (5, 2))
+        self.assertEqual(other.max_rate, 50)
+        self.assertIsNot(other, get_rate_limiter("https://elsewhere.test/"))
+
+    def test_reconfiguring_keeps_unchanged_buckets(self) -> None:
+        configure_rate_limits({"https://a.test": 5})
+        bucket = get_rate_limiter("https://a.test")
+        configure_rate_limits({"https://a.test": 5})
+        self.assertIs(get_rate_limiter("https://a.test"), bucket)
+        configure_rate_limits({"https://a.test": 6})
+        self.assertIsNot(get_rate_limiter("https://a.test"), bucket)
+        configure_rate_limits({}, replace=True)
+        self.assertIsNone(get_rate_limiter("https://a.test"))
+
+    def test_parse_rejects_bad_values(self) -> None:
+        self.assertEqual(parse_rate_limits({"a.test": 3}), {"https://a.test": (3.0, 3.0)})
+        with self.assertRaises(ValueError):
+            parse_rate_limits({"https://a.test": {"rate": "fast"}})
+        with self.assertRaises(ValueError):
+            parse_rate_limits({"https://a.test": -1})
+
+    def test_clients_throttle_and_adapt_through_the_transport(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=100, burst=1, clock=clock, sleep=clock.sleep)
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        ok = MagicMock(status_code=200, headers={})
+        ok.json.return_value = {"ok": True}
+        session = MagicMock()
+        session.delete.side_effect = [throttled, ok]
+        client = ShortURLClient("https://short.test", session=session, rate_limiter=bucket)
+        client._transport._sleep = clock.sleep
+
+        client.delete_link("a")
+
+        self.assertEqual(session.delete.call_count, 2)
+        self.assertEqual(bucket.throttled, 1)
+        self.assertLess(bucket.rate, 100)
+
+    def test_settings_configure_the_shared_limits(self) -> None:
+        registry = ClientRegistry()
+        settings = Settings(shorturl_base="https://short.test", rate_limits={"https://short.test": 7})
+        with patch("icakad.get_registry", return_value=registry):
+            _client_from_settings(settings=settings)
+        self.assertEqual(get_rate_limiter("https://short.test/api").max_rate, 7)
+        registry.close_all()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
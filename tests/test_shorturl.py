@@ -1,18 +1,48 @@
+import json
+import tempfile
 import unittest
+from pathlib import Path
 from typing import Any
 
 import requests
 from unittest.mock import MagicMock
 
-from icakad.shorturl import DEFAULT_TIMEOUT, ShortURLClient, ShortURLError, _extract_items
+from icakad.index import SlugIndex
+from icakad.shorturl import (
+    DEFAULT_TIMEOUT,
+    BulkOperation,
+    LinkPage,
+    ShortURLClient,
+    ShortURLError,
+    _extract_items,
+    read_bulk_operations,
+)
 
 
 class DummyResponse:
-    def __init__(self, *, status: int = 200, payload: Any = None, text: str = "", reason: str = "ERR") -> None:
+    def __init__(
+        self,
+        *,
+        status: int = 200,
+        payload: Any = None,
+        text: str = "",
+        reason: str = "ERR",
+        headers: Any = None,
+    ) -> None:
         self.status_code = status
         self._payload = payload
         self.text = text
         self.reason = reason
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, chunk_size: int = 1):
+        body = self.text.encode("utf-8")
+        for start in range(0, len(body), 5):
+            yield body[start : start + 5]
+
+    def close(self) -> None:
+        self.closed = True
 
     def raise_for_status(self) -> None:
         if self.status_code >= 400:
@@ -72,6 +102,61 @@ class ShortURLHelpersTests(unittest.TestCase):
         with self.assertRaises(ShortURLError):
             client.list_links()
 
+    def test_iter_links_streams_normalized_pairs(self) -> None:
+        session = MagicMock(spec=requests.Session)
+        body = {
+            "list": [
+                {"key": "one", "value": "https://one"},
+                {"name": "two", "url": "https://two"},
+                {"slug": 123, "url": "skip"},
+            ]
+        }
+        response = DummyResponse(text=json.dumps(body))
+        session.get.return_value = response
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        pairs = list(client.iter_links())
+        self.assertEqual(pairs, [("one", "https://one"), ("two", "https://two")])
+        self.assertTrue(session.get.call_args.kwargs["stream"])
+        self.assertTrue(response.closed)
+
+    def test_iter_links_follows_cursors(self) -> None:
+        session = MagicMock(spec=requests.Session)
+        pages = [
+            {"items": [{"slug": "one", "url": "https://one"}], "cursor": "c1", "list_complete": False},
+            {"result_info": {"cursor": "c2"}, "items": [{"slug": "two", "url": "https://two"}]},
+            # A repeated cursor ends the listing instead of looping.
+            {"items": [{"slug": "three", "url": "https://three"}], "cursor": "c2"},
+        ]
+        responses = [DummyResponse(text=json.dumps(page)) for page in pages]
+        session.get.side_effect = responses
+        client = ShortURLClient(base_url="https://example.com", session=session)
+
+        pairs = list(client.iter_links())
+
+        self.assertEqual([slug for slug, _ in pairs], ["one", "two", "three"])
+        cursors = [call.kwargs.get("params", {}).get("cursor") for call in session.get.call_args_list]
+        self.assertEqual(cursors, [None, "c1", "c2"])
+        self.assertTrue(all(response.closed for response in responses))
+
+    def test_iter_links_and_list_links_agree_on_key_priority(self) -> None:
+        body = {
+            "list": [{"slug": "from-list", "url": "https://list"}],
+            "items": [{"slug": "from-items", "url": "https://items"}],
+        }
+        session = MagicMock(spec=requests.Session)
+        session.get.side_effect = [DummyResponse(text=json.dumps(body)), DummyResponse(payload=body)]
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        streamed = dict(client.iter_links())
+        self.assertEqual(streamed, {"from-items": "https://items"})
+        self.assertEqual(streamed, client.list_links())
+
+    def test_iter_links_maps_invalid_json(self) -> None:
+        session = MagicMock(spec=requests.Session)
+        session.get.return_value = DummyResponse(text='{"items": [{"slug": ')
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        with self.assertRaises(ShortURLError):
+            list(client.iter_links())
+
     def test_json_helper_rejects_non_dict_payloads(self) -> None:
         client = ShortURLClient(base_url="https://example.com")
         response = DummyResponse(payload=["unexpected"])
@@ -83,5 +168,153 @@ class ShortURLHelpersTests(unittest.TestCase):
         self.assertEqual(client.timeout, DEFAULT_TIMEOUT)
 
 
+class PagedSession:
+    """Serves three cursor-linked pages and records the params of each call."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.pages = {
+            None: {"items": [{"slug": "a", "url": "https://a"}], "cursor": "c1", "list_complete": False},
+            "c1": {"items": [{"slug": "b", "url": "https://b"}], "cursor": "c2", "list_complete": False},
+            "c2": {"items": [{"slug": "c", "url": "https://c"}], "list_complete": True},
+        }
+
+    def get(self, url, *, headers, timeout, params=None):
+        self.calls.append(params)
+        cursor = (params or {}).get("cursor")
+        return DummyResponse(payload=self.pages[cursor])
+
+
+class PaginationTests(unittest.TestCase):
+    def test_list_links_follows_cursors(self) -> None:
+        session = PagedSession()
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        links = client.list_links(page_size=1)
+        self.assertEqual(links, {"a": "https://a", "b": "https://b", "c": "https://c"})
+        self.assertEqual(
+            session.calls,
+            [{"limit": 1}, {"cursor": "c1", "limit": 1}, {"cursor": "c2", "limit": 1}],
+        )
+
+    def test_iter_pages_prefetches_in_order(self) -> None:
+        session = PagedSession()
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        pages = list(client.iter_pages(page_size=50))
+        self.assertEqual([list(page.links) for page in pages], [["a"], ["b"], ["c"]])
+        self.assertTrue(pages[-1].is_last)
+        self.assertEqual(len(session.calls), 3)
+
+    def test_iter_pages_can_be_closed_early(self) -> None:
+        session = PagedSession()
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        pages = client.iter_pages(page_size=50)
+        first = next(pages)
+        self.assertEqual(list(first.links), ["a"])
+        second = next(pages)
+        self.assertEqual(list(second.links), ["b"])
+        pages.close()
+        self.assertGreaterEqual(len(session.calls), 2)
+
+    def test_repeated_cursor_terminates_listing(self) -> None:
+        session = PagedSession()
+        session.pages["c1"]["cursor"] = "c1"
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        self.assertEqual(sorted(client.list_links()), ["a", "b"])
+
+    def test_link_page_reports_last_page(self) -> None:
+        self.assertTrue(LinkPage(links={}).is_last)
+        self.assertFalse(LinkPage(links={}, cursor="next").is_last)
+
+
+class SlugIndexIntegrationTests(unittest.TestCase):
+    def test_get_link_refreshes_once_and_then_answers_locally(self) -> None:
+        session = MagicMock(spec=requests.Session)
+        session.get.return_value = DummyResponse(
+            payload={"items": [{"slug": "one", "url": "https://one"}]},
+            headers={"ETag": '"v1"'},
+        )
+        client = ShortURLClient(base_url="https://example.com", session=session, index=SlugIndex())
+        self.assertEqual(client.get_link("one"), "https://one")
+        self.assertTrue(client.exists("one"))
+        self.assertFalse(client.exists("two"))
+        self.assertEqual(session.get.call_count, 1)
+
+    def test_refresh_sends_if_none_match_and_handles_not_modified(self) -> None:
+        session = MagicMock(spec=requests.Session)
+        index = SlugIndex()
+        index.replace_all({"one": "https://one"}, etag='"v1"')
+        session.get.return_value = DummyResponse(status=304)
+        client = ShortURLClient(base_url="https://example.com", session=session, index=index)
+        self.assertTrue(client.refresh_index(force=True))
+        _, kwargs = session.get.call_args
+        self.assertEqual(kwargs["headers"]["If-None-Match"], '"v1"')
+        self.assertEqual(index.get("one"), "https://one")
+
+    def test_mutations_update_the_index(self) -> None:
+        session = MagicMock(spec=requests.Session)
+        session.post.return_value = DummyResponse(payload={"ok": True})
+        session.delete.return_value = DummyResponse(payload={"ok": True})
+        index = SlugIndex()
+        index.replace_all({})
+        client = ShortURLClient(base_url="https://example.com", session=session, index=index)
+        client.add_link("one", "https://one")
+        client.edit_link("one", "https://uno")
+        self.assertEqual(client.get_link("one"), "https://uno")
+        client.delete_link("one")
+        self.assertFalse(client.exists("one"))
+        session.get.assert_not_called()
+
+
+class BulkOperationTests(unittest.TestCase):
+    def test_bulk_runs_every_operation_and_keeps_input_order(self) -> None:
+        session = MagicMock(spec=requests.Session)
+
+        def post(url, **kwargs):
+            if kwargs["json"]["slug"] == "bad":
+                return DummyResponse(status=500, text="nope")
+            return DummyResponse(payload={"ok": True, "slug": kwargs["json"]["slug"]})
+
+        session.post.side_effect = post
+        session.delete.return_value = DummyResponse(payload={"ok": True})
+        client = ShortURLClient(base_url="https://example.com", session=session)
+        ops = [
+            {"slug": f"s{i}", "url": f"https://t/{i}"} for i in range(20)
+        ] + [
+            {"op": "edit", "slug": "bad", "url": "https://x"},
+            BulkOperation(op="delete", slug="gone"),
+            {"op": "explode", "slug": "x"},
+        ]
+        results = client.bulk(ops, max_workers=4)
+
+        self.assertEqual([r.index for r in results], list(range(23)))
+        self.assertTrue(all(r.ok for r in results[:20]))
+        self.assertEqual(results[5].response, {"ok": True, "slug": "s5"})
+        self.assertEqual((results[20].op, results[20].ok), ("update", False))
+        self.assertIn("500", results[20].error)
+        self.assertEqual((results[21].op, results[21].ok), ("delete", True))
+        self.assertFalse(results[22].ok)
+        self.assertEqual(results[22].op, "invalid")
+        session.delete.assert_called_once()
+        self.assertEqual(session.post.call_count, 21)
+
+    def test_read_bulk_operations_from_csv_and_jsonl(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            csv_path = Path(tmp) / "links.csv"
+            csv_path.write_text("slug,url,op\none,https://one,\ntwo,,delete\n", encoding="utf-8")
+            jsonl_path = Path(tmp) / "links.jsonl"
+            jsonl_path.write_text('{"slug": "three", "url": "https://three"}\n\nnot json\n', encoding="utf-8")
+
+            from_csv = list(read_bulk_operations(csv_path))
+            from_jsonl = list(read_bulk_operations(jsonl_path, default_op="update"))
+
+        self.assertEqual(
+            from_csv,
+            [BulkOperation("add", "one", "https://one"), BulkOperation("delete", "two", None)],
+        )
+        self.assertEqual(from_jsonl[0], BulkOperation("update", "three", "https://three"))
+        self.assertIsInstance(from_jsonl[1], ValueError)
+        self.assertEqual(len(from_jsonl), 2)
+
+
 if __name__ == "__main__":  # pragma: no cover
     unittest.main()
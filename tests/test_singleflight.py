@@ -0,0 +1,176 @@
+import threading
+import time
+import unittest
+from typing import Any, Callable, List
+
+from icakad.common.singleflight import SingleFlight
+from icakad.paste import PasteClient
+from icakad.shorturl import ShortURLClient
+
+
+class FakeResponse:
+    def __init__(self, payload: Any = None, text: str = "") -> None:
+        self.status_code = 200
+        self.headers = {}
+        self.text = text
+        self._payload = payload
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self) -> Any:
+        return self._payload
+
+
+class GatedSession:
+    """Session whose GETs block until the test releases them."""
+
+    def __init__(self, respond: Callable[[str], FakeResponse]) -> None:
+        self.respond = respond
+        self.calls: List[str] = []
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.calls.append(url)
+        self.entered.set()
+        self.release.wait(5)
+        return self.respond(url)
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:  # pragma: no cover - test would hang otherwise
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+def run_concurrently(count: int, func: Callable[[], Any], session: GatedSession, stats: Any) -> List[Any]:
+    results: List[Any] = [None] * count
+
+    def worker(index: int) -> None:
+        results[index] = func()
+
+    threads = [threading.Thread(target=worker, args=(0,))]
+    threads[0].start()
+    session.entered.wait(5)
+    threads += [threading.Thread(target=worker, args=(i,)) for i in range(1, count)]
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: stats.collapsed == count - 1)
+    session.release.set()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+class SingleFlightTests(unittest.TestCase):
+    def test_concurrent_calls_share_one_execution(self) -> None:
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls: List[int] = []
+
+        def slow() -> object:
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return object()
+
+        results: List[object] = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        wait_until(lambda: flight.stats.collapsed == 4)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len({id(result) for result in results}), 1)
+        self.assertEqual(flight.stats.to_dict()["collapse_rate"], 0.8)
+        self.assertEqual(flight.in_flight(), 0)
+
+    def test_sequential_calls_are_not_cached(self) -> None:
+        flight = SingleFlight()
+        self.assertEqual(flight.do("k", lambda: 1), 1)
+        self.assertEqual(flight.do("k", lambda: 2), 2)
+        self.assertEqual((flight.stats.executions, flight.stats.collapsed), (2, 0))
+
+    def test_errors_propagate_and_clear_the_flight(self) -> None:
+        flight = SingleFlight()
+
+        def boom() -> None:
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            flight.do("k", boom)
+        self.assertEqual(flight.do("k", lambda: "ok"), "ok")
+
+
+class ClientCoalescingTests(unittest.TestCase):
+    def test_list_links_is_coalesced(self) -> None:
+        session = GatedSession(lambda url: FakeResponse({"items": [{"slug": "a", "url": "A"}]}))
+        client = ShortURLClient("https://short.test", session=session)
+
+        results = run_concurrently(4, client.list_links, session, client.coalesce_stats)
+
+        self.assertEqual(session.calls, ["https://short.test/api"])
+        self.assertTrue(all(result == {"a": "A"} for result in results))
+        self.assertEqual(client.coalesce_stats.collapsed, 3)
+
+    def test_fetch_paste_is_coalesced_per_id(self) -> None:
+        session = GatedSession(lambda url: FakeResponse(text="body"))
+        client = PasteClient("https://paste.test", session=session)
+
+        results = run_concurrently(3, lambda: client.fetch_paste("a", raw=True), session, client.coalesce_stats)
+
+        self.assertEqual(results, ["body"] * 3)
+        self.assertEqual(session.calls, ["https://paste.test/raw/a"])
+        self.assertEqual(client.fetch_paste("b", raw=True), "body")
+        self.assertEqual(client.coalesce_stats.executions, 2)
+
+    def test_enrichment_joining_a_listing_flight_does_not_deadlock(self) -> None:
+        listing = {"pastes": [{"id": "a", "size": 4}]}
+
+        class ListingGate(GatedSession):
+            def get(self, url: str, **kwargs: Any) -> FakeResponse:
+                if url.endswith("/raw/a"):
+                    return FakeResponse(text="body")
+                return super().get(url, **kwargs)
+
+        session = ListingGate(lambda url: FakeResponse(listing))
+        client = PasteClient("https://paste.test", session=session)
+        results: List[Any] = [None, None]
+
+        # A leads the listing flight; B enriches a fetch and joins that flight.
+        lister = threading.Thread(target=lambda: results.__setitem__(0, client.list_pastes()), daemon=True)
+        lister.start()
+        session.entered.wait(5)
+        fetcher = threading.Thread(target=lambda: results.__setitem__(1, client.fetch_paste("a")), daemon=True)
+        fetcher.start()
+        wait_until(lambda: client.coalesce_stats.collapsed == 1)
+        session.release.set()
+        lister.join(5)
+        fetcher.join(5)
+
+        self.assertFalse(lister.is_alive() or fetcher.is_alive())
+        self.assertEqual(results[0], listing)
+        self.assertEqual(results[1]["size"], 4)
+        self.assertEqual(session.calls, ["https://paste.test/api/list"])
+
+    def test_coalescing_can_be_disabled_per_method(self) -> None:
+        session = GatedSession(lambda url: FakeResponse({"pastes": []}))
+        session.release.set()
+        client = PasteClient("https://paste.test", session=session, coalesce={"fetch_paste"})
+        client.list_pastes()
+        self.assertEqual(client.coalesce_stats.calls, 0)
+        with self.assertRaises(ValueError):
+            PasteClient("https://paste.test", session=session, coalesce={"create_paste"})
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Regression checks for the import cost of ``icakad`` and its CLI."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+# Cumulative ``-X importtime`` budget for ``import icakad.cli`` in microseconds.
+# Importing ``requests`` alone costs roughly this much, so blowing the budget
+# almost always means an eager HTTP import sneaked back in.
+IMPORT_BUDGET_US = 100_000
+
+
+def _run(code: str, *options: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+
+class StartupTests(unittest.TestCase):
+    def test_cli_help_path_does_not_import_requests(self) -> None:
+        code = (
+            "import sys\n"
+            "import icakad, icakad.__main__\n"
+            "from icakad import cli\n"
+            "cli.build_parser(['--help'])\n"
+            "print(sorted(m for m in ('requests', 'urllib3') if m in sys.modules))\n"
+        )
+        result = _run(code)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_lazy_attributes_resolve_on_access(self) -> None:
+        code = (
+            "import sys, icakad\n"
+            "assert 'icakad.shorturl' not in sys.modules\n"
+            "print(icakad.ShortURLClient.__module__, icakad.PasteClient.__module__, icakad.AI.__module__)\n"
+        )
+        result = _run(code)
+        self.assertEqual(result.stdout.split(), ["icakad.shorturl", "icakad.paste", "icakad.ai"])
+
+    def test_cli_import_stays_within_budget(self) -> None:
+        best = None
+        for _ in range(3):
+            result = _run("import icakad.cli", "-X", "importtime")
+            for line in result.stderr.splitlines():
+                parts = [part.strip() for part in line.split("|")]
+                if len(parts) == 3 and parts[2] == "icakad.cli":
+                    cumulative = int(parts[1])
+                    best = cumulative if best is None else min(best, cumulative)
+        self.assertIsNotNone(best)
+        self.assertLess(best, IMPORT_BUDGET_US)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()
@@ -0,0 +1,329 @@
+import json
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from typing import Any, List
+from unittest.mock import MagicMock, patch
+
+import requests
+
+from icakad.ai import AI
+from icakad.paste import PasteClient, PasteError
+from icakad.shorturl import ShortURLClient, ShortURLError
+from icakad.transport import (
+    NO_RETRY,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    Timeout,
+    Transport,
+    check_response,
+)
+
+
+class FakeResponse:
+    def __init__(self, status: int = 200, *, text: str = "", headers: Any = None, payload: Any = None) -> None:
+        self.status_code = status
+        self.text = text
+        self.reason = "ERR"
+        self.headers = headers or {}
+        self._payload = payload
+        self.closed = False
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+    def json(self) -> Any:
+        return self._payload
+
+    def close(self) -> None:
+        self.closed = True
+
+    def iter_content(self, chunk_size: int) -> Any:
+        body = self.text.encode("utf-8")
+        for start in range(0, len(body), chunk_size):
+            yield body[start : start + chunk_size]
+
+
+class ScriptedSession:
+    """Returns (or raises) the scripted outcomes in order, one per call."""
+
+    def __init__(self, *outcomes: Any) -> None:
+        self.outcomes = list(outcomes)
+        self.calls: List[dict] = []
+
+    def _next(self, url: str, **kwargs: Any) -> Any:
+        self.calls.append({"url": url, **kwargs})
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    get = post = delete = _next
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_transport(session: Any, **kwargs: Any) -> Transport:
+    sleeps: List[float] = []
+    kwargs.setdefault("timeout", Timeout(read=5))
+    transport = Transport(session, sleep=sleeps.append, **kwargs)
+    transport.sleeps = sleeps  # type: ignore[attr-defined]
+    return transport
+
+
+class TimeoutTests(unittest.TestCase):
+    def test_single_value_or_connect_read_pair(self) -> None:
+        self.assertEqual(Timeout(read=10).for_requests(), 10)
+        self.assertEqual(Timeout(read=30, connect=3).for_requests(), (3, 30))
+
+    def test_clients_pass_split_timeouts(self) -> None:
+        session = ScriptedSession(FakeResponse(payload={"ok": True}))
+        client = ShortURLClient("https://short.test", session=session, timeout=30, connect_timeout=2)
+        client.delete_link("a")
+        self.assertEqual(session.calls[0]["timeout"], (2, 30))
+
+
+class RetryTests(unittest.TestCase):
+    def test_idempotent_calls_retry_transient_statuses(self) -> None:
+        session = ScriptedSession(FakeResponse(502), FakeResponse(503), FakeResponse(200, text="ok"))
+        transport = make_transport(session)
+        response = transport.request("get", "https://w.test/")
+        self.assertEqual(response.text, "ok")
+        self.assertEqual(len(session.calls), 3)
+        self.assertEqual(len(transport.sleeps), 2)
+        self.assertEqual(session.outcomes, [])
+
+    def test_backoff_is_jittered_and_capped(self) -> None:
+        policy = RetryPolicy(backoff=1.0, max_backoff=3.0)
+        self.assertEqual(policy.backoff_delay(0, rng=lambda low, high: high), 1.0)
+        self.assertEqual(policy.backoff_delay(1, rng=lambda low, high: high), 2.0)
+        self.assertEqual(policy.backoff_delay(5, rng=lambda low, high: high), 3.0)
+        self.assertEqual(policy.backoff_delay(5, rng=lambda low, high: low), 0.0)
+
+    def test_retry_after_is_honoured(self) -> None:
+        session = ScriptedSession(FakeResponse(429, headers={"Retry-After": "7"}), FakeResponse(200))
+        transport = make_transport(session)
+        transport.request("post", "https://w.test/")  # 429 is safe to retry for any method
+        self.assertEqual(transport.sleeps, [7.0])
+
+    def test_retry_after_beyond_cap_gives_up(self) -> None:
+        session = ScriptedSession(FakeResponse(503, headers={"Retry-After": "600"}))
+        transport = make_transport(session, error=ShortURLError)
+        with self.assertRaises(ShortURLError):
+            transport.request("get", "https://w.test/")
+        self.assertEqual(transport.sleeps, [])
+
+    def test_non_idempotent_posts_are_not_retried_on_5xx(self) -> None:
+        session = ScriptedSession(FakeResponse(502))
+        transport = make_transport(session, error=PasteError)
+        with self.assertRaises(PasteError):
+            transport.request("post", "https://w.test/")
+        self.assertEqual(len(session.calls), 1)
+
+    def test_connection_errors_are_retried_then_reraised(self) -> None:
+        session = ScriptedSession(
+            requests.ConnectionError("reset"),
+            requests.ReadTimeout("slow"),
+            requests.ConnectionError("reset"),
+        )
+        transport = make_transport(session, error=ShortURLError)
+        with self.assertRaises(requests.ConnectionError):
+            transport.request("get", "https://w.test/")
+        self.assertEqual(len(session.calls), 3)
+
+    def test_no_retry_policy_makes_a_single_attempt(self) -> None:
+        session = ScriptedSession(FakeResponse(503))
+        transport = make_transport(session, retry=NO_RETRY, error=ShortURLError)
+        with self.assertRaises(ShortURLError):
+            transport.request("get", "https://w.test/")
+        self.assertEqual(len(session.calls), 1)
+
+    def test_errors_map_to_client_exceptions(self) -> None:
+        session = ScriptedSession(FakeResponse(404, text="missing"))
+        transport = make_transport(session, error=PasteError)
+        with self.assertRaises(PasteError) as ctx:
+            transport.request("get", "https://w.test/")
+        self.assertEqual(str(ctx.exception), "404: missing")
+
+    def test_check_response_maps_without_a_transport(self) -> None:
+        ok = FakeResponse(204)
+        self.assertIs(check_response(ok, ShortURLError), ok)
+        with self.assertRaises(ShortURLError) as ctx:
+            check_response(FakeResponse(409, text="taken"), ShortURLError)
+        self.assertEqual(str(ctx.exception), "409: taken")
+        with self.assertRaises(requests.HTTPError):
+            check_response(FakeResponse(500))
+
+    def test_clients_retry_through_the_transport(self) -> None:
+        session = ScriptedSession(FakeResponse(502), FakeResponse(200, text="body"))
+        client = PasteClient("https://paste.test", session=session)
+        client._transport._sleep = lambda delay: None
+        self.assertEqual(client.fetch_paste("a", raw=True), "body")
+        self.assertEqual(len(session.calls), 2)
+
+
+class CircuitBreakerTests(unittest.TestCase):
+    def test_opens_after_consecutive_failures_and_recovers(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        session = ScriptedSession(FakeResponse(500), FakeResponse(500), FakeResponse(200))
+        transport = make_transport(session, breaker=breaker, error=ShortURLError)
+
+        for _ in range(2):
+            with self.assertRaises(ShortURLError):
+                transport.request("get", "https://w.test/")
+        self.assertEqual(breaker.state, "open")
+
+        with self.assertRaises(ShortURLError) as ctx:
+            transport.request("get", "https://w.test/")
+        self.assertIn("Circuit open", str(ctx.exception))
+        self.assertEqual(len(session.calls), 2)
+
+        clock.now = 10
+        self.assertEqual(breaker.state, "half-open")
+        transport.request("get", "https://w.test/")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_trial_reopens_the_circuit(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # only one trial at a time
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+    def test_trial_raising_other_errors_is_released(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+        breaker.record_failure()
+        clock.now = 5
+        session = ScriptedSession(requests.TooManyRedirects("loop"), FakeResponse(200))
+        transport = make_transport(session, breaker=breaker, error=ShortURLError)
+        with self.assertRaises(requests.TooManyRedirects):
+            transport.request("get", "https://w.test/")
+        self.assertEqual(breaker.state, "half-open")
+        transport.request("get", "https://w.test/")  # the next trial is let through
+        self.assertEqual(breaker.state, "closed")
+
+    def test_open_circuit_without_error_type(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        transport = make_transport(ScriptedSession(), breaker=breaker)
+        with self.assertRaises(CircuitOpenError):
+            transport.request("get", "https://w.test/")
+
+    def test_client_errors_do_not_trip_the_breaker(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1)
+        session = ScriptedSession(FakeResponse(404))
+        transport = make_transport(session, breaker=breaker, error=ShortURLError)
+        with self.assertRaises(ShortURLError):
+            transport.request("get", "https://w.test/")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_throttling_does_not_trip_the_breaker(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=2)
+        session = ScriptedSession(*[FakeResponse(429, headers={"Retry-After": "0"})] * 3)
+        transport = make_transport(session, breaker=breaker, error=ShortURLError)
+        with self.assertRaises(ShortURLError):
+            transport.request("get", "https://w.test/")
+        self.assertEqual(breaker.state, "closed")
+
+    def test_bulk_job_recovers_after_a_429_burst(self) -> None:
+        throttled = [FakeResponse(429, headers={"Retry-After": "0"}) for _ in range(8)]
+        accepted = [FakeResponse(200, payload={"ok": True}) for _ in range(6)]
+        session = ScriptedSession(*throttled, *accepted)
+        client = ShortURLClient("https://short.test", session=session)
+        client._transport._sleep = lambda delay: None
+
+        operations = [{"op": "add", "slug": f"s{i}", "url": "https://example.com"} for i in range(6)]
+        results = client.bulk(operations, max_workers=1)
+
+        # The first two ops exhaust their retries; the rest go through.
+        self.assertEqual([result.ok for result in results], [False, False, True, True, True, True])
+        self.assertTrue(all("Circuit open" not in (result.error or "") for result in results))
+        self.assertEqual(client.breaker.state, "closed")
+        self.assertEqual(len(session.calls), 12)
+
+
+class RawPassthroughTests(unittest.TestCase):
+    def test_body_is_written_byte_for_byte(self) -> None:
+        body = '{"pastes": [ {"id": "a"} ],\n  "note": "не се прекодира"}'
+        response = FakeResponse(200, text=body)
+        transport = make_transport(ScriptedSession(), error=PasteError)
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "out" / "listing.json"
+            summary = transport.save(response, target, validate=True, chunk_size=4)
+            self.assertEqual(target.read_bytes(), body.encode("utf-8"))
+        self.assertEqual(summary, {"bytes": len(body.encode("utf-8")), "path": str(target.resolve())})
+        self.assertTrue(response.closed)
+
+    def test_invalid_json_raises_and_leaves_no_file(self) -> None:
+        transport = make_transport(ScriptedSession(), error=PasteError)
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "listing.json"
+            with self.assertRaises(PasteError) as ctx:
+                transport.save(FakeResponse(200, text='{"pastes": [1,'), target, validate=True)
+            self.assertIn("not valid JSON", str(ctx.exception))
+            self.assertEqual(list(Path(tmp).iterdir()), [])
+            # Without validation the body is saved as is.
+            transport.save(FakeResponse(200, text='{"pastes": [1,'), target)
+            self.assertEqual(target.read_text(), '{"pastes": [1,')
+
+    def test_error_status_is_still_checked(self) -> None:
+        transport = make_transport(ScriptedSession(), error=ShortURLError)
+        sink = BytesIO()
+        with self.assertRaises(ShortURLError):
+            transport.save(FakeResponse(403, text="denied"), sink)
+        self.assertEqual(sink.getvalue(), b"")
+
+    def test_clients_stream_instead_of_parsing(self) -> None:
+        body = json.dumps({"pastes": [{"id": "a"}]})
+        session = ScriptedSession(FakeResponse(200, text=body))
+        client = PasteClient("https://paste.test", session=session)
+        sink = BytesIO()
+        summary = client.list_pastes(save_raw=sink, validate=True)
+        self.assertEqual(sink.getvalue(), body.encode())
+        self.assertEqual(summary, {"bytes": len(body)})
+        self.assertTrue(session.calls[0]["stream"])
+        self.assertIsNone(client._metadata)
+
+
+class AITransportTests(unittest.TestCase):
+    def test_ask_retries_transient_failures(self) -> None:
+        session = MagicMock()
+        session.post.side_effect = [FakeResponse(503), FakeResponse(200, payload={"response": "ok"})]
+        with patch.object(AI, "retry", RetryPolicy(backoff=0.0)):
+            self.assertEqual(AI.ask("hi", session=session), "ok")
+        self.assertEqual(session.post.call_count, 2)
+
+
+    def test_breakers_are_kept_per_worker_origin(self) -> None:
+        session = MagicMock()
+        session.post.side_effect = [FakeResponse(500), FakeResponse(200, payload={"response": "ok"})]
+        with patch.object(AI, "retry", NO_RETRY), patch.object(
+            AI, "breaker_factory", lambda: CircuitBreaker(failure_threshold=1)
+        ), patch.dict(AI._breakers, clear=True):
+            with self.assertRaises(requests.HTTPError):
+                AI.ask("hi", url="https://down.test/v1", session=session)
+            self.assertEqual(AI.get_breaker("https://down.test/other").state, "open")
+            self.assertEqual(AI.ask("hi", url="https://up.test", session=session), "ok")
+            self.assertEqual(AI.get_breaker("https://up.test").state, "closed")
+
+    def test_breakers_can_be_disabled(self) -> None:
+        with patch.object(AI, "breaker_factory", None):
+            self.assertIsNone(AI.get_transport(url="https://w.test").breaker)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    unittest.main()